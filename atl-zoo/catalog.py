@@ -0,0 +1,254 @@
+"""Cached index of the ATL zoo transformations.
+
+Walking the zoo and parsing every config.json is repeated by each script that
+needs to know what transformations exist. The catalog does it once and keeps
+the result in a compact JSON file next to the zoo. On later loads each
+directory is only stat()ed: a directory whose mtime is unchanged reuses its
+cached listing, and a config.json whose mtime is unchanged reuses its cached
+transformations, so only what actually changed is re-read.
+
+    catalog = Catalog.load()
+    for t in catalog.consuming("Families"):
+        print(t['name'], t['dir'])
+
+Paths in an entry are kept as written in config.json (relative to the entry's
+'dir'); use Catalog.resolve() to turn them into paths on disk.
+"""
+
+import os
+import json
+import argparse
+
+ZOO_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_NAME = ".zoo_catalog.json"
+CATALOG_FILE = os.path.join(ZOO_DIR, CATALOG_NAME)
+CATALOG_VERSION = 1
+
+# Directories never worth descending into
+SKIPPED_DIRS = {'.git', '__pycache__', 'transformation_results'}
+
+
+def metamodel_key(path_or_name: str) -> str:
+    """'./MM/Families.ecore', 'Families.ecore' and 'families' all map to 'families'."""
+    name = os.path.basename(path_or_name)
+    if name.endswith('.ecore'):
+        name = name[:-len('.ecore')]
+    return name.lower()
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _entry(cfg: dict, reldir: str) -> dict:
+    """Keep the fields scripts query, in a normalized and compact form."""
+    return {
+        'name': cfg.get('name'),
+        'dir': reldir,
+        'enabled': str(cfg.get('enabled')).lower() == 'true',
+        'compiler': cfg.get('compiler'),
+        'atl_file': cfg.get('atlFile'),
+        'input_metamodels': [{'name': mm.get('name'), 'path': mm.get('path')}
+                             for mm in cfg.get('input_metamodels', [])],
+        'output_metamodels': [{'name': mm.get('name'), 'path': mm.get('path')}
+                              for mm in cfg.get('output_metamodels', [])],
+        'libraries': [{'name': lib.get('name'), 'path': lib.get('path')}
+                      for lib in cfg.get('libraries', [])],
+        'samples': [{'source': _as_list(model.get('source')), 'target': _as_list(model.get('target'))}
+                    for model in cfg.get('sample_models', [])],
+    }
+
+
+def _read_config(config_path: str, reldir: str) -> list:
+    try:
+        with open(config_path, encoding='utf-8') as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f"Error reading config in {config_path}: {e}")
+        return []
+    configs = [config] if isinstance(config, dict) else config
+    return [_entry(cfg, reldir) for cfg in configs if isinstance(cfg, dict) and cfg.get('name')]
+
+
+class Catalog:
+    """Transformations of a zoo directory, with lazily built lookup indexes."""
+
+    def __init__(self, root: str, dirs: dict, stats: dict = None):
+        self.root = root
+        # reldir -> {'mtime': ns, 'subdirs': [...], 'config_mtime': ns or None, 'transformations': [...]}
+        self._dirs = dirs
+        self.stats = stats or {}
+        self._transformations = None
+        self._by_name = None
+        self._by_input = None
+        self._by_output = None
+
+    # --- Loading ---
+
+    @classmethod
+    def load(cls, root: str = ZOO_DIR, cache_file: str = CATALOG_FILE, refresh: bool = False) -> 'Catalog':
+        """Load the catalog, re-reading only the directories changed since it was saved."""
+        cached = {} if refresh else cls._read_cache(cache_file, root)
+        dirs = {}
+        stats = {'dirs': 0, 'listed': 0, 'configs_parsed': 0}
+        changed = len(cached) == 0
+        pending = ['.']
+        while pending:
+            reldir = pending.pop()
+            path = os.path.normpath(os.path.join(root, reldir))
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            stats['dirs'] += 1
+            previous = cached.get(reldir)
+            if previous and previous['mtime'] == mtime:
+                entry = dict(previous)
+            else:
+                entry = cls._list_dir(path, mtime)
+                stats['listed'] += 1
+                # Saving the catalog itself touches the mtime of the directory holding
+                # it; only a different listing is worth rewriting the file for
+                if not previous or (previous['subdirs'], previous['config_mtime'] is None) != (
+                        entry['subdirs'], entry['config_mtime'] is None):
+                    changed = True
+
+            if entry['config_mtime'] is not None:
+                config_path = os.path.join(path, 'config.json')
+                try:
+                    config_mtime = os.stat(config_path).st_mtime_ns
+                except OSError:
+                    config_mtime = None
+                if config_mtime is None:
+                    entry['config_mtime'], entry['transformations'] = None, []
+                elif not previous or previous.get('config_mtime') != config_mtime:
+                    entry['config_mtime'] = config_mtime
+                    entry['transformations'] = _read_config(config_path, reldir)
+                    stats['configs_parsed'] += 1
+                    changed = True
+                else:
+                    entry['config_mtime'] = config_mtime
+                    entry['transformations'] = previous['transformations']
+
+            dirs[reldir] = entry
+            pending.extend(os.path.join(reldir, sub) if reldir != '.' else sub for sub in entry['subdirs'])
+
+        catalog = cls(root, dirs, stats)
+        if changed or len(dirs) != len(cached):
+            catalog.save(cache_file)
+        return catalog
+
+    @staticmethod
+    def _list_dir(path: str, mtime: int) -> dict:
+        subdirs, has_config = [], False
+        with os.scandir(path) as it:
+            for item in it:
+                if item.is_dir(follow_symlinks=False):
+                    if item.name not in SKIPPED_DIRS:
+                        subdirs.append(item.name)
+                elif item.name == 'config.json':
+                    has_config = True
+        # config_mtime 0 marks "has a config not read yet" (None means no config)
+        return {'mtime': mtime, 'subdirs': sorted(subdirs),
+                'config_mtime': 0 if has_config else None, 'transformations': []}
+
+    @staticmethod
+    def _read_cache(cache_file: str, root: str) -> dict:
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != CATALOG_VERSION or data.get('root') != os.path.abspath(root):
+            return {}
+        return data.get('dirs', {})
+
+    def save(self, cache_file: str = CATALOG_FILE) -> None:
+        tmp_path = cache_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATALOG_VERSION, 'root': os.path.abspath(self.root), 'dirs': self._dirs},
+                      f, separators=(',', ':'))
+        os.replace(tmp_path, cache_file)
+
+    # --- Queries ---
+
+    def transformations(self, enabled_only: bool = False) -> list:
+        """Every transformation, ordered by directory then position in config.json."""
+        if self._transformations is None:
+            self._transformations = [t for reldir in sorted(self._dirs)
+                                     for t in self._dirs[reldir].get('transformations', [])]
+        if enabled_only:
+            return [t for t in self._transformations if t['enabled']]
+        return list(self._transformations)
+
+    def get(self, name: str) -> list:
+        """Transformations with this name (a few names exist in several directories)."""
+        if self._by_name is None:
+            self._by_name = {}
+            for t in self.transformations():
+                self._by_name.setdefault(t['name'], []).append(t)
+        return list(self._by_name.get(name, []))
+
+    def consuming(self, metamodel: str, enabled_only: bool = False) -> list:
+        """Transformations taking a model of this metamodel (name or .ecore path) as input."""
+        if self._by_input is None:
+            self._by_input = self._index('input_metamodels')
+        return [t for t in self._by_input.get(metamodel_key(metamodel), []) if t['enabled'] or not enabled_only]
+
+    def producing(self, metamodel: str, enabled_only: bool = False) -> list:
+        """Transformations producing a model of this metamodel (name or .ecore path)."""
+        if self._by_output is None:
+            self._by_output = self._index('output_metamodels')
+        return [t for t in self._by_output.get(metamodel_key(metamodel), []) if t['enabled'] or not enabled_only]
+
+    def metamodels(self) -> list:
+        """Names of every metamodel used as an input or output."""
+        return sorted({metamodel_key(mm['path']) for t in self.transformations()
+                       for mm in t['input_metamodels'] + t['output_metamodels'] if mm.get('path')})
+
+    def _index(self, field: str) -> dict:
+        index = {}
+        for t in self.transformations():
+            for key in {metamodel_key(mm['path']) for mm in t[field] if mm.get('path')}:
+                index.setdefault(key, []).append(t)
+        return index
+
+    def resolve(self, transformation: dict, path: str) -> str:
+        """Absolute path on disk of a path written in a transformation's config.json."""
+        return os.path.normpath(os.path.join(self.root, transformation['dir'], path))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the ATL zoo transformation catalog.")
+    parser.add_argument("--consuming", metavar="METAMODEL", help="List transformations reading this metamodel.")
+    parser.add_argument("--producing", metavar="METAMODEL", help="List transformations writing this metamodel.")
+    parser.add_argument("--enabled-only", action="store_true", help="Only list enabled transformations.")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the catalog from scratch.")
+    parser.add_argument("--json", action="store_true", help="Print full entries as JSON.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    catalog = Catalog.load(refresh=args.refresh)
+    if args.consuming:
+        found = catalog.consuming(args.consuming, enabled_only=args.enabled_only)
+    elif args.producing:
+        found = catalog.producing(args.producing, enabled_only=args.enabled_only)
+    else:
+        found = catalog.transformations(enabled_only=args.enabled_only)
+
+    if args.json:
+        print(json.dumps(found, indent=2))
+        return
+    for t in found:
+        inputs = ', '.join(metamodel_key(mm['path']) for mm in t['input_metamodels'] if mm.get('path'))
+        outputs = ', '.join(metamodel_key(mm['path']) for mm in t['output_metamodels'] if mm.get('path'))
+        print(f"{t['name']:<45} {inputs} -> {outputs}  ({t['dir']}){'' if t['enabled'] else ' [disabled]'}")
+    print(f"{len(found)} transformations")
+
+
+if __name__ == "__main__":
+    main()
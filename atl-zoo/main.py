@@ -1,114 +1,342 @@
 import os
 import json
+import time
+import uuid
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 
-def apply_transformation(transformation_id_or_name: str, input_files_dict: dict) -> None:
-    API_BASE_URL = "http://localhost:8080"
-    
+from catalog import Catalog, CATALOG_NAME
+
+API_BASE_URL = os.environ.get("ATL_API_BASE_URL", "http://localhost:8080")
+OUTPUT_DIR = "transformation_results"
+CACHE_FILE = os.path.join(OUTPUT_DIR, ".zoo_cache.json")
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    """multipart/form-data body read from disk piece by piece.
+
+    requests sends file-like bodies in blocks and takes the Content-Length from
+    __len__, so input models are never loaded in memory as a whole.
+    """
+
+    def __init__(self, files: dict, chunk_size: int = CHUNK_SIZE):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.chunk_size = chunk_size
+        self._parts = []  # bytes are sent as is, str are paths of files to stream
+        for input_name, file_path in files.items():
+            header = (f'--{boundary}\r\n'
+                      f'Content-Disposition: form-data; name="{input_name}"; '
+                      f'filename="{os.path.basename(file_path)}"\r\n'
+                      f'Content-Type: application/octet-stream\r\n\r\n')
+            self._parts += [header.encode(), file_path, b'\r\n']
+        self._parts.append(f'--{boundary}--\r\n'.encode())
+        self._length = sum(len(part) if isinstance(part, bytes) else os.path.getsize(part)
+                           for part in self._parts)
+        self._chunks = self._iter_chunks()
+        self._buffer = b''
+
+    def _iter_chunks(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            with open(part, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self) -> None:
+        # Closes the input file currently being streamed, if any
+        self._chunks.close()
+
+    def __len__(self) -> int:
+        return self._length
+
+
+def apply_transformation(transformation_id_or_name: str, input_files_dict: dict,
+                         api_base_url: str = API_BASE_URL, timeout: float = 60,
+                         output_file: str = None, compress: bool = False) -> dict:
+    """Apply one transformation on the server and save the resulting XMI.
+
+    Input files are streamed from disk and the response is written to
+    output_file in chunks, so memory stays flat whatever the size of the
+    models. With compress set the result is requested gzip-compressed
+    (Accept-Encoding: gzip) and decoded while it is written.
+
+    Returns a result dict with 'status' ('ok', 'invalid_input', 'http_error' or
+    'request_error'), 'http_status', 'error', 'output_file', 'output_bytes' and
+    'transfer_bytes' (bytes received, before decoding).
+    """
+    result = {'status': 'ok', 'http_status': None, 'error': None, 'output_file': None, 'output_bytes': 0,
+              'transfer_bytes': 0}
+
     # First validate all files exist and are not directories
     for input_name, file_path in input_files_dict.items():
         if not os.path.exists(file_path):
-            print(f"Error: File does not exist: {file_path}")
-            return
+            return dict(result, status='invalid_input', error=f"File does not exist: {file_path}")
         if os.path.isdir(file_path):
-            print(f"Error: Path is a directory, not a file: {file_path}")
-            return
-            
+            return dict(result, status='invalid_input', error=f"Path is a directory, not a file: {file_path}")
+
+    body = MultipartStream(input_files_dict)
+    headers = {'Content-Type': body.content_type}
+    if compress:
+        headers['Accept-Encoding'] = 'gzip'
     try:
-        files = {}
-        file_handles = []  # Keep track of opened files       
-        try:
-            # Open all files first
-            for input_name, file_path in input_files_dict.items():
-                f = open(file_path, 'rb')
-                file_handles.append(f)  # Save the handle to close later
-                files[input_name] = f
-                
-            # Send the request
-            response = requests.post(
-                f"{API_BASE_URL}/transformation/{transformation_id_or_name}/apply",
-                files=files,
-                timeout=60
-            )
-            
+        # Upload is streamed from disk and the result streamed back to disk
+        with requests.post(
+            f"{api_base_url}/transformation/{transformation_id_or_name}/apply",
+            data=body,
+            headers=headers,
+            timeout=timeout,
+            stream=True
+        ) as response:
+            result['http_status'] = response.status_code
+
             if response.status_code == 200:
-                result = response.text
-                output_dir = "transformation_results"
-                os.makedirs(output_dir, exist_ok=True)
-                output_file = os.path.join(output_dir, f"result_{transformation_id_or_name}.xmi")
-                
-                with open(output_file, 'w') as f:
-                    f.write(result)
-                print(f"Transformation successful! Result saved to: {output_file}")
+                output_file = output_file or os.path.join(OUTPUT_DIR, f"result_{transformation_id_or_name}.xmi")
+                os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+                # Write next to the target so an interrupted download never leaves a truncated result
+                partial_file = output_file + '.part'
+                with open(partial_file, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(partial_file, output_file)
+                result['output_file'] = output_file
+                result['output_bytes'] = os.path.getsize(output_file)
+                # Bytes pulled over the wire, which differ from output_bytes when compressed
+                result['transfer_bytes'] = response.raw.tell()
             else:
-                print(f"Error: ")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Request error for {transformation_id_or_name}: {str(e)}")
-            
-        finally:
-            # Make sure to close all opened files
-            for f in file_handles:
-                f.close()
-                
-    except Exception as e:
-        print(f"Error processing {transformation_id_or_name}: {str(e)}") 
-def main():
+                result['status'] = 'http_error'
+                result['error'] = response.text[:500]
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    transformation_dirs = []
-    for dirpath, dirnames, filenames in os.walk(script_dir):
-        if 'config.json' in filenames:
-            transformation_dirs.append(dirpath)
-
-    # Sort directories alphabetically
-    transformation_dirs.sort()
-    for dirpath in transformation_dirs:
+    except requests.exceptions.RequestException as e:
+        result['status'] = 'request_error'
+        result['error'] = str(e)
+
+    finally:
+        body.close()
+
+    return result
+
+
+def collect_jobs(root_dir: str, enabled_only: bool = False) -> list:
+    """Build one job per sample model of every transformation found under root_dir."""
+    catalog = Catalog.load(root_dir, cache_file=os.path.join(root_dir, CATALOG_NAME))
+    jobs = []
+    for t in catalog.transformations(enabled_only=enabled_only):
+        dirpath = os.path.normpath(os.path.join(root_dir, t['dir']))
+        input_metamodels = t['input_metamodels']
+        samples = t['samples']
+
+        for sample_idx, model in enumerate(samples):
+            source_files = model['source']
+            if not source_files:
+                continue
+
+            # Create a dictionary mapping input names to their files
+            input_files_dict = {}
+            for idx, source in enumerate(source_files):
+                if idx < len(input_metamodels):
+                    source_path = os.path.join(dirpath, source.replace('./', ''))
+                    input_name = input_metamodels[idx]['name']
+                    input_files_dict[input_name] = source_path
+
+            # Every file whose content determines the result of this job
+            dependencies = [t['atl_file']]
+            dependencies += [mm['path'] for mm in input_metamodels]
+            dependencies += [mm['path'] for mm in t['output_metamodels']]
+            dependencies += [lib['path'] for lib in t['libraries']]
+            dependencies += source_files
+
+            suffix = f"_{sample_idx}" if len(samples) > 1 else ""
+            jobs.append({
+                'name': t['name'],
+                'dir': dirpath,
+                'sample': sample_idx,
+                'inputs': input_files_dict,
+                'dependencies': [os.path.normpath(os.path.join(dirpath, dep)) for dep in dependencies if dep],
+                'output_file': os.path.join(OUTPUT_DIR, f"result_{t['name']}{suffix}.xmi"),
+            })
+
+    # Some transformation names appear in several directories; concurrent jobs
+    # must not write to the same result file
+    seen = {}
+    for job in jobs:
+        count = seen.get(job['output_file'], 0)
+        seen[job['output_file']] = count + 1
+        if count:
+            job['output_file'] = job['output_file'][:-len(".xmi")] + f"_{count + 1}.xmi"
+    return jobs
+
+
+_file_digests = {}
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's content ('missing' if it does not exist), memoized per run."""
+    if path not in _file_digests:
+        if not os.path.isfile(path):
+            _file_digests[path] = 'missing'
+        else:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            _file_digests[path] = digest.hexdigest()
+    return _file_digests[path]
+
+
+def job_hash(job: dict) -> str:
+    """Content hash of the ATL file, metamodels, libraries and sample sources of a job."""
+    digest = hashlib.sha256(job['name'].encode())
+    for path in job['dependencies']:
+        digest.update(f"\0{os.path.relpath(path, job['dir'])}\0{file_digest(path)}".encode())
+    return digest.hexdigest()
+
+
+def load_cache(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def split_cached(jobs: list, cache: dict) -> tuple:
+    """Separate jobs whose inputs are unchanged since a successful run from those to run."""
+    pending, cached = [], []
+    for job in jobs:
+        job['hash'] = job_hash(job)
+        entry = cache.get(job['output_file'])
+        if (entry and entry.get('hash') == job['hash'] and entry['result'].get('status') == 'ok'
+                and os.path.exists(job['output_file'])):
+            cached.append(dict(entry['result'], cached=True))
+        else:
+            pending.append(job)
+    return pending, cached
+
+
+def run_job(job: dict, api_base_url: str, timeout: float, retries: int, compress: bool = False) -> dict:
+    """Run one job, retrying request errors and 5xx responses."""
+    start = time.monotonic()
+    attempts = 0
+    while True:
+        attempts += 1
         try:
-            with open(os.path.join(dirpath, 'config.json')) as f:
-                config = json.load(f)
-
-            configs = [config] if isinstance(config, dict) else config
-            for cfg in configs:
-                try:
-                    name = cfg.get('name')
-                    input_metamodels = cfg.get('input_metamodels', [])
-                    sample_models = cfg.get('sample_models', [])
-
-                    for model in sample_models:
-                        try:
-                            source_files = model.get('source', [])
-                            if source_files:
-                                if isinstance(source_files, str):
-                                    source_files = [source_files]
-                                
-                                # Create a dictionary mapping input names to their files
-                                input_files_dict = {}
-                                for idx, source in enumerate(source_files):
-                                    if idx < len(input_metamodels):
-                                        source_path = os.path.join(dirpath, source.replace('./', ''))
-                                        input_name = input_metamodels[idx]['name']
-                                        input_files_dict[input_name] = source_path
-                              
-                                print(f"\nTrying to apply transformation {name} with inputs:")
-                                   
-                                try:
-                                    apply_transformation(name, input_files_dict)
-                                except Exception as e:
-                                    print(f"Failed to apply transformation {name}: {e}")
-                                    continue
-                        except Exception as e:
-                            print(f"Error with model for {name}: {e}")
-                            continue
-                except Exception as e:
-                    print(f"Error processing config for transformation: {e}")
-                    continue
+            result = apply_transformation(job['name'], job['inputs'], api_base_url=api_base_url,
+                                          timeout=timeout, output_file=job['output_file'],
+                                          compress=compress)
         except Exception as e:
-            print(f"Error reading config in {dirpath}: {e}")
-            continue
+            result = {'status': 'request_error', 'http_status': None, 'error': str(e),
+                      'output_file': None, 'output_bytes': 0, 'transfer_bytes': 0}
+        transient = result['status'] == 'request_error' or (
+            result['status'] == 'http_error' and (result['http_status'] or 0) >= 500)
+        if not transient or attempts > retries:
+            break
+        time.sleep(min(2 ** (attempts - 1), 10))
+    return dict(result, name=job['name'], dir=job['dir'], sample=job['sample'],
+                attempts=attempts, latency_s=round(time.monotonic() - start, 3))
+
+
+def run_jobs(jobs: list, workers: int = 4, timeout: float = 60, retries: int = 1,
+             api_base_url: str = API_BASE_URL, compress: bool = False) -> list:
+    """Run jobs on a worker pool, printing progress as each one finishes."""
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_job, job, api_base_url, timeout, retries, compress): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            detail = result['output_file'] if result['status'] == 'ok' else result['error']
+            print(f"[{done}/{len(jobs)}] {result['name']}: {result['status']} "
+                  f"in {result['latency_s']:.1f}s ({detail})")
+    results.sort(key=lambda r: (r['dir'], r['name'], r['sample']))
+    return results
+
+
+def write_summary(results: list, path: str, duration: float, workers: int) -> None:
+    totals = {}
+    for result in results:
+        totals[result['status']] = totals.get(result['status'], 0) + 1
+    summary = {
+        'duration_s': round(duration, 3),
+        'workers': workers,
+        'total': len(results),
+        'totals': totals,
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply every ATL zoo transformation to its sample models.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of transformations run concurrently (default: 4).")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-transformation request timeout in seconds (default: 60).")
+    parser.add_argument("--retries", type=int, default=1, help="Retries for request errors and 5xx responses (default: 1).")
+    parser.add_argument("--api", default=API_BASE_URL, help=f"Transformation server base URL (default: {API_BASE_URL}).")
+    parser.add_argument("--gzip", action="store_true", help="Ask for gzip-compressed results (Accept-Encoding: gzip).")
+    parser.add_argument("--enabled-only", action="store_true", help="Only run transformations whose config is enabled.")
+    parser.add_argument("--summary", default=os.path.join(OUTPUT_DIR, "summary.json"),
+                        help="Where to write the machine-readable run summary.")
+    parser.add_argument("--cache", default=CACHE_FILE, help=f"Result cache keyed on content hashes (default: {CACHE_FILE}).")
+    parser.add_argument("--force", action="store_true", help="Re-run every transformation, ignoring the cache.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    jobs = collect_jobs(script_dir, enabled_only=args.enabled_only)
+
+    start = time.monotonic()
+    cache = {} if args.force else load_cache(args.cache)
+    pending, cached = split_cached(jobs, cache)
+    for result in cached:
+        print(f"[cached] {result['name']}: {result['status']} ({result['output_file']})")
+    print(f"Running {len(pending)} transformations with {args.workers} workers ({len(cached)} unchanged, skipped)")
+
+    results = run_jobs(pending, workers=args.workers, timeout=args.timeout,
+                       retries=args.retries, api_base_url=args.api, compress=args.gzip)
+    jobs_by_id = {(job['dir'], job['name'], job['sample']): job for job in pending}
+    for result in results:
+        job = jobs_by_id[(result['dir'], result['name'], result['sample'])]
+        cache[job['output_file']] = {'hash': job['hash'], 'result': result}
+    save_cache(cache, args.cache)
+
+    results = sorted(results + cached, key=lambda r: (r['dir'], r['name'], r['sample']))
+    duration = time.monotonic() - start
+    write_summary(results, args.summary, duration, args.workers)
+
+    ok = sum(1 for r in results if r['status'] == 'ok')
+    print(f"All transformations processed: {ok}/{len(results)} succeeded in {duration:.1f}s")
+    print(f"Summary written to {args.summary}")
 
-    print("All transformations processed")
-    print("finished")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
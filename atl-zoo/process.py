@@ -2,6 +2,17 @@ import os
 import json
 from pathlib import Path
 
+from catalog import Catalog, CATALOG_NAME
+
+def metamodel_names(metamodels):
+    """Nom de chaque métamodèle sans ".ecore" (son nom déclaré s'il n'a pas de chemin)."""
+    names = []
+    for mm in metamodels:
+        name = Path(mm['path']).stem if mm.get('path') else mm.get('name')
+        if name:
+            names.append(name)
+    return names
+
 def get_transformation_details():
     # Liste pour stocker les détails des transformations
     transformation_details = []
@@ -9,47 +20,28 @@ def get_transformation_details():
     # Récupérer le répertoire de travail actuel (dossier racine)
     root_dir = Path.cwd()
     
-    # Parcourir tous les dossiers
-    for dirpath, _, filenames in os.walk(root_dir):
-        # Vérifier si le fichier config.json existe dans le dossier actuel
-        if 'config.json' in filenames:
-            config_path = Path(dirpath) / 'config.json'
-            try:
-                # Lire et analyser le fichier config.json
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    
-                # Extraire les détails des transformations activées
-                for item in config_data:
-                    if item.get('enabled') == "True":
-                        name = item.get('name')
-                        
-                        # Garder uniquement le nom du métamodèle sans ".ecore"
-                        input_metamodels = [
-                            Path(mm['path']).stem for mm in item.get('input_metamodels', [])
-                        ]
-                        output_metamodels = [
-                            Path(mm['path']).stem for mm in item.get('output_metamodels', [])
-                        ]
-                        
-                        # Convertir les chemins des sources en absolu
-                        source_models = [
-                            str((Path(dirpath) / source).resolve())
-                            for sample in item.get('sample_models', [])
-                            for source in sample.get('source', [])
-                        ]
-                        
-                        if name:
-                            transformation_details.append({
-                                "name": name,
-                                "input_metamodels": input_metamodels,
-                                "output_metamodels": output_metamodels,
-                                "source_models": source_models
-                            })
-            except json.JSONDecodeError:
-                print(f"Erreur lors de l'analyse JSON dans {config_path}")
-            except Exception as e:
-                print(f"Erreur lors du traitement de {config_path} : {str(e)}")
+    # Le catalogue ne relit que les dossiers et config.json modifiés depuis le dernier appel
+    catalog = Catalog.load(str(root_dir), cache_file=str(root_dir / CATALOG_NAME))
+    
+    # Extraire les détails des transformations activées
+    for item in catalog.transformations(enabled_only=True):
+        # Garder uniquement le nom du métamodèle sans ".ecore"
+        input_metamodels = metamodel_names(item['input_metamodels'])
+        output_metamodels = metamodel_names(item['output_metamodels'])
+        
+        # Convertir les chemins des sources en absolu
+        source_models = [
+            str(Path(catalog.resolve(item, source)).resolve())
+            for sample in item['samples']
+            for source in sample['source']
+        ]
+        
+        transformation_details.append({
+            "name": item['name'],
+            "input_metamodels": input_metamodels,
+            "output_metamodels": output_metamodels,
+            "source_models": source_models
+        })
     
     return transformation_details
 
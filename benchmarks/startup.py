@@ -0,0 +1,140 @@
+"""Cold-start benchmark for the agent CLI and the MCP servers.
+
+Every measurement runs in a fresh interpreter, so nothing is already imported:
+
+- import: time to import the module a process starts with (``python -X importtime``),
+  with the slowest top-level imports listed for each target
+- handshake: time from launching a server over stdio until it answers the MCP
+  ``initialize`` request, i.e. what an agent waits for before its first tool call
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --output startup.json
+    python benchmarks/startup.py --max-import-ms 1500   # exit 1 when a target is slower
+
+The servers are started with EMF_TOOLS_API_PORT=0; they need no EMF backend to
+answer the handshake.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (working directory, module imported at startup, whether it is an MCP server)
+TARGETS = {
+    'agent-cli': (os.path.join(REPO_DIR, 'mcp-agent'), 'cli', False),
+    'stateless-server': (os.path.join(REPO_DIR, 'mcp-server'), 'emf_mcp_stateless', True),
+    'dynamic-server': (os.path.join(REPO_DIR, 'emf-agent-main', 'emf_agent'), 'emf_mcp_server', True),
+}
+
+
+def measure_import(cwd: str, module: str, python: str) -> dict:
+    """Import module in a fresh interpreter; returns total ms and the top-level imports' ms."""
+    start = time.perf_counter()
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'], cwd=cwd,
+                          env={**os.environ, 'EMF_TOOLS_API_PORT': '0'},
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    # Lines look like "import time:  self [us] | cumulative | imported package", nested by indentation
+    total_us, top_level = 0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip() == module:
+            total_us = int(cumulative)
+        elif name.startswith('   ') and not name.startswith('    '):
+            top_level[name.strip()] = int(cumulative) / 1000
+    return {'import_ms': total_us / 1000, 'process_ms': wall_ms, 'top_imports': top_level}
+
+
+async def _handshake(cwd: str, module: str, python: str) -> float:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=python, args=[os.path.join(cwd, module + '.py')], cwd=cwd,
+                                   env={**os.environ, 'EMF_TOOLS_API_PORT': '0'})
+    with open(os.devnull, 'w') as errlog:
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                elapsed = (time.perf_counter() - start) * 1000
+    return elapsed
+
+
+def measure_handshake(cwd: str, module: str, python: str) -> float:
+    """Milliseconds from launching the server until it answers MCP initialize."""
+    return asyncio.run(_handshake(cwd, module, python))
+
+
+def summarize(values: list) -> dict:
+    return {'median': round(statistics.median(values), 1), 'min': round(min(values), 1),
+            'max': round(max(values), 1)}
+
+
+def run_target(name: str, runs: int, python: str, top: int) -> dict:
+    cwd, module, is_server = TARGETS[name]
+    imports = [measure_import(cwd, module, python) for _ in range(runs)]
+    result = {
+        'module': module,
+        'import_ms': summarize([r['import_ms'] for r in imports]),
+        'process_ms': summarize([r['process_ms'] for r in imports]),
+        'slowest_imports': sorted(
+            ((mod, round(statistics.median(r['top_imports'].get(mod, 0) for r in imports), 1))
+             for mod in imports[-1]['top_imports']),
+            key=lambda item: -item[1])[:top],
+    }
+    if is_server:
+        result['handshake_ms'] = summarize([measure_handshake(cwd, module, python) for _ in range(runs)])
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure cold-start import and handshake times.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement (default: 5).")
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append",
+                        help="Only measure this target (repeatable).")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to list (default: 5).")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to measure.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--max-import-ms", type=float,
+                        help="Exit with status 1 if a target's median import time exceeds this.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = {}
+    for name in args.target or list(TARGETS):
+        result = run_target(name, args.runs, args.python, args.top)
+        results[name] = result
+        line = f"{name:<18} import {result['import_ms']['median']:>7.1f} ms  process {result['process_ms']['median']:>7.1f} ms"
+        if 'handshake_ms' in result:
+            line += f"  handshake {result['handshake_ms']['median']:>7.1f} ms"
+        print(line)
+        for module, ms in result['slowest_imports']:
+            print(f"    {module:<40} {ms:>7.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs, 'results': results}, f, indent=2)
+
+    if args.max_import_ms is not None:
+        slow = [name for name, r in results.items() if r['import_ms']['median'] > args.max_import_ms]
+        if slow:
+            print(f"Over the {args.max_import_ms:.0f} ms import budget: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
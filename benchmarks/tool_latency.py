@@ -0,0 +1,369 @@
+"""Latency benchmark of every tool of mcp-server/emf_mcp_stateless.py.
+
+The MCP server is launched over the real stdio transport, with
+EMF_TOOL_TIMING=1 so it records how long each call spent in its handler, in
+HTTP requests to the EMF backend and in rendering the result. For each
+metamodel, model size and concurrency level the benchmark:
+
+1. starts a session and fills it with the requested number of objects
+   (apply_operations batches, not measured);
+2. calls each tool --requests times, at most --concurrency at a time;
+3. reports client-side latency percentiles and throughput. The time is split
+   into MCP transport, HTTP, rendering and other server time, where
+   mcp = client latency - server handler time.
+
+The EMF backend is mcp-server/emf_standin.py, started as a subprocess
+(--latency-ms models a remote server). Pass --emf-url to measure a running
+Java server instead.
+
+    python benchmarks/tool_latency.py --sizes 10,1000,100000 --concurrency 1,8 --output latest.json
+    python benchmarks/tool_latency.py --compare baseline.json   # exit 1 on a p50/p95 regression
+
+Results are saved as JSON together with the commit they were measured at.
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(REPO_DIR, 'mcp-server')
+sys.path.insert(0, SERVER_DIR)
+
+from metamodel_index import MetamodelIndex  # noqa: E402
+
+DEFAULT_METAMODELS = [
+    os.path.join(REPO_DIR, 'atl-zoo', 'Families2Persons', 'Families.ecore'),
+    os.path.join(REPO_DIR, 'atl-zoo', 'Public2Private', 'UML.ecore'),
+]
+# Measured in this order: objects created by create_object are deleted by delete_object
+TOOLS = ['create_object', 'update_feature', 'clear_feature', 'inspect_instance', 'list_features',
+         'apply_operations', 'list_session_objects', 'get_session_info', 'delete_object']
+POPULATE_BATCH = 500
+SESSION_STARTS = 5
+STRING_TYPES = {'String', 'EString'}
+
+_CREATED = re.compile(r'^\d+ create (\w+).*: ok id=(\S+)', re.MULTILINE)
+# The id in create_object's result, whichever EMF_RESPONSE_FORMAT the server uses
+_ID = re.compile(r'"?\bid"?\s*[:=]\s*"?([\w-]+)')
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def distribution(values_s: list) -> dict:
+    """Percentiles of durations given in seconds, in milliseconds."""
+    values = sorted(v * 1000 for v in values_s)
+    if not values:
+        return {}
+    return {'p50': round(percentile(values, 50), 3), 'p95': round(percentile(values, 95), 3),
+            'p99': round(percentile(values, 99), 3), 'mean': round(statistics.fmean(values), 3),
+            'max': round(values[-1], 3)}
+
+
+class Workload:
+    """Arguments for each tool call, drawn from the session's metamodel and objects."""
+
+    def __init__(self, session_id: str, index: MetamodelIndex, seed: int):
+        self.session_id = session_id
+        self.random = random.Random(seed)
+        self.classes = index.class_names(include_abstract=False)
+        # (class, single-valued string attribute) pairs to update and clear
+        self.attributes = [(name, f.name) for name in self.classes for f in index.all_features(name)
+                           if f.kind == 'attribute' and not f.many and f.type in STRING_TYPES]
+        self.objects = {name: [] for name in self.classes}
+        self.created = []
+        self.counter = 0
+
+    def add_created(self, text: str) -> None:
+        for class_name, object_id in _CREATED.findall(text):
+            self.objects[class_name].append(object_id)
+
+    def populate_ops(self, count: int) -> list:
+        ops = []
+        for _ in range(count):
+            ops.append({'op': 'create', 'class_name': self.classes[self.counter % len(self.classes)]})
+            self.counter += 1
+        return ops
+
+    def random_object(self, classes=None):
+        candidates = [c for c in (classes or self.classes) if self.objects.get(c)]
+        class_name = self.random.choice(candidates)
+        return class_name, self.random.choice(self.objects[class_name])
+
+    def args(self, tool: str) -> dict:
+        self.counter += 1
+        sid = {'session_id': self.session_id}
+        if tool == 'create_object':
+            return {**sid, 'class_name': self.classes[self.counter % len(self.classes)]}
+        if tool in ('update_feature', 'clear_feature'):
+            class_name, feature = self.random.choice(
+                [a for a in self.attributes if self.objects.get(a[0])] or [(None, None)])
+            if class_name is None:
+                return {}
+            object_id = self.random.choice(self.objects[class_name])
+            args = {**sid, 'class_name': class_name, 'object_id': object_id, 'feature_name': feature}
+            return {**args, 'value': f'value {self.counter}'} if tool == 'update_feature' else args
+        if tool == 'inspect_instance':
+            class_name, object_id = self.random_object()
+            return {**sid, 'class_name': class_name, 'object_id': object_id}
+        if tool == 'list_features':
+            return {**sid, 'class_name': self.random.choice(self.classes)}
+        if tool == 'apply_operations':
+            ops = []
+            for i in range(5):
+                class_name, feature = (self.random.choice(self.attributes) if self.attributes
+                                       else (self.random.choice(self.classes), None))
+                ops.append({'op': 'create', 'class_name': class_name, 'ref': f'o{i}'})
+                if feature:
+                    ops.append({'op': 'update', 'class_name': class_name, 'object_id': f'$o{i}',
+                                'feature_name': feature, 'value': f'batch {self.counter}'})
+            return {**sid, 'operations': json.dumps(ops)}
+        if tool == 'delete_object':
+            if not self.created:
+                return {}
+            class_name, object_id = self.created.pop()
+            return {**sid, 'class_name': class_name, 'object_id': object_id}
+        return sid
+
+
+async def call(session, tool: str, args: dict):
+    """Call a tool; returns (seconds, result text, is_error)."""
+    start = time.perf_counter()
+    result = await session.call_tool(tool, args)
+    elapsed = time.perf_counter() - start
+    text = result.content[0].text if result.content else ''
+    head = text[:80]
+    error = bool(result.isError) or head.startswith('Error') or ' not found' in head or 'error' in head[:12]
+    return elapsed, text, error
+
+
+async def measure_tool(session, workload: Workload, tool: str, requests: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal errors
+        args = workload.args(tool)
+        if not args:
+            return
+        async with semaphore:
+            elapsed, text, error = await call(session, tool, args)
+        latencies.append(elapsed)
+        errors += error
+        match = _ID.search(text) if tool == 'create_object' and not error else None
+        if match:
+            workload.created.append((args['class_name'], match.group(1)))
+            workload.objects[args['class_name']].append(match.group(1))
+
+    await call(session, 'get_tool_timings', {})  # drop samples of earlier calls
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - start
+    _, text, _ = await call(session, 'get_tool_timings', {})
+    server = json.loads(text).get(tool, [])
+
+    handler = [s[0] for s in server]
+    http = [s[1] for s in server]
+    render = [s[2] for s in server]
+    mean = lambda values: statistics.fmean(values) * 1000 if values else 0.0  # noqa: E731
+    split = {'mcp': mean(latencies) - mean(handler), 'http': mean(http), 'render': mean(render),
+             'other': mean(handler) - mean(http) - mean(render)}
+    return {
+        'tool': tool,
+        'calls': len(latencies),
+        'errors': errors,
+        'throughput_per_s': round(len(latencies) / wall, 1) if wall else 0.0,
+        'latency_ms': distribution(latencies),
+        'server_ms': {'handler': distribution(handler), 'http': distribution(http), 'render': distribution(render)},
+        'split_mean_ms': {key: round(value, 3) for key, value in split.items()},
+    }
+
+
+async def run_scenario(session, metamodel: str, size: int, concurrency: int, args) -> list:
+    index = MetamodelIndex.from_file(metamodel)
+    starts = []
+    for _ in range(SESSION_STARTS):
+        elapsed, text, error = await call(session, 'start_session', {'metamodel_file_path': metamodel})
+        if error:
+            raise RuntimeError(f"start_session failed: {text}")
+        starts.append(elapsed)
+    session_id = json.loads(text)['sessionId']
+    workload = Workload(session_id, index, args.seed)
+
+    remaining = size
+    while remaining > 0:
+        batch = min(POPULATE_BATCH, remaining)
+        _, text, _ = await call(session, 'apply_operations', {
+            'session_id': session_id, 'operations': json.dumps(workload.populate_ops(batch))})
+        workload.add_created(text)
+        remaining -= batch
+
+    results = [{'tool': 'start_session', 'calls': len(starts), 'errors': 0,
+                'latency_ms': distribution(starts)}]
+    for tool in args.tools or TOOLS:
+        results.append(await measure_tool(session, workload, tool, args.requests, concurrency))
+    for result in results:
+        result.update(metamodel=os.path.basename(metamodel), objects=size, concurrency=concurrency)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(latency_ms: float, jitter_ms: float):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, 'emf_standin.py'), '--port', str(port),
+                             '--latency-ms', str(latency_ms), '--jitter-ms', str(jitter_ms)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return proc, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("EMF stand-in did not start")
+
+
+async def run(args, emf_url: str) -> list:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    env = {**os.environ, 'EMF_SERVER_BASE': emf_url, 'EMF_TOOL_TIMING': '1', 'EMF_TOOLS_API_PORT': '0',
+           'EMF_SESSION_MAX': '0'}
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(SERVER_DIR, 'emf_mcp_stateless.py')],
+                                   cwd=SERVER_DIR, env=env)
+    results = []
+    with open(os.devnull, 'w') as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for metamodel in [os.path.abspath(path) for path in args.metamodel or DEFAULT_METAMODELS]:
+                    for size in args.sizes:
+                        for concurrency in args.concurrency:
+                            scenario = await run_scenario(session, metamodel, size, concurrency, args)
+                            print_scenario(scenario)
+                            results.extend(scenario)
+    return results
+
+
+def print_scenario(results: list) -> None:
+    first = results[0]
+    print(f"\n{first['metamodel']}, {first['objects']} objects, concurrency {first['concurrency']}")
+    print(f"  {'tool':<22}{'calls':>6}{'err':>5}{'ops/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"   split ms (mcp/http/render/other)")
+    for r in results:
+        latency = r['latency_ms']
+        split = r.get('split_mean_ms')
+        split_text = '/'.join(f"{split[k]:.2f}" for k in ('mcp', 'http', 'render', 'other')) if split else ''
+        print(f"  {r['tool']:<22}{r['calls']:>6}{r['errors']:>5}{r.get('throughput_per_s', ''):>9}"
+              f"{latency.get('p50', 0):>9.2f}{latency.get('p95', 0):>9.2f}{latency.get('p99', 0):>9.2f}   {split_text}")
+
+
+def compare(results: list, baseline_path: str, threshold_pct: float) -> bool:
+    """Print p50/p95 changes against a previous run; True if any got worse than threshold_pct."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    key = lambda r: (r['metamodel'], r['objects'], r['concurrency'], r['tool'])  # noqa: E731
+    previous = {key(r): r for r in baseline['results']}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit') or '?'}):")
+    regressed = False
+    for r in results:
+        old = previous.get(key(r))
+        if not old:
+            continue
+        changes = []
+        for pct in ('p50', 'p95'):
+            before, after = old['latency_ms'].get(pct), r['latency_ms'].get(pct)
+            if not before:
+                continue
+            change = 100 * (after - before) / before
+            changes.append(f"{pct} {before:.2f} -> {after:.2f} ms ({change:+.0f}%)")
+            regressed |= change > threshold_pct
+        if changes:
+            print(f"  {r['metamodel']} n={r['objects']} c={r['concurrency']} {r['tool']}: {', '.join(changes)}")
+    return regressed
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def int_list(text: str) -> list:
+    return [int(item) for item in text.split(',') if item]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure per-tool latency of the stateless EMF MCP server.")
+    parser.add_argument("--metamodel", action="append",
+                        help="Metamodel to benchmark (repeatable; default: Families.ecore and UML.ecore).")
+    parser.add_argument("--sizes", type=int_list, default=[10, 1000],
+                        help="Comma-separated model sizes in objects (default: 10,1000).")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8],
+                        help="Comma-separated numbers of calls in flight (default: 1,8).")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool and scenario (default: 200).")
+    parser.add_argument("--tools", type=lambda text: text.split(','), help="Comma-separated subset of tools.")
+    parser.add_argument("--emf-url", help="Use this EMF REST server instead of starting the stand-in.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stand-in delay per request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Stand-in random extra delay.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the argument choices.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Compare with an earlier --output file.")
+    parser.add_argument("--regression-pct", type=float, default=20.0,
+                        help="With --compare, exit 1 if a p50 or p95 grew by more than this (default: 20).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    standin = None
+    emf_url = args.emf_url
+    if not emf_url:
+        standin, emf_url = start_standin(args.latency_ms, args.jitter_ms)
+    try:
+        results = asyncio.run(run(args, emf_url))
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+
+    if args.output:
+        report = {
+            'commit': git_commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'config': {'backend': args.emf_url or 'standin', 'latency_ms': args.latency_ms,
+                       'jitter_ms': args.jitter_ms, 'requests': args.requests},
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(results, args.compare, args.regression_pct):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,27 @@
+import asyncio
 import logging
 import sys
 import os
-import json
+import threading
 import requests
 from typing import Dict, Any, List, Union
 from mcp.server.fastmcp import FastMCP
 from mcp.server.fastmcp import Context
 
+# Modules shared with the stateless server (mcp-common/ at the repository root)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'mcp-common'))
+
+from response_format import render, savings  # noqa: E402
+from session_store import ObjectTracker, SessionStore  # noqa: E402
+import tool_profiler  # noqa: E402
+
 EMF_SERVER_BASE = "http://localhost:8080"
 
+# Session store bounds (0 disables a limit)
+SESSION_MAX = int(os.environ.get("EMF_SESSION_MAX", "64"))
+SESSION_IDLE_TTL = float(os.environ.get("EMF_SESSION_IDLE_TTL", "3600"))
+SESSION_CLOSE_ON_EVICT = os.environ.get("EMF_SESSION_CLOSE_ON_EVICT", "false").lower() in ("1", "true", "yes")
+
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -20,10 +33,58 @@ logger = logging.getLogger('emf_mcp_server')
 # Initialize the MCP server
 mcp = FastMCP("emf_dynamic")
 
-# Session storage
-active_sessions = {}
+_background_tasks = set()
+
+def on_session_evicted(session_id: str, data: Dict[str, Any], reason: str):
+    """Forget the evicted session's objects and tools, optionally close it on the EMF server."""
+    session_objects.pop(session_id, None)
+    removed = deactivate_session_tools(session_id)
+    if reason == 'deleted':
+        return
+    logger.info(f"Evicted session {session_id} ({reason})")
+    if removed:
+        # No request of this client is running here: use the session it last called from
+        notify_tools_changed_in_background()
+    if SESSION_CLOSE_ON_EVICT:
+        close_in_background(session_id)
+
+def close_remote_session(session_id: str):
+    """DELETE the session on the EMF server (blocking)."""
+    try:
+        response = make_request('DELETE', f'/metamodel/{session_id}', timeout=5)
+        if response.status_code != 200:
+            logger.warning(f"Could not close session {session_id} on the EMF server: {response.text}")
+    except Exception as e:
+        logger.warning(f"Could not close session {session_id} on the EMF server: {e}")
+
+def close_in_background(session_id: str):
+    """Close session_id on the EMF server from a worker thread.
+
+    Evictions run inside the session store's lock, often on the event loop, so
+    the blocking request must not run in the caller.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        threading.Thread(target=close_remote_session, args=(session_id,), daemon=True).start()
+        return
+    task = loop.create_task(asyncio.to_thread(close_remote_session, session_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+# Session storage, bounded by size and idle time
+active_sessions = SessionStore(SESSION_MAX, SESSION_IDLE_TTL, on_evict=on_session_evicted)
 # Store object IDs by session and class - IDs can be any type
-session_objects = {}  # {session_id: {class_name: [object_ids]}}
+session_objects = {}  # {session_id: ObjectTracker}, entries leave with their session
+# Dynamic tools are only registered for the active session. The registration is
+# process-wide (one tool manager), so this server serves a single client over stdio:
+# on a shared transport one client switching sessions would swap every client's tools.
+session_tool_names = {}  # {session_id: [tool_name, ...]}
+active_session_id = None
+# Active session whose tools are generated on the next list_tools or call of a dynamic tool
+pending_session_id = None
+# ServerSession of the client, for notifications sent outside its requests (evictions)
+client_session = None
 
 
 def parse_id_from_user_input(user_input: str) -> Union[str, int]:
@@ -39,24 +100,21 @@ def parse_id_from_user_input(user_input: str) -> Union[str, int]:
 
 def remove_object_from_session(session_id: str, class_name: str, object_id: Any):
     """Remove an object ID from session tracking."""
-    if (session_id in session_objects and 
-        class_name in session_objects[session_id]):
-        try:
-            session_objects[session_id][class_name].remove(object_id)
-        except ValueError:
-            pass
+    if session_id in session_objects:
+        session_objects[session_id].discard(object_id)
 
 def add_object_to_session(session_id: str, class_name: str, object_id: Any):
     """Add an object ID to session tracking."""
 
-    # Initialize empty containers before we can append to them, bcs Python dictionaries don't auto-create nested structures
+    # Objects of evicted sessions are not tracked anymore
+    if active_sessions.peek(session_id) is None:
+        return
+
     if session_id not in session_objects:
-        session_objects[session_id] = {}
-    if class_name not in session_objects[session_id]:
-        session_objects[session_id][class_name] = []
-    
+        session_objects[session_id] = ObjectTracker()
+
     # Store the original ID 
-    session_objects[session_id][class_name].append(object_id)
+    session_objects[session_id].add(class_name, object_id)
 
 def get_session_objects(session_id: str, class_name: str = None) -> Dict[str, List[Any]]:
     """Get all objects for a session, optionally filtered by class."""
@@ -64,9 +122,9 @@ def get_session_objects(session_id: str, class_name: str = None) -> Dict[str, Li
         return {}
     if class_name:
         # Get only class objects
-        return {class_name: session_objects[session_id].get(class_name, [])}
+        return {class_name: session_objects[session_id].ids(class_name)}
     # Get all objects in session
-    return session_objects[session_id]
+    return session_objects[session_id].as_dict()
 
 def format_object_list(session_id: str, class_name: str) -> str:
     """Format object list with optional details."""
@@ -77,86 +135,190 @@ def format_object_list(session_id: str, class_name: str) -> str:
     object_ids = objects[class_name]
     return f"Available {class_name} objects: {object_ids}" 
 
+def respond(session_id: str, data: Any, json_only: bool = False) -> str:
+    """Render structured data in the configured format, counting its tokens for the session."""
+    session = active_sessions.peek(session_id)
+    stats = session.setdefault('response_stats', {}) if session is not None else None
+    return render(data, stats, json_only=json_only)
+
 def make_request(method: str, endpoint: str, **kwargs) -> requests.Response:
     """Make HTTP request to EMF server."""
     url = f"{EMF_SERVER_BASE}{endpoint}"
     return requests.request(method, url, **kwargs)
 
-def extract_classes_from_openapi(openapi_spec: Dict[str, Any]) -> List[str]:
-    """Extract class names from OpenAPI spec paths."""
-    classes = set()
-    if 'paths' in openapi_spec:
-        for path in openapi_spec['paths']:
-            # Extract class name from path like /metamodel/{sessionId}/ClassName
-            parts = path.split('/')
-            if len(parts) >= 4 and parts[1] == 'metamodel' and parts[2] == '{sessionId}':
-                class_name = parts[3]
-                if '{' not in class_name:  # Not a parameter
-                    classes.add(class_name)
-    return list(classes)
-
-def extract_features_from_openapi(openapi_spec: Dict[str, Any], class_name: str) -> List[str]:
-    """Extract feature names for a specific class from OpenAPI spec."""
-    features = set()
-    if 'paths' in openapi_spec:
-        for path in openapi_spec['paths']:
-            # Extract feature name from path like /metamodel/{sessionId}/ClassName/{id}/featureName
-            parts = path.split('/')
-            if (len(parts) >= 6 and parts[1] == 'metamodel' and 
-                parts[2] == '{sessionId}' and parts[3] == class_name and 
-                parts[4] == '{id}' and '{' not in parts[5]):
-                features.add(parts[5])
-    return list(features)
-
-def get_feature_type_info(openapi_spec: Dict[str, Any], class_name: str, feature_name: str) -> Dict[str, Any]:
-    """Extract type information for a feature from OpenAPI spec."""
-    path = f"/metamodel/{{sessionId}}/{class_name}/{{id}}/{feature_name}"
-    
-    if ('paths' in openapi_spec and path in openapi_spec['paths'] and 
-        'put' in openapi_spec['paths'][path]):
-        
-        put_spec = openapi_spec['paths'][path]['put']
-        if ('requestBody' in put_spec and 'content' in put_spec['requestBody'] and
-            'application/json' in put_spec['requestBody']['content'] and
-            'schema' in put_spec['requestBody']['content']['application/json']):
-            
-            schema = put_spec['requestBody']['content']['application/json']['schema']
-            return {
-                'is_containment': schema.get('x-containment', False),
-                'value_type': schema.get('properties', {}).get('value', {}).get('type', 'string'),
-                'schema': schema
-            }
-    
-    return {'is_containment': False, 'value_type': 'string', 'schema': {}}
+def register_session_tool(session_id: str, fn, name: str, description: str):
+    """Register one dynamic tool and remember it belongs to session_id."""
+    mcp.add_tool(fn, name=name, description=description)
+    session_tool_names.setdefault(session_id, []).append(name)
+
+def count_session_tools(route_index: Dict[str, Dict[str, Any]]) -> int:
+    """Number of dynamic tools generated for a route index (create, update, delete, clear)."""
+    count = 0
+    for class_routes in route_index.values():
+        features = class_routes['features'].values()
+        count += (class_routes['create'] is not None) + 1 + len(features)
+        count += sum(1 for feature_info in features if feature_info['update'] is not None)
+    return count
+
+def activate_session_tools(session_id: str) -> int:
+    """Make session_id the active session and unregister the previous session's tools.
+
+    The session's own tools are generated lazily, by ensure_session_tools.
+    Returns the number of dynamic tools the session has.
+    """
+    global active_session_id, pending_session_id
+    route_index = active_sessions[session_id]['routes']
+    if active_session_id == session_id:
+        return count_session_tools(route_index)
+    if active_session_id is not None:
+        deactivate_session_tools(active_session_id)
+
+    active_session_id = session_id
+    pending_session_id = session_id
+    count = count_session_tools(route_index)
+    logger.info(f"Activated session {session_id} ({count} tools, generated on first use)")
+    return count
+
+def ensure_session_tools():
+    """Generate the active session's tools if its activation deferred them."""
+    global pending_session_id
+    session_id = pending_session_id
+    if session_id is None:
+        return
+    pending_session_id = None
+    session = active_sessions.peek(session_id)
+    if session is None:
+        return
+    create_dynamic_tools_for_session(session_id, session['routes'])
+    create_delete_tools_for_session(session_id, session['routes'])
+    logger.info(f"Generated {len(session_tool_names.get(session_id, []))} tools for session {session_id}")
+
+def deactivate_session_tools(session_id: str) -> int:
+    """Unregister the dynamic tools of session_id; returns how many were removed."""
+    global active_session_id, pending_session_id
+    names = session_tool_names.pop(session_id, [])
+    for name in names:
+        # FastMCP has no public API to unregister a tool
+        mcp._tool_manager._tools.pop(name, None)
+    if active_session_id == session_id:
+        active_session_id = None
+    if pending_session_id == session_id:
+        pending_session_id = None
+    if names:
+        logger.info(f"Unregistered {len(names)} tools of session {session_id}")
+    return len(names)
+
+def install_lazy_session_tools(tool_manager):
+    """Generate pending session tools when the client lists tools or calls one of them."""
+    list_tools, get_tool = tool_manager.list_tools, tool_manager.get_tool
+
+    def lazy_list_tools():
+        remember_client(mcp.get_context())
+        ensure_session_tools()
+        return list_tools()
+
+    def lazy_get_tool(name: str):
+        tool = get_tool(name)
+        if tool is None and pending_session_id is not None:
+            ensure_session_tools()
+            tool = get_tool(name)
+        return tool
+
+    tool_manager.list_tools = lazy_list_tools
+    tool_manager.get_tool = lazy_get_tool
+
+install_lazy_session_tools(mcp._tool_manager)
+
+def remember_client(ctx: Context):
+    """Keep the session of the client making the current request."""
+    global client_session
+    try:
+        client_session = ctx.session
+    except Exception:
+        # Outside a request
+        pass
 
-def create_dynamic_tools_for_session(session_id: str, openapi_spec: Dict[str, Any]):
-    """Create dynamic tools for a specific session based on OpenAPI spec."""
-    if 'paths' not in openapi_spec:
+async def send_tool_list_changed(session):
+    try:
+        await session.send_tool_list_changed()
+    except Exception as e:
+        logger.debug(f"Could not send tools/list_changed: {e}")
+
+async def notify_tools_changed(ctx: Context):
+    """Tell the client to refresh its tool list."""
+    remember_client(ctx)
+    if client_session is not None:
+        await send_tool_list_changed(client_session)
+
+def notify_tools_changed_in_background():
+    """Send tools/list_changed to the last client seen, without waiting for it."""
+    if client_session is None:
         return
-    
-    for path, methods in openapi_spec['paths'].items():
-        path_parts = path.split('/')
-        
-        # Handle POST routes for creating objects: /metamodel/{sessionId}/ClassName
-        if (len(path_parts) == 4 and path_parts[1] == 'metamodel' and 
-            path_parts[2] == '{sessionId}' and 'post' in methods):
-            class_name = path_parts[3]
-            create_object_creation_tool(session_id, class_name, methods['post'])
-        
-        # Handle PUT routes for updating features: /metamodel/{sessionId}/ClassName/{id}/featureName
-        elif (len(path_parts) == 6 and path_parts[1] == 'metamodel' and 
-              path_parts[2] == '{sessionId}' and path_parts[4] == '{id}' and 'put' in methods):
-            class_name = path_parts[3]
-            feature_name = path_parts[5]
-            feature_info = get_feature_type_info(openapi_spec, class_name, feature_name)
-            create_feature_update_tool(session_id, class_name, feature_name, methods['put'], feature_info)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.debug("No event loop to send tools/list_changed from")
+        return
+    task = loop.create_task(send_tool_list_changed(client_session))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def build_route_index(openapi_spec: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Parse the OpenAPI paths once into {class: {'create': spec, 'features': {feature: info}}}.
+
+    Classes come from /metamodel/{sessionId}/ClassName..., 'create' is the POST spec
+    of /metamodel/{sessionId}/ClassName (None if there is none) and each feature of
+    /metamodel/{sessionId}/ClassName/{id}/featureName maps to its type information.
+    """
+    route_index = {}
+    for path, methods in openapi_spec.get('paths', {}).items():
+        parts = path.split('/')
+        if len(parts) < 4 or parts[1] != 'metamodel' or parts[2] != '{sessionId}' or '{' in parts[3]:
+            continue
+        class_routes = route_index.setdefault(parts[3], {'create': None, 'features': {}})
+
+        if len(parts) == 4 and 'post' in methods:
+            class_routes['create'] = methods['post']
+        elif len(parts) >= 6 and parts[4] == '{id}' and '{' not in parts[5]:
+            feature_info = class_routes['features'].setdefault(parts[5], {
+                'is_containment': False, 'value_type': 'string', 'schema': {}, 'update': None})
+            if len(parts) == 6 and 'put' in methods:
+                feature_info['update'] = methods['put']
+                schema = (methods['put'].get('requestBody', {}).get('content', {})
+                          .get('application/json', {}).get('schema'))
+                if schema is not None:
+                    feature_info.update({
+                        'is_containment': schema.get('x-containment', False),
+                        'value_type': schema.get('properties', {}).get('value', {}).get('type', 'string'),
+                        'schema': schema,
+                    })
+    return route_index
+
+def get_classes(route_index: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Class names of a session."""
+    return list(route_index)
+
+def get_features(route_index: Dict[str, Dict[str, Any]], class_name: str) -> List[str]:
+    """Feature names of a class."""
+    return list(route_index.get(class_name, {}).get('features', {}))
+
+def create_dynamic_tools_for_session(session_id: str, route_index: Dict[str, Dict[str, Any]]):
+    """Create dynamic tools for a specific session based on its route index."""
+    for class_name, class_routes in route_index.items():
+        # POST routes for creating objects: /metamodel/{sessionId}/ClassName
+        if class_routes['create'] is not None:
+            create_object_creation_tool(session_id, class_name, class_routes['create'])
+
+        # PUT routes for updating features: /metamodel/{sessionId}/ClassName/{id}/featureName
+        for feature_name, feature_info in class_routes['features'].items():
+            if feature_info['update'] is not None:
+                create_feature_update_tool(session_id, class_name, feature_name, feature_info['update'], feature_info)
 
 def create_object_creation_tool(session_id: str, class_name: str, spec: Dict[str, Any]):
     """Create a tool for creating objects of a specific class."""
     tool_name = f"create_{class_name.lower()}_{session_id[:8]}"
     description = f"Create a new {class_name} object in session {session_id[:8]}... Returns the created object with its ID."
     
-    @mcp.tool(name=tool_name, description=description)
     async def create_object_dynamic() -> str:
         try:
             response = make_request('POST', f'/metamodel/{session_id}/{class_name}')
@@ -169,15 +331,17 @@ def create_object_creation_tool(session_id: str, class_name: str, spec: Dict[str
                     # Store the object ID with its original type
                     add_object_to_session(session_id, class_name, object_id)
                     
-                    return f"{class_name} object created successfully!\nID: {object_id} (type: {type(object_id).__name__})\nFull response: {json.dumps(result, indent=2)}"
+                    details = {key: val for key, val in result.items() if key != 'id'}
+                    message = f"{class_name} object created successfully!\nID: {object_id} (type: {type(object_id).__name__})"
+                    return f"{message}\n{respond(session_id, details)}" if details else message
                 else:
-                    return f"{class_name} object created but no ID returned: {json.dumps(result, indent=2)}"
+                    return f"{class_name} object created but no ID returned: {respond(session_id, result)}"
             else:
                 return f"Error creating {class_name} object: {response.text}"
                 
         except Exception as e:
             return f"Error: {str(e)}"
-    mcp.add_tool(fn= create_object_dynamic, name=tool_name)
+    register_session_tool(session_id, create_object_dynamic, tool_name, description)
 
 
 def create_feature_update_tool(session_id: str, class_name: str, feature_name: str, 
@@ -193,7 +357,6 @@ def create_feature_update_tool(session_id: str, class_name: str, feature_name: s
     
     description = (f"Update {feature_name} of {class_name} in session {session_id[:8]}...{containment_info}{type_info}. ")
     
-    @mcp.tool(name=tool_name, description=description)
     async def update_feature_dynamic(object_id: str = "", value: str = "") -> str:
         try:
             if not value:
@@ -210,24 +373,22 @@ def create_feature_update_tool(session_id: str, class_name: str, feature_name: s
             
             if response.status_code == 200:
                 result = response.json()
-                return f"{class_name}[{parsed_object_id}].{feature_name} updated successfully!\nNew value: {value}\nResponse: {json.dumps(result, indent=2)}"
+                return f"{class_name}[{parsed_object_id}].{feature_name} updated successfully!\nNew value: {value}\nResponse: {respond(session_id, result)}"
             else:
                 return f"Error updating {class_name}[{parsed_object_id}].{feature_name}: {response.text}"
                 
         except Exception as e:
             return f"Error: {str(e)}"
-    mcp.add_tool(fn=update_feature_dynamic,name=tool_name)
+    register_session_tool(session_id, update_feature_dynamic, tool_name, description)
 
-def create_delete_tools_for_session(session_id: str, openapi_spec: Dict[str, Any]):
+def create_delete_tools_for_session(session_id: str, route_index: Dict[str, Dict[str, Any]]):
     """Create delete tools for each class in the session."""
-    classes = extract_classes_from_openapi(openapi_spec)
+    classes = get_classes(route_index)
     
     for class_name in classes:
         # Create delete object tool
         tool_name = f"delete_{class_name.lower()}_{session_id[:8]}"
         
-        @mcp.tool(name=tool_name, 
-                 description=f"Delete a {class_name} object in session {session_id[:8]}... .")
         async def delete_object_dynamic(object_id: str = "", cls_name: str = class_name) -> str:
             try:
                 
@@ -238,21 +399,20 @@ def create_delete_tools_for_session(session_id: str, openapi_spec: Dict[str, Any
                     # Remove from tracking
                     remove_object_from_session(session_id, cls_name, parsed_object_id)
                     result = response.json()
-                    return f"{cls_name} object [{parsed_object_id}] deleted successfully: {json.dumps(result, indent=2)}"
+                    return f"{cls_name} object [{parsed_object_id}] deleted successfully: {respond(session_id, result)}"
                 else:
                     return f"Error deleting {cls_name} object: {response.text}"
                     
             except Exception as e:
                 return f"Error: {str(e)}"
-        mcp.add_tool(fn=delete_object_dynamic,name=tool_name)
+        register_session_tool(session_id, delete_object_dynamic, tool_name,
+                              f"Delete a {class_name} object in session {session_id[:8]}... .")
         
         # Create clear feature tools for each feature
-        features = extract_features_from_openapi(openapi_spec, class_name)
+        features = get_features(route_index, class_name)
         for feature_name in features:
             clear_tool_name = f"clear_{class_name.lower()}_{feature_name}_{session_id[:8]}"
             
-            @mcp.tool(name=clear_tool_name, 
-                     description=f"Clear {feature_name} of {class_name} in session {session_id[:8]}... .")
             async def clear_feature_dynamic(object_id: str = "", cls_name: str = class_name, feat_name: str = feature_name) -> str:
                 try:
                     
@@ -261,13 +421,14 @@ def create_delete_tools_for_session(session_id: str, openapi_spec: Dict[str, Any
                     
                     if response.status_code == 200:
                         result = response.json()
-                        return f"{cls_name}[{parsed_object_id}].{feat_name} cleared successfully: {json.dumps(result, indent=2)}"
+                        return f"{cls_name}[{parsed_object_id}].{feat_name} cleared successfully: {respond(session_id, result)}"
                     else:
                         return f"Error clearing {cls_name}.{feat_name}: {response.text}"
                         
                 except Exception as e:
                     return f"Error: {str(e)}"
-        mcp.add_tool(fn=clear_feature_dynamic, name=clear_tool_name)
+            register_session_tool(session_id, clear_feature_dynamic, clear_tool_name,
+                                  f"Clear {feature_name} of {class_name} in session {session_id[:8]}... .")
 
 @mcp.tool(name="list_session_objects", 
           description="List all objects created in a session, organized by class type.")
@@ -294,8 +455,8 @@ async def list_session_objects(session_id: str) -> str:
     return "\n".join(result_lines)
 
 @mcp.tool(name="start_metamodel_session", 
-          description="Start a new session with a metamodel file. Upload the metamodel (.ecore) file and get a session ID with dynamically created tools for each class and feature.")
-async def start_metamodel_session(metamodel_file_path: str) -> str:
+          description="Start a new session with a metamodel file. Upload the metamodel (.ecore) file and get a session ID with dynamically created tools for each class and feature. The new session becomes the active one: only its tools are listed.")
+async def start_metamodel_session(metamodel_file_path: str, ctx: Context) -> str:
     """Start a new session with a metamodel file."""
     try:
         if not os.path.exists(metamodel_file_path):
@@ -308,36 +469,63 @@ async def start_metamodel_session(metamodel_file_path: str) -> str:
         if response.status_code == 200:
             result = response.json()
             session_id = result['sessionId']
-            openapi_spec = result['routes']
+            # Parse the OpenAPI paths once; helpers and tools read the index
+            route_index = build_route_index(result['routes'])
             
             # Store session info
             active_sessions[session_id] = {
-                'openapi_spec': openapi_spec,
+                'routes': route_index,
                 'metamodel_file': metamodel_file_path
             }
             
             # Extract available classes and features
-            classes = extract_classes_from_openapi(openapi_spec)
+            classes = get_classes(route_index)
             
-            # Create dynamic tools for this session
-            create_dynamic_tools_for_session(session_id, openapi_spec)
-            create_delete_tools_for_session(session_id, openapi_spec)
-
+            # Replace the previously active session's tools by this session's
+            tool_count = activate_session_tools(session_id)
+            await notify_tools_changed(ctx)
 
             session_info = {
                 'sessionId': session_id,
                 'availableClasses': classes,
-                'createdTools': len([name for name in dir() if name.startswith(f"create_{classes[0].lower()}_{session_id[:8]}") or name.startswith(f"update_")]) if classes else 0,
+                'createdTools': tool_count,
                 'message': f"Session started successfully. Created dynamic tools for classes: {', '.join(classes)}"
             }
             
-            return json.dumps(session_info, indent=2)
+            # Clients parse this result, so it stays JSON in every format
+            return respond(session_id, session_info, json_only=True)
         else:
             return f"Error starting session: {response.text}"
             
     except Exception as e:
         return f"Error: {str(e)}"
 
+@mcp.tool(name="use_session",
+          description="Switch to another started session: its dynamic tools replace the ones of the current session.")
+async def use_session(session_id: str, ctx: Context) -> str:
+    """Make a session the active one."""
+    if session_id not in active_sessions:
+        return f"Session {session_id} not found"
+
+    tool_count = activate_session_tools(session_id)
+    await notify_tools_changed(ctx)
+    return f"Session {session_id} is now active with {tool_count} dynamic tools"
+
+@mcp.tool(name="end_session",
+          description="End a session: unregister its dynamic tools and release it on the EMF server.")
+async def end_session(session_id: str, ctx: Context) -> str:
+    """End a session and remove its tools."""
+    if session_id not in active_sessions:
+        return f"Session {session_id} not found"
+
+    was_active = session_id == active_session_id
+    removed = deactivate_session_tools(session_id)
+    del active_sessions[session_id]
+    await asyncio.to_thread(close_remote_session, session_id)
+    if removed or was_active:
+        await notify_tools_changed(ctx)
+    return f"Session {session_id} ended, {removed} dynamic tools removed"
+
 @mcp.tool(name="get_session_info", 
           description="Get detailed information about a specific session including available classes and their features.")
 async def get_session_info(session_id: str) -> str:
@@ -346,8 +534,8 @@ async def get_session_info(session_id: str) -> str:
         return f"Session {session_id} not found"
     
     session_data = active_sessions[session_id]
-    openapi_spec = session_data['openapi_spec']
-    classes = extract_classes_from_openapi(openapi_spec)
+    route_index = session_data['routes']
+    classes = get_classes(route_index)
     
     session_info = {
         'sessionId': session_id,
@@ -358,18 +546,27 @@ async def get_session_info(session_id: str) -> str:
     
     # Get features for each class
     for class_name in classes:
-        features = extract_features_from_openapi(openapi_spec, class_name)
+        features = get_features(route_index, class_name)
         session_info['classFeatures'][class_name] = features
+    session_info['responses'] = savings(session_data.get('response_stats', {}))
     
-    return json.dumps(session_info, indent=2)
+    return respond(session_id, session_info)
 
 @mcp.tool(name="debug_tools", 
-          description="Show all registered tools")
-async def debug_tools() -> str:
+          description="Show all registered tools (include_memory adds the approximate memory of all sessions).")
+async def debug_tools(include_memory: bool = False) -> str:
     """Show all registered tools."""
     try:
+        ensure_session_tools()
+        stats = active_sessions.stats(include_memory=include_memory)
+        tracked = sum(len(tracker) for tracker in session_objects.values())
         result = [
-            f"Active sessions: {len(active_sessions)}",
+            f"Active sessions: {stats['count']}/{stats['max_size'] or 'unbounded'} "
+            f"(evicted lru={stats['evictions']['lru']}, ttl={stats['evictions']['ttl']})",
+            f"Tracked objects: {tracked}"
+            + (f", approx session memory: {stats['approx_bytes'] // 1024} KiB" if include_memory else ""),
+            f"Active session: {active_session_id or 'none'} "
+            f"({len(session_tool_names.get(active_session_id, []))} dynamic tools)",
             "",
         ]
         
@@ -419,7 +616,10 @@ async def debug_tools() -> str:
         return f"Error: {str(e)}"
 
 if __name__ == "__main__":
+    # Slow-call profiles with EMF_PROFILE=sample|cprofile (see mcp-common/tool_profiler.py)
+    tool_profiler.install(mcp)
     try:
+        # stdio only: the active session's tools are shared by everyone connected
         mcp.run(transport='stdio')
     except Exception as e:
         logger.error(f"Server error: {str(e)}")
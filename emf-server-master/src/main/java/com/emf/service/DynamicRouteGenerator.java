@@ -52,7 +52,17 @@ public class DynamicRouteGenerator {
             }
         });
 
-        
+        // Close a session: drop its metamodel, model and model file
+        router.delete("/metamodel/:sessionId").handler(ctx -> {
+            String sessionId = ctx.pathParam("sessionId");
+            if (sessionManager.getSessionResource(sessionId) == null) {
+                ctx.response().setStatusCode(404).end("Session not found");
+                return;
+            }
+            sessionManager.removeSession(sessionId);
+            ctx.json(Map.of("status", "closed"));
+        });
+
         // Dynamic CRUD routes for each EClass and EStructuralFeature
         router.post("/metamodel/:sessionId/:eClassName").handler(ctx -> {
             String sessionId = ctx.pathParam("sessionId");
@@ -51,6 +51,17 @@ public class StatelessRouteGenerator {
             }
         });
 
+        // Close a session and release its metamodel and model resource
+        router.delete("/metamodel/:sessionId").handler(ctx -> {
+            String sessionId = ctx.pathParam("sessionId");
+            if (sessionManager.getMetamodel(sessionId) == null) {
+                ctx.response().setStatusCode(404).end("Session not found");
+                return;
+            }
+            sessionManager.removeSession(sessionId);
+            ctx.json(Map.of("status", "closed"));
+        });
+
         // Introspection: list features of an EClass
         router.get("/metamodel/:sessionId/:eClassName/features").handler(ctx -> {
             String sessionId = ctx.pathParam("sessionId");
@@ -387,6 +398,9 @@ public class StatelessRouteGenerator {
         paths.put("/metamodel/start", Map.of(
             "post", Map.of("summary", "Upload a metamodel and start a session")
         ));
+        paths.put("/metamodel/{sessionId}", Map.of(
+            "delete", Map.of("summary", "Close session")
+        ));
         paths.put("/metamodel/{sessionId}/{eClassName}", Map.of(
             "post", Map.of("summary", "Create instance of EClass in session")
         ));
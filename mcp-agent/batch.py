@@ -0,0 +1,204 @@
+"""Headless batch execution of agent tasks.
+
+Tasks are read from a JSONL file, one object per line::
+
+    {"id": "families-1", "metamodel": "/abs/path/Families.ecore", "instruction": "Create ..."}
+
+A pool of agents works through them concurrently. The agents lease their MCP
+connections from an MCPServerPool (one MCP client session carries the
+requests of several agents side by side), and each task runs in its own EMF
+session. One result line per task is
+appended to the output JSONL as soon as the task finishes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from langchain_core.messages import AIMessage
+
+from mcp_pool import MCPServerPool
+from memory import ConversationMemory
+from stateless_agent import EMFStatelessAgent
+
+
+def load_tasks(path: str) -> List[Dict[str, Any]]:
+    """Read tasks from a JSONL file, resolving metamodel paths relative to the file.
+
+    Args:
+        path: Path of the JSONL task file.
+
+    Returns:
+        Tasks with ``id``, ``metamodel`` and ``instruction`` keys.
+
+    Raises:
+        ValueError: If a line is not valid JSON or misses ``instruction``.
+    """
+    base_dir = Path(path).expanduser().resolve().parent
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                task = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_number}: invalid JSON ({exc})") from exc
+            if not isinstance(task, dict) or not task.get("instruction"):
+                raise ValueError(f"{path}:{line_number}: a task needs an 'instruction'")
+            task.setdefault("id", str(line_number))
+            if task.get("metamodel"):
+                task["metamodel"] = str((base_dir / task["metamodel"]).expanduser().resolve())
+            tasks.append(task)
+    return tasks
+
+
+def new_record(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Result line of a task that has not run yet."""
+    return {
+        "id": task["id"],
+        "metamodel": task.get("metamodel"),
+        "instruction": task["instruction"],
+        "status": "ok",
+        "session_id": None,
+        "answer": None,
+        "error": None,
+        "tool_calls": 0,
+        "usage": {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0},
+    }
+
+
+async def run_task(agent: EMFStatelessAgent, task: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+    """Run one task on a (reused) agent and describe the outcome."""
+    record = new_record(task)
+    start = time.monotonic()
+    generation = agent.client.server_generation
+    try:
+        await agent.reset(task.get("metamodel"))
+        record["session_id"] = agent.session_id
+        if task.get("metamodel") and not agent.session_id:
+            raise RuntimeError(f"could not start a session for {task['metamodel']}")
+        result = await asyncio.wait_for(agent.run(task["instruction"]), timeout)
+        record["answer"] = result["answer"]
+        record["usage"] = result["usage"]
+        record["tool_calls"] = sum(
+            len(message.tool_calls) for message in result["messages"] if isinstance(message, AIMessage)
+        )
+    except asyncio.TimeoutError:
+        record.update(status="timeout", error=f"no answer within {timeout}s")
+    except Exception as exc:
+        record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    if agent.client.server_generation != generation or not agent.client.connected:
+        # The pool recycled the connection mid-task: a stdio server took the EMF session with it
+        record.update(status="server_lost", error="the MCP server was recycled during the task")
+    record["latency_s"] = round(time.monotonic() - start, 3)
+    return record
+
+
+async def run_batch(
+    pool: MCPServerPool,
+    tasks: List[Dict[str, Any]],
+    output: TextIO,
+    *,
+    concurrency: int = 4,
+    task_timeout: Optional[float] = None,
+    agent_kwargs: Optional[Dict[str, Any]] = None,
+    memory_factory: Optional[Callable[[], ConversationMemory]] = None,
+    max_attempts: int = 2,
+) -> Dict[str, Any]:
+    """Run tasks on a pool of agents sharing the pool's MCP connections.
+
+    Args:
+        pool: Started MCP server pool the agents lease their clients from.
+        tasks: Tasks as returned by ``load_tasks``.
+        output: Stream receiving one JSON result line per finished task.
+        concurrency: Number of agents working at the same time.
+        task_timeout: Optional per-task time limit in seconds.
+        agent_kwargs: Keyword arguments for each ``EMFStatelessAgent``.
+        memory_factory: Builds each agent's own ``ConversationMemory``;
+            defaults to the agent's configured memory.
+        max_attempts: Runs of a task whose MCP server was recycled under it
+            (status ``server_lost``), or whose connection lease or agent
+            start failed (status ``error``), before that status is reported.
+
+    Returns:
+        Totals: task counts by status, tokens and wall time.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for task in tasks:
+        queue.put_nowait(task)
+
+    totals: Dict[str, Any] = {"tasks": len(tasks), "by_status": {}, "total_tokens": 0}
+    start = time.monotonic()
+
+    def write(record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record, default=str) + "\n")
+        output.flush()
+        totals["by_status"][record["status"]] = totals["by_status"].get(record["status"], 0) + 1
+        totals["total_tokens"] += record["usage"].get("total_tokens", 0)
+        print(
+            f"[{sum(totals['by_status'].values())}/{len(tasks)}] {record['id']}: {record['status']} "
+            f"in {record['latency_s']:.1f}s",
+            file=sys.stderr,
+        )
+
+    async def worker(worker_id: int) -> None:
+        task: Optional[Dict[str, Any]] = None
+        attempt = 0
+        while True:
+            if task is None:
+                try:
+                    task = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                attempt = 1
+            start_attempt = time.monotonic()
+            try:
+                async with pool.lease() as client:
+                    memory = memory_factory() if memory_factory is not None else None
+                    agent = EMFStatelessAgent(client, memory=memory, **(agent_kwargs or {}))
+                    await agent.initialize()
+                    while True:
+                        record = await run_task(agent, task, task_timeout)
+                        if record["status"] == "server_lost" and attempt < max_attempts:
+                            # Lease a healthy connection again and rerun the task with a fresh agent
+                            attempt += 1
+                            break
+                        record["worker"] = worker_id
+                        record["attempts"] = attempt
+                        task = None
+                        write(record)
+                        try:
+                            task = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        attempt = 1
+                        start_attempt = time.monotonic()
+            except Exception as exc:
+                if task is None:
+                    raise
+                # Leasing a connection or starting the agent failed before the task ran
+                if attempt < max_attempts:
+                    attempt += 1
+                    continue
+                record = new_record(task)
+                record.update(
+                    status="error",
+                    error=f"could not start an agent: {type(exc).__name__}: {exc}",
+                    latency_s=round(time.monotonic() - start_attempt, 3),
+                    worker=worker_id,
+                    attempts=attempt,
+                )
+                task = None
+                write(record)
+
+    workers = max(1, min(concurrency, len(tasks)))
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    totals["wall_time_s"] = round(time.monotonic() - start, 3)
+    return totals
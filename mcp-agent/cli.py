@@ -4,15 +4,23 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import json
 import sys
 from pathlib import Path
 from typing import Optional
 
-from langchain_core.messages import AIMessage, ToolMessage
-
 from stateless_agent import EMFStatelessAgent
-from mcp_client import MCPClient
-from config import OLLAMA_MODEL, OLLAMA_TEMPERATURE
+from mcp_client import is_http_target
+from mcp_pool import MCPServerPool
+from config import (
+    AGENT_MAX_PARALLEL_TOOLS,
+    AGENT_MEMORY_TURNS,
+    AGENT_TOKEN_BUDGET,
+    OLLAMA_MODEL,
+    OLLAMA_TEMPERATURE,
+)
+from memory import ConversationMemory
+from batch import load_tasks, run_batch
 
 
 def parse_args() -> argparse.Namespace:
@@ -24,6 +32,8 @@ def parse_args() -> argparse.Namespace:
 Examples:
   python cli.py --server /path/to/emf_mcp_stateless.py
   python cli.py --server /path/to/emf_mcp_stateless.py --metamodel /path/to/library.ecore
+  python cli.py --server /path/to/emf_mcp_stateless.py --batch tasks.jsonl --output results.jsonl --concurrency 4
+  python cli.py --server http://127.0.0.1:8000/mcp --batch tasks.jsonl --concurrency 16 --pool-size 4
         """,
     )
     parser.add_argument(
@@ -33,7 +43,8 @@ Examples:
     parser.add_argument(
         "--server",
         required=True,
-        help="Absolute path to the MCP server script (e.g. emf_mcp_stateless.py).",
+        help="Absolute path to the MCP server script (e.g. emf_mcp_stateless.py), "
+        "or the URL of a streamable-HTTP MCP server (e.g. http://127.0.0.1:8000/mcp).",
     )
     parser.add_argument(
         "--model",
@@ -58,6 +69,52 @@ Examples:
         default=60,
         help="Maximum LangGraph recursion depth for a single request (default: 60).",
     )
+    parser.add_argument(
+        "--memory-turns",
+        type=int,
+        default=AGENT_MEMORY_TURNS,
+        help=f"Conversation turns sent verbatim to the model; older ones are summarized (default: {AGENT_MEMORY_TURNS}).",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=AGENT_TOKEN_BUDGET,
+        help=f"Approximate prompt token budget per model call, 0 for none (default: {AGENT_TOKEN_BUDGET}).",
+    )
+    parser.add_argument(
+        "--max-parallel-tools",
+        type=int,
+        default=AGENT_MAX_PARALLEL_TOOLS,
+        help=f"Maximum tool calls of one step run concurrently (default: {AGENT_MAX_PARALLEL_TOOLS}).",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="TASKS_JSONL",
+        help="Run the tasks of a JSONL file (id, metamodel, instruction) headlessly instead of chatting.",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="JSONL file receiving one result per batch task (default: stdout).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of agents running batch tasks at the same time (default: 4).",
+    )
+    parser.add_argument(
+        "--task-timeout",
+        type=float,
+        default=None,
+        help="Optional time limit in seconds for each batch task.",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=1,
+        help="MCP connections kept warm and shared by the batch agents (default: 1).",
+    )
     parser.add_argument(
         "--python",
         dest="python_exec",
@@ -86,22 +143,78 @@ async def interactive_loop(agent: EMFStatelessAgent) -> None:
             print("Goodbye!")
             break
 
-        result = await agent.run(user_input)
+        await render_stream(agent, user_input)
 
-        # Display tool calls and results
-        for message in result["messages"]:
-            if isinstance(message, ToolMessage):
-                content = EMFStatelessAgent.content_to_str(message.content)
-                print(f"[tool:{message.name}] {content}")
-            elif isinstance(message, AIMessage) and message.tool_calls:
-                print(f"[call] {message.tool_calls}")
 
-        # Display final answer
-        answer = result.get("answer", "").strip()
-        if answer:
-            print(f"Agent> {answer}")
-        else:
-            print("Agent> (no textual response)")
+async def render_stream(agent: EMFStatelessAgent, user_input: str) -> None:
+    """Print the agent's tokens, tool calls and tool results as they arrive."""
+    in_text = False
+    streamed = False
+    async for event in agent.stream(user_input):
+        kind = event["type"]
+        if kind == "token":
+            if not in_text:
+                print("Agent> ", end="")
+                in_text = True
+            print(event["text"], end="", flush=True)
+            streamed = True
+            continue
+
+        if in_text:
+            print()
+            in_text = False
+        if kind == "tool_start":
+            print(f"[call] {event['name']}({json.dumps(event['args'], default=str)})", flush=True)
+        elif kind == "tool_end":
+            print(f"[tool:{event['name']}] {event['content']}", flush=True)
+        elif kind == "notice":
+            print(f"[notice] {event['text']}", flush=True)
+        elif kind == "final" and not streamed:
+            # Models that do not stream still deliver their answer here
+            answer = (event.get("answer") or "").strip()
+            print(f"Agent> {answer or '(no textual response)'}")
+
+
+async def batch_mode(pool: MCPServerPool, args: argparse.Namespace, metamodel_path: Optional[Path]) -> int:
+    """Run the tasks of args.batch and write their results as JSONL."""
+    try:
+        tasks = load_tasks(args.batch)
+    except (OSError, ValueError) as exc:
+        print(f"Cannot read batch tasks: {exc}", file=sys.stderr)
+        return 1
+    for task in tasks:
+        if not task.get("metamodel") and metamodel_path:
+            task["metamodel"] = str(metamodel_path)
+
+    agent_kwargs = dict(
+        model_name=args.model,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        recursion_limit=args.recursion_limit,
+        max_parallel_tools=args.max_parallel_tools,
+    )
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        totals = await run_batch(
+            pool,
+            tasks,
+            output,
+            concurrency=args.concurrency,
+            task_timeout=args.task_timeout,
+            agent_kwargs=agent_kwargs,
+            memory_factory=lambda: ConversationMemory(args.memory_turns, args.token_budget),
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    by_status = ", ".join(f"{count} {status}" for status, count in sorted(totals["by_status"].items()))
+    print(
+        f"Batch done: {totals['tasks']} tasks ({by_status or 'none run'}) in {totals['wall_time_s']:.1f}s, "
+        f"{totals['total_tokens']} tokens",
+        file=sys.stderr,
+    )
+    return 0 if totals["by_status"].get("ok", 0) == totals["tasks"] else 2
 
 
 async def run() -> int:
@@ -116,20 +229,31 @@ async def run() -> int:
             print(f"Metamodel file not found: {metamodel_path}", file=sys.stderr)
             return 1
 
-    # Validate server script path
-    server_path = Path(args.server).expanduser().resolve()
-    if not server_path.exists():
-        print(f"MCP server script not found: {server_path}", file=sys.stderr)
-        return 1
+    # Validate server script path (a URL names an already running HTTP server)
+    server = args.server
+    if not is_http_target(server):
+        server_path = Path(server).expanduser().resolve()
+        if not server_path.exists():
+            print(f"MCP server script not found: {server_path}", file=sys.stderr)
+            return 1
+        server = str(server_path)
 
-    client = MCPClient()
+    pool = MCPServerPool(
+        server,
+        size=args.pool_size if args.batch else 1,
+        python_executable=args.python_exec,
+    )
     agent: Optional[EMFStatelessAgent] = None
 
     try:
-        # Connect to MCP server
-        await client.connect(str(server_path), python_executable=args.python_exec)
-        
+        # Connect to MCP server(s)
+        await pool.start()
+
+        if args.batch:
+            return await batch_mode(pool, args, metamodel_path)
+
         # Initialize agent
+        client = await pool.acquire()
         agent = EMFStatelessAgent(
             client,
             str(metamodel_path) if metamodel_path else None,
@@ -137,6 +261,8 @@ async def run() -> int:
             temperature=args.temperature,
             max_tokens=args.max_tokens,
             recursion_limit=args.recursion_limit,
+            memory=ConversationMemory(args.memory_turns, args.token_budget),
+            max_parallel_tools=args.max_parallel_tools,
         )
         await agent.initialize()
 
@@ -162,7 +288,14 @@ async def run() -> int:
         print(f"Error: {exc}", file=sys.stderr)
         return 1
     finally:
-        await client.cleanup()
+        if agent is not None:
+            stats = agent.tool_cache.stats()
+            if stats["hits"] or stats["misses"]:
+                print(
+                    f"Tool cache: {stats['hits']} hits, {stats['misses']} misses, "
+                    f"{stats['invalidations']} invalidations"
+                )
+        await pool.close()
 
 
 def main() -> None:
@@ -1,6 +1,9 @@
 """Configuration module for the EMF MCP Agent."""
 
 from .config import (
+    AGENT_MAX_PARALLEL_TOOLS,
+    AGENT_MEMORY_TURNS,
+    AGENT_TOKEN_BUDGET,
     LLM_PROVIDER,
     OLLAMA_BASE_URL,
     OLLAMA_MAX_RETRIES,
@@ -12,6 +15,9 @@ from .config import (
 )
 
 __all__ = [
+    "AGENT_MAX_PARALLEL_TOOLS",
+    "AGENT_MEMORY_TURNS",
+    "AGENT_TOKEN_BUDGET",
     "LLM_PROVIDER",
     "OLLAMA_BASE_URL",
     "OLLAMA_MAX_RETRIES",
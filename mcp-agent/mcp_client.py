@@ -1,23 +1,62 @@
-"""Utilities for connecting to MCP servers via stdio transport."""
+"""Utilities for connecting to MCP servers via stdio or streamable-HTTP transport."""
 
 from __future__ import annotations
 
 import asyncio
+import os
 import sys
 from contextlib import AsyncExitStack
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp.client.stdio import get_default_environment, stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.types import CallToolResult
+
+# tracing.py is shared with the MCP servers (mcp-common/ at the repository root)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'mcp-common'))
+
+from tracing import Tracer, mcp_meta  # noqa: E402
+
+# Spans of the agent process (turns, LLM calls, tools, MCP requests)
+tracer = Tracer.from_env("emf-mcp-agent")
+
+
+def is_http_target(target: str) -> bool:
+    """Whether target is the URL of a streamable-HTTP MCP server rather than a script."""
+    return target.startswith(("http://", "https://"))
+
+
+def server_environment() -> Dict[str, str]:
+    """Environment of a stdio server: the MCP SDK's safe defaults plus this process's EMF_* settings."""
+    env = get_default_environment()
+    env.update({key: value for key, value in os.environ.items() if key.startswith("EMF_")})
+    return env
+
+
+async def call_tool(session: ClientSession, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+    """Call an MCP tool in a client span, passing the trace on in the request's ``_meta``."""
+    with tracer.span(f"mcp {name}", kind="CLIENT", attributes={"mcp.tool": name}) as span:
+        meta = mcp_meta()
+        if meta:
+            result = await session.call_tool(name, arguments, meta=meta)
+        else:
+            result = await session.call_tool(name, arguments)
+        if span is not None and result.isError:
+            span.set_error("tool reported isError")
+        return result
 
 
 class MCPClient:
-    """Thin wrapper around the MCP stdio client with lifecycle helpers."""
+    """Thin wrapper around an MCP client session with lifecycle helpers."""
 
     def __init__(self) -> None:
         self._session: Optional[ClientSession] = None
         self._exit_stack = AsyncExitStack()
         self._stdio_transport = None
+        # Stdio server processes retired so far (see invalidate). Server-side state,
+        # like EMF sessions, is lost with the process.
+        self.server_generation = 0
 
     async def connect(
         self,
@@ -31,28 +70,63 @@ class MCPClient:
         Parameters
         ----------
         server_script_path:
-            Absolute path to the MCP server script (Python or Node).
+            Absolute path to the MCP server script (Python or Node), launched
+            over stdio, or the URL of a streamable-HTTP server
+            (e.g. ``http://127.0.0.1:8000/mcp``) shared with other clients.
         python_executable:
             Optional path to the Python executable to use. Defaults to ``sys.executable``.
         env:
             Optional environment variables to expose to the child process.
+            Defaults to ``server_environment()``.
         """
 
-        command = python_executable or sys.executable
-        params = StdioServerParameters(command=command, args=[server_script_path], env=env)
-
-        stdio_transport = await self._exit_stack.enter_async_context(stdio_client(params))
-        self._stdio_transport = stdio_transport
-        stdin, stdout_writer = stdio_transport
+        if is_http_target(server_script_path):
+            stdin, stdout_writer, _ = await self._exit_stack.enter_async_context(
+                streamablehttp_client(server_script_path)
+            )
+        else:
+            command = python_executable or sys.executable
+            params = StdioServerParameters(
+                command=command, args=[server_script_path], env=env if env is not None else server_environment()
+            )
+
+            stdio_transport = await self._exit_stack.enter_async_context(stdio_client(params))
+            self._stdio_transport = stdio_transport
+            stdin, stdout_writer = stdio_transport
         self._session = await self._exit_stack.enter_async_context(ClientSession(stdin, stdout_writer))
         await self._session.initialize()
         return self._session
 
+    @property
+    def connected(self) -> bool:
+        return self._session is not None
+
     async def get_session(self) -> ClientSession:
         if self._session is None:
             raise RuntimeError("MCP client is not connected. Call 'connect' first.")
         return self._session
 
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """Whether the server answers an MCP ping within timeout seconds."""
+        if self._session is None:
+            return False
+        try:
+            await asyncio.wait_for(self._session.send_ping(), timeout)
+        except Exception:
+            return False
+        return True
+
+    def invalidate(self) -> None:
+        """Mark the connection dead ahead of cleanup(), which its owning task runs.
+
+        get_session() fails from now on, and a stdio server counts as retired
+        (server_generation changes) even while its process is being stopped.
+        """
+        if self._stdio_transport is not None:
+            self.server_generation += 1
+        self._session = None
+        self._stdio_transport = None
+
     async def cleanup(self) -> None:
         """Close transports and release resources."""
 
@@ -73,6 +147,7 @@ class MCPClient:
                     }
                 )
 
-        self._session = None
-        self._stdio_transport = None
+        self.invalidate()
+        # A fresh stack lets the same client connect again (see MCPServerPool)
+        self._exit_stack = AsyncExitStack()
 
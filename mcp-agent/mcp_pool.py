@@ -0,0 +1,234 @@
+"""Pool of warm MCP server connections shared by agents.
+
+Launching an MCP server over stdio starts a Python interpreter and imports
+mcp, httpx and FastAPI, which costs every agent startup. The pool starts its
+servers once and hands their clients out to agents, least-loaded first (an
+MCP session carries concurrent requests, so several agents can share one).
+Connections are pinged before they are handed out and periodically in the
+background; one that stops answering is closed and reconnected.
+
+With a streamable-HTTP server URL instead of a script path, every pooled
+client connects to the same long-lived server process.
+
+    pool = MCPServerPool("/path/to/emf_mcp_stateless.py", size=2)
+    await pool.start()
+    async with pool.lease() as client:
+        agent = EMFStatelessAgent(client)
+        await agent.initialize()
+    await pool.close()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from mcp_client import MCPClient
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledServer:
+    """One pooled connection and the task owning its transport."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.client = MCPClient()
+        self.ready = asyncio.Event()
+        self.attempted = asyncio.Event()
+        # Set to ask the owner task to close the connection (and reconnect unless the pool is closing)
+        self.wake = asyncio.Event()
+        self.leases = 0
+        self.recycles = 0
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class MCPServerPool:
+    """Keeps size MCP connections open and hands them out to agents.
+
+    Args:
+        server: Path of the MCP server script, or URL of a streamable-HTTP server.
+        size: Number of connections (server processes, for stdio) to keep warm.
+        python_executable: Python executable launching a stdio server.
+        env: Environment variables for a stdio server process.
+        health_interval: Seconds between background pings, 0 to disable them.
+        ping_timeout: Seconds a server has to answer a ping.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        *,
+        size: int = 1,
+        python_executable: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        health_interval: float = 30.0,
+        ping_timeout: float = 5.0,
+    ) -> None:
+        self._server = server
+        self._size = max(1, size)
+        self._python_executable = python_executable
+        self._env = env
+        self._health_interval = health_interval
+        self._ping_timeout = ping_timeout
+        self._servers: List[_PooledServer] = []
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        """Connect every pooled server; fails only if none of them could connect."""
+        if self._servers:
+            return
+        self._servers = [_PooledServer(index) for index in range(self._size)]
+        for pooled in self._servers:
+            pooled.task = asyncio.create_task(self._own(pooled))
+        await asyncio.gather(*(pooled.attempted.wait() for pooled in self._servers))
+
+        if not any(pooled.ready.is_set() for pooled in self._servers):
+            error = self._servers[0].error
+            await self.close()
+            raise RuntimeError(f"Could not connect to MCP server {self._server}: {error}") from error
+        if self._health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        """Close every connection (and stop the stdio server processes)."""
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for pooled in self._servers:
+            pooled.wake.set()
+        await asyncio.gather(*(pooled.task for pooled in self._servers if pooled.task), return_exceptions=True)
+        self._servers = []
+
+    async def _own(self, pooled: _PooledServer) -> None:
+        # The stdio/HTTP transports are task-scoped: they are opened and closed by this task only
+        delay = 0.5
+        while not self._closed:
+            try:
+                await pooled.client.connect(
+                    self._server, python_executable=self._python_executable, env=self._env
+                )
+            except Exception as exc:
+                pooled.error = exc
+                pooled.attempted.set()
+                logger.warning("MCP server %d failed to connect: %s", pooled.index, exc)
+                await pooled.client.cleanup()
+                try:
+                    await asyncio.wait_for(pooled.wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                pooled.wake.clear()
+                delay = min(delay * 2, 30.0)
+                continue
+
+            delay = 0.5
+            pooled.error = None
+            pooled.ready.set()
+            pooled.attempted.set()
+            await pooled.wake.wait()
+            pooled.wake.clear()
+            pooled.ready.clear()
+            try:
+                await pooled.client.cleanup()
+            except Exception as exc:
+                logger.debug("Error closing MCP server %d: %s", pooled.index, exc)
+            if not self._closed:
+                pooled.recycles += 1
+                logger.info("Recycling MCP server %d", pooled.index)
+
+    # --- Leasing ---
+
+    async def acquire(self, timeout: float = 60.0) -> MCPClient:
+        """Hand out the least-loaded healthy client; release() it when done."""
+        if not self._servers:
+            raise RuntimeError("MCP server pool is not started. Call 'start' first.")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            for pooled in sorted(self._servers, key=lambda p: p.leases):
+                if pooled.ready.is_set():
+                    if await pooled.client.ping(self._ping_timeout):
+                        pooled.leases += 1
+                        return pooled.client
+                    self._recycle(pooled)
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise RuntimeError(f"No healthy MCP server available after {timeout:.0f}s")
+            waiters = [asyncio.create_task(pooled.ready.wait()) for pooled in self._servers]
+            try:
+                await asyncio.wait(waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    def release(self, client: MCPClient) -> None:
+        """Return a client obtained from acquire()."""
+        for pooled in self._servers:
+            if pooled.client is client:
+                pooled.leases = max(0, pooled.leases - 1)
+                return
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[MCPClient]:
+        """acquire() and release() around a block."""
+        client = await self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def recycle(self, client: MCPClient) -> None:
+        """Reconnect a client found broken; agents holding it reach the new connection.
+
+        A recycled stdio server is a new process without the old one's EMF
+        sessions: agents see it through ``session_lost`` and start over.
+        """
+        for pooled in self._servers:
+            if pooled.client is client:
+                self._recycle(pooled)
+                return
+
+    def _recycle(self, pooled: _PooledServer) -> None:
+        # Invalidated at once, so agents stop using it before the owner task gets to close it
+        pooled.client.invalidate()
+        pooled.ready.clear()
+        pooled.wake.set()
+
+    # --- Health ---
+
+    async def check_health(self) -> int:
+        """Ping every connected server and recycle those not answering; returns how many."""
+        connected = [pooled for pooled in self._servers if pooled.ready.is_set()]
+        alive = await asyncio.gather(*(pooled.client.ping(self._ping_timeout) for pooled in connected))
+        broken = [pooled for pooled, ok in zip(connected, alive) if not ok]
+        for pooled in broken:
+            logger.warning("MCP server %d did not answer a ping", pooled.index)
+            self._recycle(pooled)
+        return len(broken)
+
+    async def _health_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self._health_interval)
+            await self.check_health()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """State of each pooled connection."""
+        return [
+            {
+                "index": pooled.index,
+                "ready": pooled.ready.is_set(),
+                "leases": pooled.leases,
+                "recycles": pooled.recycles,
+                "error": str(pooled.error) if pooled.error else None,
+            }
+            for pooled in self._servers
+        ]
@@ -0,0 +1,5 @@
+"""Conversation memory for the EMF MCP Agent."""
+
+from .conversation_memory import ConversationMemory, ModelState, approx_tokens
+
+__all__ = ["ConversationMemory", "ModelState", "approx_tokens"]
@@ -0,0 +1,228 @@
+"""Bounded conversation memory for the agent.
+
+The LLM only needs the recent turns verbatim. Older tool traffic is replaced by
+a summary of the model being edited, rebuilt from the tool calls and results
+the agent has seen, and every model call is kept under a token budget.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from utils.serialization import content_to_str, is_error_result
+
+# "id":123, "id": "123" (JSON) or id=123 (terse responses)
+_ID_PATTERN = re.compile(r'"?\bid"?\s*[:=]\s*"?([\w-]+)')
+# "12 update Family[$fam].lastName: ok" lines of apply_operations results
+_OPERATION_LINE = re.compile(r"^(\d+) .*?: (ok|error|skipped)(?: id=(\S+))?")
+_REF_PAIR = re.compile(r"\$(\w+)=(\S+?)(?:,|$)")
+
+
+def approx_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token count of messages (about four characters per token)."""
+    chars = 0
+    for message in messages:
+        chars += len(content_to_str(message.content))
+        for call in getattr(message, "tool_calls", None) or []:
+            chars += len(call.get("name", "")) + len(json.dumps(call.get("args", {}), default=str))
+    return (chars + 3) // 4
+
+
+class ModelState:
+    """Objects the agent created and the feature values it set, folded from tool traffic."""
+
+    def __init__(self) -> None:
+        # object id (as string) -> {"class": ..., "features": {feature: value}}
+        self.objects: Dict[str, Dict[str, Any]] = {}
+
+    def clear(self) -> None:
+        self.objects.clear()
+
+    def observe(self, messages: List[BaseMessage]) -> None:
+        """Apply every successful tool call found in messages."""
+        calls: Dict[str, Dict[str, Any]] = {}
+        for message in messages:
+            if isinstance(message, AIMessage):
+                for call in message.tool_calls or []:
+                    calls[call.get("id")] = call
+            elif isinstance(message, ToolMessage):
+                call = calls.get(message.tool_call_id)
+                if call is not None:
+                    self._apply(call["name"], call.get("args", {}), content_to_str(message.content))
+
+    def _apply(self, name: str, args: Dict[str, Any], result: str) -> None:
+        if name == "start_session":
+            self.clear()
+            return
+        if is_error_result(result):
+            return
+        if name == "create_object":
+            match = _ID_PATTERN.search(result)
+            if match:
+                self._create(args.get("class_name", "?"), match.group(1))
+        elif name == "update_feature":
+            self._set(args.get("class_name"), args.get("object_id"), args.get("feature_name"), args.get("value"))
+        elif name == "clear_feature":
+            obj = self.objects.get(str(args.get("object_id")))
+            if obj is not None:
+                obj["features"].pop(args.get("feature_name"), None)
+        elif name == "delete_object":
+            self.objects.pop(str(args.get("object_id")), None)
+        elif name == "apply_operations":
+            self._apply_batch(args.get("operations") or [], result)
+
+    def _apply_batch(self, operations: Any, result: str) -> None:
+        if isinstance(operations, str):
+            try:
+                operations = json.loads(operations)
+            except ValueError:
+                return
+        refs: Dict[str, str] = {}
+        statuses: Dict[int, Tuple[str, Optional[str]]] = {}
+        for line in result.splitlines():
+            if line.startswith("refs: "):
+                refs.update(_REF_PAIR.findall(line[len("refs: "):]))
+                continue
+            match = _OPERATION_LINE.match(line)
+            if match:
+                statuses[int(match.group(1))] = (match.group(2), match.group(3))
+
+        def resolve(value: Any) -> Any:
+            if isinstance(value, str) and value.startswith("$") and value[1:] in refs:
+                return refs[value[1:]]
+            if isinstance(value, list):
+                return [resolve(item) for item in value]
+            return value
+
+        for idx, op in enumerate(operations):
+            status, created_id = statuses.get(idx, ("error", None))
+            if status != "ok" or not isinstance(op, dict):
+                continue
+            kind = op.get("op")
+            if kind == "create" and created_id:
+                self._create(op.get("class_name", "?"), created_id)
+            elif kind == "update":
+                self._set(op.get("class_name"), resolve(op.get("object_id")), op.get("feature_name"),
+                          resolve(op.get("value")))
+            elif kind == "clear":
+                obj = self.objects.get(str(resolve(op.get("object_id"))))
+                if obj is not None:
+                    obj["features"].pop(op.get("feature_name"), None)
+            elif kind == "delete":
+                self.objects.pop(str(resolve(op.get("object_id"))), None)
+
+    def _create(self, class_name: str, object_id: Any) -> None:
+        self.objects[str(object_id)] = {"class": class_name, "features": {}}
+
+    def _set(self, class_name: Optional[str], object_id: Any, feature_name: Optional[str], value: Any) -> None:
+        if object_id in (None, "") or not feature_name:
+            return
+        obj = self.objects.setdefault(str(object_id), {"class": class_name or "?", "features": {}})
+        obj["features"][feature_name] = value
+
+    def summary(self, max_tokens: int) -> str:
+        """Object-per-line description of the model, cut to roughly max_tokens."""
+        if not self.objects:
+            return ""
+        lines = ["Model state from earlier turns (objects created in this session):"]
+        budget = max_tokens * 4 - len(lines[0])
+        for count, (object_id, obj) in enumerate(self.objects.items()):
+            values = ", ".join(
+                f"{name}={value if isinstance(value, str) else json.dumps(value, default=str)}"
+                for name, value in obj["features"].items()
+            )
+            line = f"{obj['class']} {object_id}" + (f": {values}" if values else "")
+            if len(line) + 1 > budget:
+                lines.append(f"... and {len(self.objects) - count} more objects (use list_session_objects)")
+                break
+            lines.append(line)
+            budget -= len(line) + 1
+        return "\n".join(lines)
+
+
+class ConversationMemory:
+    """Keeps the system prompt and the last turns, summarizing what falls out of the window.
+
+    A turn is a user message plus everything that follows it until the next user
+    message (tool calls, tool results and the answer).
+    """
+
+    def __init__(self, max_turns: int = 6, token_budget: int = 8000) -> None:
+        self.max_turns = max(1, max_turns)
+        self.token_budget = token_budget
+        self.state = ModelState()
+
+    @staticmethod
+    def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """Group non-system messages into turns starting at each HumanMessage."""
+        turns: List[List[BaseMessage]] = []
+        for message in messages:
+            if isinstance(message, SystemMessage):
+                continue
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def observe(self, messages: List[BaseMessage]) -> None:
+        """Fold the tool traffic of a finished run into the model state."""
+        self.state.observe(messages)
+
+    def reset(self) -> None:
+        self.state.clear()
+
+    def trim(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Stored history: the system message(s) followed by the last max_turns turns."""
+        system = [m for m in messages if isinstance(m, SystemMessage)]
+        turns = self.split_turns(messages)[-self.max_turns:]
+        return system + [m for turn in turns for m in turn]
+
+    def prepare(self, messages: List[BaseMessage], system_message: Optional[SystemMessage]) -> List[BaseMessage]:
+        """Messages to send to the LLM for one call, within the token budget.
+
+        The current turn is always kept; older turns are dropped oldest first, and
+        replaced by the model-state summary appended to the system prompt. If the
+        current turn alone is over budget, its oldest tool results are shortened.
+        """
+        turns = self.split_turns(messages)
+        kept = turns[-self.max_turns:]
+        dropped = len(kept) < len(turns)
+
+        def build() -> List[BaseMessage]:
+            content = content_to_str(system_message.content) if system_message is not None else ""
+            if dropped:
+                summary = self.state.summary(self.token_budget // 4 if self.token_budget else 1000)
+                if summary:
+                    content = f"{content}\n\n{summary}" if content else summary
+            head = [SystemMessage(content=content)] if content else []
+            return head + [m for turn in kept for m in turn]
+
+        result = build()
+        if not self.token_budget:
+            return result
+        while len(kept) > 1 and approx_tokens(result) > self.token_budget:
+            kept = kept[1:]
+            dropped = True
+            result = build()
+
+        if approx_tokens(result) > self.token_budget:
+            result = self._shorten_tool_results(result)
+        return result
+
+    def _shorten_tool_results(self, messages: List[BaseMessage], keep_chars: int = 300) -> List[BaseMessage]:
+        """Cut the oldest tool results until the budget holds (the latest one stays whole)."""
+        messages = list(messages)
+        tool_positions = [i for i, m in enumerate(messages) if isinstance(m, ToolMessage)][:-1]
+        for i in tool_positions:
+            if approx_tokens(messages) <= self.token_budget:
+                break
+            text = content_to_str(messages[i].content)
+            if len(text) > keep_chars:
+                messages[i] = messages[i].model_copy(
+                    update={"content": f"{text[:keep_chars]}... [{len(text) - keep_chars} chars omitted]"}
+                )
+        return messages
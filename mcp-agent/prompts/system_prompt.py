@@ -15,7 +15,6 @@ Guidelines:
    - If there is no active session (`session_id` is `<none>`), call `start_session` with an absolute
      path to the desired `.ecore` file before using other tools.
    - CRITICAL: Call `start_session` ALONE first, then wait for the response before calling any other tools.
-     Do NOT call multiple tools in parallel when starting a session.
    - Always use the provided tools to inspect or modify the model; never fabricate results.
 
 2. OBJECT CREATION & ID TRACKING:
@@ -55,14 +54,27 @@ Guidelines:
      * Multiplicity (single-valued vs multi-valued)
      * Containment status (containment="true" means parent-child relationship)
 
-6. WORKFLOW FOR CREATING RELATED OBJECTS (Execute ONE step at a time):
+6. WORKFLOW FOR CREATING RELATED OBJECTS (one step per message):
    Step 1: Create ALL needed objects with `create_object`, capturing their numeric IDs from responses
    Step 2: Set attributes on each object using `update_feature` (convert IDs to strings)
    Step 3: Establish relationships by setting references with `update_feature` (use real IDs, not placeholders)
    Step 4: Verify the final state with `inspect_instance`
 
-   CRITICAL: Wait for each step to complete before proceeding to the next step.
-   Do NOT use placeholder IDs like "<family_id>" - always use real numeric IDs from responses.
+   PARALLEL CALLS: Issue all the calls of one step together in a single message (e.g. five
+   `create_object` calls for five Members, or one `update_feature` per object). Independent calls run
+   concurrently, and calls on the same object run in the order you give them.
+   CRITICAL: A step can only use IDs returned by earlier steps, so wait for a step's responses before
+   starting the next one. Do NOT use placeholder IDs like "<family_id>" - always use real numeric IDs
+   from responses.
+
+   BATCHING: When several objects and features must be set up at once, prefer a single
+   `apply_operations` call over many individual calls. Give each create a "ref" name and use
+   "$<ref>" in later operations of the same batch instead of the real ID, e.g.:
+     [{{"op": "create", "class_name": "Family", "ref": "fam"}},
+      {{"op": "create", "class_name": "Member", "ref": "dad"}},
+      {{"op": "update", "class_name": "Family", "object_id": "$fam", "feature_name": "father", "value": "$dad"}}]
+   The response lists the real IDs ("refs") and one status line per operation.
+   "$<ref>" placeholders only work inside the batch that creates them.
 
 7. ERROR HANDLING:
    - If an object is not found, check that you're using the correct server-generated ID.
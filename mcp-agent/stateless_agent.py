@@ -3,16 +3,17 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langgraph.errors import GraphRecursionError
-from langgraph.prebuilt import create_react_agent
+from langgraph.graph import END, START, MessagesState, StateGraph
 
-from mcp_client import MCPClient
+from mcp_client import MCPClient, call_tool, tracer
 from config import (
+    AGENT_MAX_PARALLEL_TOOLS,
+    AGENT_MEMORY_TURNS,
+    AGENT_TOKEN_BUDGET,
     LLM_PROVIDER,
     OLLAMA_BASE_URL,
     OLLAMA_MAX_RETRIES,
@@ -22,9 +23,16 @@ from config import (
     OPENAI_TEMPERATURE,
     OPENAI_MAX_RETRIES,
 )
+from memory import ConversationMemory
 from prompts import SYSTEM_PROMPT_TEMPLATE
-from tools import build_emf_tools
-from utils import content_to_str, extract_classes_from_routes, extract_final_answer, format_invoke_result
+from tools import ParallelToolExecutor, ToolResultCache, build_emf_tools
+from utils import (
+    content_to_str,
+    extract_classes_from_routes,
+    extract_final_answer,
+    format_invoke_result,
+    token_usage,
+)
 
 
 class EMFStatelessAgent:
@@ -39,17 +47,25 @@ class EMFStatelessAgent:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         recursion_limit: int = 60,
+        memory: Optional[ConversationMemory] = None,
+        max_parallel_tools: int = AGENT_MAX_PARALLEL_TOOLS,
     ) -> None:
         self._client = client
         self._metamodel_path = metamodel_path
         self._max_tokens = max_tokens
         self._recursion_limit = recursion_limit
+        self._max_parallel_tools = max_parallel_tools
 
         self._session = None
+        self._start_tool_name = "start_metamodel_session_stateless"
         self._session_id: Optional[str] = None
+        # client.server_generation when the session was started
+        self._session_generation = 0
         self._routes: Dict[str, Any] = {}
         self._classes: List[str] = []
 
+        self._memory = memory or ConversationMemory(AGENT_MEMORY_TURNS, AGENT_TOKEN_BUDGET)
+        self._tool_cache = ToolResultCache()
         self._llm = self._create_llm(model_name, temperature, max_tokens)
         self._agent = None
         self._system_message: Optional[SystemMessage] = None
@@ -61,6 +77,15 @@ class EMFStatelessAgent:
     def session_id(self) -> Optional[str]:
         return self._session_id
 
+    @property
+    def client(self) -> MCPClient:
+        return self._client
+
+    @property
+    def session_lost(self) -> bool:
+        """Whether the session died with a stdio server process the client has since retired."""
+        return self._session_id is not None and self._session_generation != self._client.server_generation
+
     @property
     def metamodel_path(self) -> str:
         return self._metamodel_path
@@ -69,6 +94,14 @@ class EMFStatelessAgent:
     def classes(self) -> List[str]:
         return self._classes
 
+    @property
+    def memory(self) -> ConversationMemory:
+        return self._memory
+
+    @property
+    def tool_cache(self) -> ToolResultCache:
+        return self._tool_cache
+
     # --- Initialization ---
 
     async def initialize(self) -> None:
@@ -80,18 +113,69 @@ class EMFStatelessAgent:
             session_id_getter=lambda: self._session_id,
             classes_getter=lambda: self._classes,
             start_session_handler=self._start_session,
+            cache=self._tool_cache,
         )
 
-        self._agent = create_react_agent(self._llm, tools)
+        self._agent = self._build_graph(tools)
+
+        # The emf-server-master bridge and mcp-server name the session tool differently
+        server_tools = {tool.name for tool in (await self._session.list_tools()).tools}
+        if "start_metamodel_session_stateless" not in server_tools and "start_session" in server_tools:
+            self._start_tool_name = "start_session"
+
+        await self.reset(self._metamodel_path)
+
+    async def reset(self, metamodel_path: Optional[str] = None) -> None:
+        """Forget the conversation and start over, in a new session if metamodel_path is given."""
         self._system_message = None
         self._state = {"messages": []}
+        self._session_id = None
+        self._routes = {}
+        self._classes = []
+        self._metamodel_path = metamodel_path
+        self._memory.reset()
+        self._tool_cache.bind(None)
         self._refresh_system_prompt()
 
-        if self._metamodel_path:
-            await self._start_session(self._metamodel_path)
+        if metamodel_path:
+            await self._start_session(metamodel_path)
+
+    def _build_graph(self, tools: List[Any]):
+        """ReAct loop whose tool step runs independent tool calls concurrently."""
+        llm_with_tools = self._llm.bind_tools(tools)
+        executor = ParallelToolExecutor(tools, max_concurrency=self._max_parallel_tools)
+
+        async def call_model(state: MessagesState) -> Dict[str, Any]:
+            # The LLM sees a bounded view of the conversation; the state keeps every message
+            messages = self._memory.prepare(state["messages"], self._system_message)
+            with tracer.span("llm.call", kind="CLIENT") as span:
+                response = await llm_with_tools.ainvoke(messages)
+                if span is not None:
+                    span.set_attribute("llm.model", getattr(self._llm, "model_name", None) or getattr(self._llm, "model", None))
+                    span.set_attribute("llm.messages", len(messages))
+                    span.set_attribute("llm.tool_calls", len(getattr(response, "tool_calls", None) or []))
+                    for key, value in token_usage([response]).items():
+                        span.set_attribute(f"llm.{key}", value)
+            return {"messages": [response]}
+
+        async def call_tools(state: MessagesState) -> Dict[str, Any]:
+            return {"messages": await executor.run(state["messages"][-1].tool_calls)}
+
+        def route(state: MessagesState) -> str:
+            last = state["messages"][-1]
+            return "tools" if isinstance(last, AIMessage) and last.tool_calls else END
+
+        graph = StateGraph(MessagesState)
+        graph.add_node("agent", call_model)
+        graph.add_node("tools", call_tools)
+        graph.add_edge(START, "agent")
+        graph.add_conditional_edges("agent", route, ["tools", END])
+        graph.add_edge("tools", "agent")
+        return graph.compile()
 
     async def _get_session(self):
-        """Get the current MCP session."""
+        """Get the current MCP session (a pooled client may have reconnected since initialize)."""
+        self._session = await self._client.get_session()
         return self._session
 
     def _create_llm(
@@ -100,13 +184,19 @@ class EMFStatelessAgent:
         temperature: Optional[float],
         max_tokens: Optional[int],
     ):
-        """Create and configure the LLM instance (Ollama or OpenAI)."""
+        """Create and configure the LLM instance (Ollama or OpenAI).
+
+        Each provider package is imported only when selected: both take around a
+        second to import, and only one is used.
+        """
 
         # Decide which backend to use.
         provider = (LLM_PROVIDER or "ollama").lower()
 
         # --- OpenAI backend ---
         if provider == "openai":
+            from langchain_openai import ChatOpenAI
+
             effective_model = model_name or OPENAI_MODEL
             kwargs: Dict[str, Any] = {
                 "model": effective_model,
@@ -125,6 +215,8 @@ class EMFStatelessAgent:
             return ChatOpenAI(**kwargs)
 
         # --- Ollama backend (default) ---
+        from langchain_ollama import ChatOllama
+
         effective_model = model_name or OLLAMA_MODEL
         kwargs = {
             "model": effective_model,
@@ -151,10 +243,9 @@ class EMFStatelessAgent:
 
         payload = {"metamodel_file_path": metamodel_path}
         # NOTE: This maps the agent-level ``start_session`` tool to the actual MCP
-        # tool implemented by the EMF server, ``start_metamodel_session_stateless``.
-        result = await self._session.call_tool(
-            "start_metamodel_session_stateless", payload
-        )
+        # tool implemented by the EMF server (see ``initialize``).
+        session = await self._get_session()
+        result = await call_tool(session, self._start_tool_name, payload)
         response = format_invoke_result(result)
 
         try:
@@ -168,8 +259,11 @@ class EMFStatelessAgent:
 
         self._metamodel_path = metamodel_path
         self._session_id = session_id
+        self._session_generation = self._client.server_generation
+        self._memory.reset()
         self._routes = data.get("routes", {})
-        self._classes = extract_classes_from_routes(self._routes)
+        # The server indexes the uploaded metamodel; older servers only return routes.
+        self._classes = data.get("classes") or extract_classes_from_routes(self._routes)
         self._refresh_system_prompt()
 
         return response
@@ -195,9 +289,38 @@ class EMFStatelessAgent:
 
     async def run(self, user_message: str) -> Dict[str, Any]:
         """Execute the agent with a user message and return the response."""
+        result: Dict[str, Any] = {}
+        async for event in self.stream(user_message):
+            if event["type"] == "final":
+                result = {key: value for key, value in event.items() if key != "type"}
+        return result
+
+    async def stream(self, user_message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Execute the agent with a user message, yielding events as they happen.
+
+        Events are dicts with a ``type`` key:
+
+        - ``token``: ``text`` generated by the model (a fragment of its message)
+        - ``tool_start``: a tool call begins, with ``id``, ``name`` and ``args``
+        - ``tool_end``: a tool call returned, with ``id``, ``name`` and ``content``
+        - ``notice``: ``text`` for the user, e.g. that the session had to be restarted
+        - ``final``: always last, with the ``answer``, ``messages`` and ``usage``
+          that ``run`` returns
+        """
         if self._agent is None:
             raise RuntimeError("Agent not initialized. Call 'initialize' first.")
 
+        if self.session_lost:
+            # The pooled server holding the session was recycled and its objects went with it,
+            # so start over in a new session instead of sending the stale session ID
+            lost = self._session_id
+            await self.reset(self._metamodel_path)
+            yield {
+                "type": "notice",
+                "text": f"The MCP server was restarted and session {lost} was lost; "
+                f"continuing in new session {self._session_id or '(none)'}.",
+            }
+
         messages = list(self._state.get("messages", []))
         if not messages and self._system_message is not None:
             messages.append(self._system_message)
@@ -211,23 +334,64 @@ class EMFStatelessAgent:
         previous_count = len(messages)
         state_input = {"messages": messages + [HumanMessage(content=user_message)]}
 
-        try:
-            self._state = await self._agent.ainvoke(
-                state_input,
-                config={"recursion_limit": self._recursion_limit},
-            )
-        except GraphRecursionError:
-            warning = (
-                "Recursion limit reached before completing the task. "
-                "Consider simplifying the request or increasing the recursion limit."
-            )
-            return {"answer": warning, "messages": []}
-
-        messages = self._state.get("messages", [])
-        new_messages = messages[previous_count:]
-        answer = extract_final_answer(messages)
-
-        return {"answer": answer, "messages": new_messages}
+        with tracer.span("agent.turn", attributes={"emf.session_id": self._session_id}) as span:
+            final_state: Optional[Dict[str, Any]] = None
+            try:
+                async for event in self._agent.astream_events(
+                    state_input,
+                    config={"recursion_limit": self._recursion_limit},
+                    version="v2",
+                ):
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream":
+                        text = content_to_str(event["data"]["chunk"].content)
+                        if text:
+                            yield {"type": "token", "text": text}
+                    elif kind == "on_tool_start":
+                        yield {
+                            "type": "tool_start",
+                            "id": event["run_id"],
+                            "name": event["name"],
+                            "args": event["data"].get("input", {}),
+                        }
+                    elif kind in ("on_tool_end", "on_tool_error"):
+                        output = event["data"].get("output", event["data"].get("error"))
+                        yield {
+                            "type": "tool_end",
+                            "id": event["run_id"],
+                            "name": event["name"],
+                            "content": content_to_str(getattr(output, "content", output)),
+                        }
+                    elif kind == "on_chain_end" and not event.get("parent_ids"):
+                        final_state = event["data"]["output"]
+            except GraphRecursionError:
+                final_state = None
+
+            if final_state is None:
+                warning = (
+                    "Recursion limit reached before completing the task. "
+                    "Consider simplifying the request or increasing the recursion limit."
+                )
+                if span is not None:
+                    span.set_error("recursion limit reached")
+                yield {"type": "final", "answer": warning, "messages": [], "usage": token_usage([])}
+                return
+
+            self._state = final_state
+            messages = self._state.get("messages", [])
+            new_messages = messages[previous_count:]
+            answer = extract_final_answer(messages)
+
+            # Older turns live on only as the model-state summary
+            self._memory.observe(new_messages)
+            self._state["messages"] = self._memory.trim(messages)
+
+            usage = token_usage(new_messages)
+            if span is not None:
+                span.set_attribute("agent.messages", len(new_messages))
+                for key, value in usage.items():
+                    span.set_attribute(f"llm.{key}", value)
+            yield {"type": "final", "answer": answer, "messages": new_messages, "usage": usage}
 
     # --- Static Utility (kept for backward compatibility) ---
 
@@ -1,5 +1,6 @@
 """EMF MCP tool definitions for the agent."""
 
-from .emf_tools import build_emf_tools
+from .emf_tools import ToolResultCache, build_emf_tools
+from .parallel_executor import ParallelToolExecutor
 
-__all__ = ["build_emf_tools"]
+__all__ = ["ParallelToolExecutor", "ToolResultCache", "build_emf_tools"]
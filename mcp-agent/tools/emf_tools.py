@@ -6,11 +6,97 @@ This module contains all the LangChain tools for interacting with the EMF MCP se
 from __future__ import annotations
 
 import json
-from typing import Any, Callable, Dict, List, Union
+import re
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from langchain_core.tools import tool
 
-from utils.serialization import format_invoke_result
+from mcp_client import call_tool
+from utils.serialization import format_invoke_result, is_error_result
+
+
+_NUMBER = re.compile(r"-?\d+")
+
+
+class ToolResultCache:
+    """Results of idempotent introspection calls for one EMF session.
+
+    ``list_features`` results never change during a session. ``inspect_instance``
+    results are dropped when a call modifies the object, or an object it refers
+    to or is referred to by (opposite and containment references change both
+    ends).
+    """
+
+    def __init__(self) -> None:
+        self.session_id: Optional[str] = None
+        self._features: Dict[str, str] = {}
+        self._instances: Dict[Tuple[str, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def bind(self, session_id: Optional[str]) -> None:
+        """Forget everything cached for another session."""
+        if session_id != self.session_id:
+            self._features.clear()
+            self._instances.clear()
+            self.session_id = session_id
+
+    def get_features(self, class_name: str) -> Optional[str]:
+        return self._lookup(self._features, class_name)
+
+    def put_features(self, class_name: str, result: str) -> None:
+        if not is_error_result(result):
+            self._features[class_name] = result
+
+    def get_instance(self, class_name: str, object_id: str) -> Optional[str]:
+        return self._lookup(self._instances, (class_name, object_id))
+
+    def put_instance(self, class_name: str, object_id: str, result: str) -> None:
+        if not is_error_result(result):
+            self._instances[(class_name, object_id)] = result
+
+    def _lookup(self, entries: Dict[Any, str], key: Any) -> Optional[str]:
+        result = entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def invalidate(self, object_id: str, value: Any = None) -> None:
+        """Drop cached instances affected by a change to object_id (optionally setting value)."""
+        if not self._instances:
+            return
+        touched: Set[str] = {object_id}
+        if value is not None:
+            touched.update(_NUMBER.findall(value if isinstance(value, str) else json.dumps(value)))
+        # Objects object_id referred to before the change
+        for (_, cached_id), result in self._instances.items():
+            if cached_id == object_id:
+                touched.update(_NUMBER.findall(result))
+        stale = [
+            key for key, result in self._instances.items()
+            if key[1] in touched or object_id in _NUMBER.findall(result)
+        ]
+        for key in stale:
+            del self._instances[key]
+        self.invalidations += len(stale)
+
+    def invalidate_all_instances(self) -> None:
+        self.invalidations += len(self._instances)
+        self._instances.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "cached_features": len(self._features),
+            "cached_instances": len(self._instances),
+        }
 
 
 def build_emf_tools(
@@ -18,6 +104,7 @@ def build_emf_tools(
     session_id_getter: Callable[[], str | None],
     classes_getter: Callable[[], List[str]],
     start_session_handler: Callable[[str], Any],
+    cache: Optional[ToolResultCache] = None,
 ) -> List[Any]:
     """Build the EMF MCP tools for the agent.
     
@@ -26,10 +113,12 @@ def build_emf_tools(
         session_id_getter: Callable that returns the current session ID.
         classes_getter: Callable that returns the list of known classes.
         start_session_handler: Async callable to start a new session.
+        cache: Optional cache for list_features and inspect_instance results.
         
     Returns:
         List of LangChain tool functions.
     """
+    cache = cache if cache is not None else ToolResultCache()
     
     async def _call_server_tool(
         tool_name: str,
@@ -49,7 +138,7 @@ def build_emf_tools(
                 return "No active EMF session. Call start_session with a metamodel path first."
             args.setdefault("session_id", session_id)
 
-        result = await session.call_tool(tool_name, args)
+        result = await call_tool(session, tool_name, args)
         return format_invoke_result(result)
 
     tools = []
@@ -83,10 +172,12 @@ def build_emf_tools(
     async def delete_object_tool(class_name: str, object_id: Union[str, int]) -> str:
         """Delete an object instance from the current session."""
         object_id_str = str(object_id) if object_id else ""
-        return await _call_server_tool(
+        result = await _call_server_tool(
             "delete_object",
             {"class_name": class_name, "object_id": object_id_str},
         )
+        cache.invalidate(object_id_str)
+        return result
 
     tools.append(delete_object_tool)
 
@@ -110,7 +201,7 @@ def build_emf_tools(
         object_id_str = str(object_id) if object_id else ""
         value_str = json.dumps(value) if not isinstance(value, str) else value
 
-        return await _call_server_tool(
+        result = await _call_server_tool(
             "update_feature",
             {
                 "class_name": class_name,
@@ -119,6 +210,8 @@ def build_emf_tools(
                 "value": value_str,
             },
         )
+        cache.invalidate(object_id_str, value_str)
+        return result
 
     tools.append(update_feature_tool)
 
@@ -128,7 +221,7 @@ def build_emf_tools(
     ) -> str:
         """Unset a feature on an existing object."""
         object_id_str = str(object_id) if object_id else ""
-        return await _call_server_tool(
+        result = await _call_server_tool(
             "clear_feature",
             {
                 "class_name": class_name,
@@ -136,13 +229,42 @@ def build_emf_tools(
                 "feature_name": feature_name,
             },
         )
+        cache.invalidate(object_id_str)
+        return result
 
     tools.append(clear_feature_tool)
 
+    @tool("apply_operations")
+    async def apply_operations_tool(operations: List[Dict[str, Any]]) -> str:
+        """Apply an ordered batch of model edits in a single call.
+
+        Args:
+            operations: List of operations, each a dict with an "op" key:
+                {"op": "create", "class_name": "Family", "ref": "fam"}
+                {"op": "update", "class_name": "Family", "object_id": "$fam", "feature_name": "lastName", "value": "Smith"}
+                {"op": "clear", "class_name": "Family", "object_id": "123", "feature_name": "sons"}
+                {"op": "delete", "class_name": "Member", "object_id": "456"}
+                A create with "ref" lets later operations use "$<ref>" as object_id or inside value.
+        """
+        result = await _call_server_tool(
+            "apply_operations", {"operations": json.dumps(operations)}
+        )
+        # Placeholders make the touched objects hard to pin down; start over
+        cache.invalidate_all_instances()
+        return result
+
+    tools.append(apply_operations_tool)
+
     @tool("list_features")
     async def list_features_tool(class_name: str) -> str:
         """List the structural features available on a class."""
-        return await _call_server_tool("list_features", {"class_name": class_name})
+        cache.bind(session_id_getter())
+        cached = cache.get_features(class_name)
+        if cached is not None:
+            return cached
+        result = await _call_server_tool("list_features", {"class_name": class_name})
+        cache.put_features(class_name, result)
+        return result
 
     tools.append(list_features_tool)
 
@@ -157,10 +279,16 @@ def build_emf_tools(
             object_id: The object ID (numeric or string, will be auto-converted)
         """
         object_id_str = str(object_id) if object_id else ""
-        return await _call_server_tool(
+        cache.bind(session_id_getter())
+        cached = cache.get_instance(class_name, object_id_str)
+        if cached is not None:
+            return cached
+        result = await _call_server_tool(
             "inspect_instance",
             {"class_name": class_name, "object_id": object_id_str},
         )
+        cache.put_instance(class_name, object_id_str, result)
+        return result
 
     tools.append(inspect_instance_tool)
 
@@ -182,10 +310,10 @@ def build_emf_tools(
 
     @tool("list_known_classes")
     def list_known_classes_tool() -> str:
-        """Show the classes discovered from the metamodel routes without calling the server."""
+        """Show the classes of the active metamodel without calling the server."""
         classes = classes_getter()
         if not classes:
-            return "No classes discovered from the OpenAPI specification."
+            return "No classes discovered from the metamodel."
         return "Available classes: " + ", ".join(classes)
 
     tools.append(list_known_classes_tool)
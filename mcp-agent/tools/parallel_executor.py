@@ -0,0 +1,115 @@
+"""Concurrent execution of the tool calls of one agent step.
+
+When the LLM emits several tool calls in one AIMessage, independent calls run
+concurrently over the MCP session. Calls that touch the same object keep the
+order the model gave them, session-wide calls act as barriers, and a semaphore
+caps the number of requests in flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from langchain_core.messages import ToolMessage
+
+from mcp_client import tracer
+
+_NUMBER = re.compile(r"-?\d+")
+
+# Run alone: everything before them finishes first, everything after waits for them
+EXCLUSIVE_TOOLS = {"start_session", "apply_operations"}
+# Change the model
+MUTATING_TOOLS = {"create_object", "update_feature", "clear_feature", "delete_object"}
+# Read the whole session, so they wait for the edits issued before them
+SESSION_READ_TOOLS = {"list_session_objects", "get_session_info"}
+
+
+def object_keys(call: Dict[str, Any]) -> Set[str]:
+    """IDs of the objects a tool call reads or writes (its own and those named in value)."""
+    args = call.get("args") or {}
+    keys: Set[str] = set()
+    object_id = args.get("object_id")
+    if object_id not in (None, ""):
+        keys.add(str(object_id))
+    if call.get("name") == "update_feature" and args.get("value") is not None:
+        value = args["value"]
+        keys.update(_NUMBER.findall(value if isinstance(value, str) else json.dumps(value)))
+    return keys
+
+
+def conflicts(earlier: Dict[str, Any], later: Dict[str, Any]) -> bool:
+    """Whether later must wait for earlier."""
+    first, second = earlier.get("name"), later.get("name")
+    if first in EXCLUSIVE_TOOLS or second in EXCLUSIVE_TOOLS:
+        return True
+    if (first in SESSION_READ_TOOLS and second in MUTATING_TOOLS) or (
+        second in SESSION_READ_TOOLS and first in MUTATING_TOOLS
+    ):
+        return True
+    return bool(object_keys(earlier) & object_keys(later))
+
+
+class ParallelToolExecutor:
+    """Runs one step's tool calls concurrently, respecting per-object order.
+
+    Args:
+        tools: LangChain tools, looked up by name.
+        max_concurrency: Maximum number of tool calls in flight.
+    """
+
+    def __init__(self, tools: Sequence[Any], max_concurrency: int = 4) -> None:
+        self._tools = {tool.name: tool for tool in tools}
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    @staticmethod
+    def plan(tool_calls: Sequence[Dict[str, Any]]) -> List[List[int]]:
+        """Indexes of the earlier calls each call has to wait for."""
+        return [
+            [i for i in range(j) if conflicts(tool_calls[i], tool_calls[j])]
+            for j in range(len(tool_calls))
+        ]
+
+    async def run(self, tool_calls: Sequence[Dict[str, Any]]) -> List[ToolMessage]:
+        """Execute tool_calls and return their ToolMessages in call order."""
+        dependencies = self.plan(tool_calls)
+        tasks: List[Optional[asyncio.Task]] = [None] * len(tool_calls)
+
+        async def run_one(index: int) -> ToolMessage:
+            waits = [tasks[i] for i in dependencies[index]]
+            if waits:
+                await asyncio.wait(waits)
+            async with self._semaphore:
+                return await self._invoke(tool_calls[index])
+
+        # Tasks are created in call order, so every dependency already exists
+        for index in range(len(tool_calls)):
+            tasks[index] = asyncio.create_task(run_one(index))
+        return list(await asyncio.gather(*tasks))
+
+    async def _invoke(self, call: Dict[str, Any]) -> ToolMessage:
+        name = call.get("name")
+        tool = self._tools.get(name)
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: unknown tool '{name}'. Available tools: {', '.join(sorted(self._tools))}",
+                name=name,
+                tool_call_id=call.get("id"),
+                status="error",
+            )
+        with tracer.span(f"tool {name}") as span:
+            if span is not None:
+                span.set_attribute("tool.args", json.dumps(call.get("args") or {}, default=str)[:1000])
+            try:
+                result = await tool.ainvoke({**call, "type": "tool_call"})
+            except Exception as exc:
+                if span is not None:
+                    span.set_error(exc)
+                return ToolMessage(
+                    content=f"Error: {exc}", name=name, tool_call_id=call.get("id"), status="error"
+                )
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(content=str(result), name=name, tool_call_id=call.get("id"))
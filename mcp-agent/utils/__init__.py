@@ -5,6 +5,8 @@ from .serialization import (
     extract_classes_from_routes,
     extract_final_answer,
     format_invoke_result,
+    is_error_result,
+    token_usage,
 )
 
 __all__ = [
@@ -12,4 +14,6 @@ __all__ = [
     "extract_classes_from_routes",
     "extract_final_answer",
     "format_invoke_result",
+    "is_error_result",
+    "token_usage",
 ]
@@ -66,6 +66,19 @@ def content_to_str(content: Any) -> str:
     return json.dumps(content) if isinstance(content, (dict, list)) else str(content)
 
 
+def is_error_result(result: str) -> bool:
+    """Whether a tool result reports a failure (error text, structured error or missing session).
+    
+    Args:
+        result: Tool result text as returned to the agent.
+        
+    Returns:
+        True if the result describes an error.
+    """
+    head = result.lstrip()[:200].lower()
+    return head.startswith("error") or '"error"' in head or "not found" in head
+
+
 def extract_final_answer(messages: List[BaseMessage]) -> str:
     """Extract the final textual answer from a list of messages.
     
@@ -81,6 +94,24 @@ def extract_final_answer(messages: List[BaseMessage]) -> str:
     return ""
 
 
+def token_usage(messages: List[BaseMessage]) -> Dict[str, int]:
+    """Sum the token usage reported by the LLM on AI messages.
+    
+    Args:
+        messages: Messages produced by one agent run.
+        
+    Returns:
+        Dict with input_tokens, output_tokens and total_tokens (0 if not reported).
+    """
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for message in messages:
+        metadata = getattr(message, "usage_metadata", None) if isinstance(message, AIMessage) else None
+        if metadata:
+            for key in usage:
+                usage[key] += metadata.get(key, 0) or 0
+    return usage
+
+
 def extract_classes_from_routes(routes: Dict[str, Any]) -> List[str]:
     """Extract class names from OpenAPI route definitions.
     
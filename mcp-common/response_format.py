@@ -0,0 +1,160 @@
+"""Rendering of tool results for the model reading them.
+
+Every structured tool result goes through render(). EMF_RESPONSE_FORMAT picks
+the format for the whole server:
+
+- ``pretty``: indented JSON (the historical output)
+- ``compact``: JSON without whitespace (default)
+- ``terse``: one ``key=value`` line per object, nested objects indented below
+  their key, e.g. ``class=Member id=42 status=created``
+
+Each rendered response is also measured against the pretty JSON it replaces,
+so the tokens saved can be reported per session.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+FORMATS = ('pretty', 'compact', 'terse')
+RESPONSE_FORMAT = os.environ.get("EMF_RESPONSE_FORMAT", "compact").lower()
+if RESPONSE_FORMAT not in FORMATS:
+    RESPONSE_FORMAT = 'compact'
+
+# Strings that need quoting in terse lines
+_NEEDS_QUOTES = re.compile(r'[\s="\[\]{},]|^$')
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for JSON and English)."""
+    return (len(text) + 3) // 4
+
+
+def _scalar(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False) if _NEEDS_QUOTES.search(value) else value
+    return str(value)
+
+
+def _is_flat(value: Any) -> bool:
+    """Scalars and lists of scalars fit on a terse line."""
+    if isinstance(value, dict):
+        return not value
+    if isinstance(value, list):
+        return all(not isinstance(item, (dict, list)) for item in value)
+    return True
+
+
+def _inline(value: Any) -> str:
+    if isinstance(value, dict):
+        return '{}'
+    if isinstance(value, list):
+        return '[' + ','.join(_scalar(item) for item in value) + ']'
+    return _scalar(value)
+
+
+def _terse_lines(value: Any, indent: str = '') -> List[str]:
+    if isinstance(value, dict):
+        if not value:
+            # Explicit marker, so a list keeps one entry per item
+            return [indent + '{}']
+        flat = [f"{key}={_inline(item)}" for key, item in value.items() if _is_flat(item)]
+        lines = [indent + ' '.join(flat)] if flat else []
+        for key, item in value.items():
+            if not _is_flat(item):
+                lines.append(f"{indent}{key}:")
+                lines.extend(_terse_lines(item, indent + '  '))
+        return lines
+    if isinstance(value, list):
+        if _is_flat(value):
+            return [indent + _inline(value)]
+        lines = []
+        for item in value:
+            item_lines = _terse_lines(item, indent + '  ')
+            if item_lines:
+                # First line of each item carries the list marker
+                lines.append(f"{indent}- {item_lines[0][len(indent) + 2:]}")
+                lines.extend(item_lines[1:])
+        return lines
+    return [indent + _scalar(value)]
+
+
+def _layout_size(value: Any, depth: int) -> int:
+    """Characters indent=2 adds to the compact JSON of value: line breaks, indentation, ': '."""
+    if isinstance(value, dict):
+        items = value.values()
+        size = len(value)  # the space after each ':'
+    elif isinstance(value, (list, tuple)):
+        items = value
+        size = 0
+    else:
+        return 0
+    if not value:
+        return 0
+    # Each item on its own line one level deeper, then the closing bracket back at this level
+    size += len(value) * (1 + 2 * (depth + 1)) + 1 + 2 * depth
+    return size + sum(_layout_size(item, depth + 1) for item in items)
+
+
+def pretty_size(data: Any, compact: Optional[str] = None) -> int:
+    """Length of json.dumps(data, indent=2), computed from the compact JSON instead of encoding it again.
+
+    compact is data's JSON with separators (',', ':') and ensure_ascii=False,
+    when already rendered. The indented form escapes non-ASCII characters.
+    """
+    if compact is None:
+        compact = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+    size = len(compact) + _layout_size(data, 0)
+    if not compact.isascii():
+        # \uXXXX, or a surrogate pair of them outside the BMP
+        size += sum(5 if ord(ch) < 0x10000 else 11 for ch in compact if ord(ch) > 127)
+    return size
+
+
+def render(data: Any, stats: Optional[Dict[str, int]] = None, fmt: Optional[str] = None,
+           json_only: bool = False) -> str:
+    """Render a tool result in the configured format.
+
+    stats, when given, accumulates the response count and the approximate tokens
+    of the rendered and of the pretty-printed output. json_only keeps results
+    that programs parse (such as start_session's) in JSON even in terse mode.
+    """
+    fmt = fmt or RESPONSE_FORMAT
+    if fmt == 'terse' and json_only:
+        fmt = 'compact'
+    if fmt == 'pretty':
+        text = json.dumps(data, indent=2, default=str)
+    elif fmt == 'terse':
+        text = '\n'.join(_terse_lines(data))
+    else:
+        text = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+    if stats is not None:
+        # The indented encoder is pure Python, so the pretty baseline is sized, not rendered
+        if fmt == 'pretty':
+            baseline = len(text)
+        else:
+            baseline = pretty_size(data, text if fmt == 'compact' else None)
+        stats['responses'] = stats.get('responses', 0) + 1
+        stats['tokens'] = stats.get('tokens', 0) + approx_tokens(text)
+        stats['pretty_tokens'] = stats.get('pretty_tokens', 0) + (baseline + 3) // 4
+    return text
+
+
+def savings(stats: Dict[str, int]) -> Dict[str, Any]:
+    """Summary of accumulated render stats: format, tokens sent and tokens saved."""
+    tokens = stats.get('tokens', 0)
+    pretty_tokens = stats.get('pretty_tokens', 0)
+    return {
+        'format': RESPONSE_FORMAT,
+        'responses': stats.get('responses', 0),
+        'tokens': tokens,
+        'pretty_tokens': pretty_tokens,
+        'tokens_saved': pretty_tokens - tokens,
+        'saved_pct': round(100 * (pretty_tokens - tokens) / pretty_tokens, 1) if pretty_tokens else 0.0,
+    }
@@ -0,0 +1,219 @@
+"""Bounded session storage with LRU eviction and idle TTLs.
+
+A long-running MCP server keeps per-session state (metamodel, routes, tracked
+objects) for as long as the process lives. SessionStore is a drop-in
+replacement for the plain dicts so that memory stays flat; ObjectTracker
+indexes the objects created in one session.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# on_evict(session_id, value, reason) with reason in {'lru', 'ttl', 'deleted'}
+EvictCallback = Callable[[str, Any, str], None]
+
+
+def approx_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough deep size in bytes of obj (containers and plain objects are followed)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += approx_size(vars(obj), seen)
+    elif hasattr(obj, '__slots__'):
+        size += sum(approx_size(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+class SessionStore(MutableMapping):
+    """Dict-like session registry bounded by entry count and idle time.
+
+    Every read or write refreshes an entry's last-access time and LRU position.
+    Entries idle for longer than ``idle_ttl`` seconds, or the least recently used
+    ones beyond ``max_size``, are evicted and handed to ``on_evict``.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        on_evict: Optional[EvictCallback] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size if max_size and max_size > 0 else None
+        self.idle_ttl = idle_ttl if idle_ttl and idle_ttl > 0 else None
+        self.on_evict = on_evict
+        self._clock = clock
+        self._data: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self.evictions: Dict[str, int] = {'lru': 0, 'ttl': 0, 'deleted': 0}
+
+    # --- Mapping protocol ---
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            self._expire()
+            value, _ = self._data[key]
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            self._expire()
+            while self.max_size is not None and len(self._data) > self.max_size:
+                oldest = next(iter(self._data))
+                self._evict(oldest, 'lru')
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            if key not in self._data:
+                raise KeyError(key)
+            self._evict(key, 'deleted')
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._expire()
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._data)
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Return the value without refreshing its access time or LRU position."""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[0] if entry is not None else default
+
+    def peek_items(self) -> List[Tuple[str, Any]]:
+        """Snapshot of (key, value) pairs in LRU order; refreshes and expires nothing.
+
+        Safe for observers on other threads (metrics, stats), which must not
+        trigger evictions and their callbacks.
+        """
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._data.items()]
+
+    # --- Eviction ---
+
+    def purge_expired(self) -> int:
+        """Evict every idle entry now; returns how many were removed."""
+        with self._lock:
+            return self._expire()
+
+    def _expire(self) -> int:
+        if self.idle_ttl is None:
+            return 0
+        deadline = self._clock() - self.idle_ttl
+        expired = 0
+        # Entries are kept in access order, so the idle ones are at the front
+        while self._data:
+            key, (_, last_access) = next(iter(self._data.items()))
+            if last_access > deadline:
+                break
+            self._evict(key, 'ttl')
+            expired += 1
+        return expired
+
+    def _evict(self, key: str, reason: str) -> None:
+        value, _ = self._data.pop(key)
+        self.evictions[reason] += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value, reason)
+
+    # --- Metrics ---
+
+    def stats(self, include_memory: bool = False, expire: bool = True) -> Dict[str, Any]:
+        """Counts, eviction totals and (optionally) approximate memory of the stored values.
+
+        With expire=False idle entries are counted rather than evicted, so a
+        reader on another thread never runs on_evict. include_memory walks every
+        stored value; the walk runs on a snapshot, outside the lock.
+        """
+        with self._lock:
+            if expire:
+                self._expire()
+            now = self._clock()
+            stats: Dict[str, Any] = {
+                'count': len(self._data),
+                'max_size': self.max_size,
+                'idle_ttl': self.idle_ttl,
+                'evictions': dict(self.evictions),
+                'oldest_idle_seconds': round(now - next(iter(self._data.values()))[1], 1) if self._data else 0,
+            }
+            values = [value for value, _ in self._data.values()] if include_memory else []
+        if include_memory:
+            stats['approx_bytes'] = sum(approx_size(value) for value in values)
+        return stats
+
+
+class ObjectTracker:
+    """Objects created in one session, indexed both ways.
+
+    Per-class insertion-ordered sets (dicts with None values) and a reverse
+    id -> class map keep add, remove, class lookup and counts O(1).
+    """
+
+    __slots__ = ('_by_class', '_class_of')
+
+    def __init__(self) -> None:
+        self._by_class: Dict[str, Dict[Any, None]] = {}
+        self._class_of: Dict[Any, str] = {}
+
+    def add(self, class_name: str, object_id: Any) -> None:
+        previous = self._class_of.get(object_id)
+        if previous is not None and previous != class_name:
+            self._drop(previous, object_id)
+        self._by_class.setdefault(class_name, {})[object_id] = None
+        self._class_of[object_id] = class_name
+
+    def discard(self, object_id: Any) -> Optional[str]:
+        """Forget object_id; returns the class it was tracked under, if any."""
+        class_name = self._class_of.pop(object_id, None)
+        if class_name is not None:
+            self._drop(class_name, object_id)
+        return class_name
+
+    def _drop(self, class_name: str, object_id: Any) -> None:
+        members = self._by_class.get(class_name)
+        if members is not None:
+            members.pop(object_id, None)
+            if not members:
+                del self._by_class[class_name]
+
+    def class_of(self, object_id: Any) -> Optional[str]:
+        return self._class_of.get(object_id)
+
+    def ids(self, class_name: str) -> List[Any]:
+        return list(self._by_class.get(class_name, ()))
+
+    def count(self, class_name: Optional[str] = None) -> int:
+        if class_name is None:
+            return len(self._class_of)
+        return len(self._by_class.get(class_name, ()))
+
+    def counts(self) -> Dict[str, int]:
+        return {class_name: len(members) for class_name, members in self._by_class.items()}
+
+    def as_dict(self) -> Dict[str, List[Any]]:
+        return {class_name: list(members) for class_name, members in self._by_class.items()}
+
+    def __contains__(self, object_id: Any) -> bool:
+        return object_id in self._class_of
+
+    def __len__(self) -> int:
+        return len(self._class_of)
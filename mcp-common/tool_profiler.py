@@ -0,0 +1,205 @@
+"""Opt-in profiling of slow MCP tool calls.
+
+EMF_PROFILE selects a mode. Without it install() changes nothing, so tool
+calls run no profiling code at all:
+
+- ``sample``: while calls are running, a thread samples the stack of the event
+  loop thread every EMF_PROFILE_INTERVAL_MS (default 5). A slow call's samples
+  are written as collapsed stacks (``frame;frame;frame count`` lines) for
+  flamegraph.pl, speedscope or inferno. Stacks ending in the selector are time
+  the loop spent waiting on I/O, e.g. on the EMF server.
+- ``cprofile``: cProfile runs during each call and is written as a pstats
+  ``.prof`` file for snakeviz or ``python -m pstats``. It counts every
+  function call but slows calls down. Only one call is profiled at a time;
+  calls overlapping it are not.
+
+Calls taking at least EMF_PROFILE_THRESHOLD_MS (default 500) are written to
+EMF_PROFILE_DIR (default ./profiles). A .json file next to each profile names
+the tool, session, arguments and duration. The hook wraps FastMCP's tool
+dispatch, so argument validation and result conversion are included. Both
+modes see everything the event loop ran during the call, concurrent calls
+included.
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODE = os.environ.get("EMF_PROFILE", "").lower()
+PROFILE_THRESHOLD_MS = float(os.environ.get("EMF_PROFILE_THRESHOLD_MS", "500"))
+PROFILE_DIR = os.environ.get("EMF_PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.environ.get("EMF_PROFILE_INTERVAL_MS", "5"))
+
+MODES = ('sample', 'cprofile')
+_UNSAFE_FILENAME = re.compile(r'[^\w.-]')
+
+
+class StackSampler:
+    """Samples the stacks of threads running tool calls, only while calls are running."""
+
+    def __init__(self, interval: float, max_samples: int = 200_000) -> None:
+        self.interval = interval
+        self._samples: Deque[Tuple[float, int, Tuple[str, ...]]] = deque(maxlen=max_samples)
+        self._threads: Dict[int, int] = {}
+        self._labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> None:
+        """A call starts on the current thread."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self) -> None:
+        thread_id = threading.get_ident()
+        with self._lock:
+            count = self._threads.get(thread_id, 0) - 1
+            if count > 0:
+                self._threads[thread_id] = count
+            else:
+                self._threads.pop(thread_id, None)
+
+    def stacks(self, start: float, end: float) -> Counter:
+        """Collapsed stacks of the current thread sampled between start and end (perf_counter)."""
+        thread_id = threading.get_ident()
+        return Counter(';'.join(stack) for when, tid, stack in list(self._samples)
+                       if tid == thread_id and start <= when <= end)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self._labels[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                threads = list(self._threads)
+            if not threads:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self._samples.append((now, thread_id, tuple(reversed(stack))))
+            del frames
+            time.sleep(self.interval)
+
+
+class SlowCallProfiler:
+    """Profiles tool calls and writes out those slower than threshold_ms."""
+
+    def __init__(self, mode: str, threshold_ms: float, directory: str, interval_ms: float, server: str) -> None:
+        self.mode = mode
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.server = server
+        self.sampler = StackSampler(interval_ms / 1000) if mode == 'sample' else None
+        self._profiling = False
+        self._count = 0
+
+    async def run(self, name: str, arguments: Dict[str, Any], coro) -> Any:
+        profile = None
+        if self.sampler is not None:
+            self.sampler.begin()
+        elif not self._profiling:
+            profile = cProfile.Profile()
+            self._profiling = True
+            profile.enable()
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            end = time.perf_counter()
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            elif self.sampler is not None:
+                self.sampler.end()
+            elapsed_ms = (end - start) * 1000
+            if elapsed_ms >= self.threshold_ms and (profile is not None or self.sampler is not None):
+                try:
+                    self._write(name, arguments, started_at, elapsed_ms, profile, start, end)
+                except Exception as e:
+                    logger.warning(f"Could not write the profile of {name}: {e}")
+
+    def _write(self, name: str, arguments: Dict[str, Any], started_at: float, elapsed_ms: float,
+               profile: Optional[cProfile.Profile], start: float, end: float) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._count += 1
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))
+        tool = _UNSAFE_FILENAME.sub('_', name)
+        base = os.path.join(self.directory, f"{stamp}-{os.getpid()}-{self._count}-{tool}-{elapsed_ms:.0f}ms")
+        meta: Dict[str, Any] = {
+            'server': self.server,
+            'tool': name,
+            'session_id': (arguments or {}).get('session_id'),
+            'arguments': {key: _truncate(value) for key, value in (arguments or {}).items()},
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started_at)),
+            'duration_ms': round(elapsed_ms, 1),
+            'threshold_ms': self.threshold_ms,
+            'mode': self.mode,
+        }
+        if profile is not None:
+            profile.dump_stats(base + '.prof')
+            meta['profile'] = os.path.basename(base + '.prof')
+        else:
+            stacks = self.sampler.stacks(start, end)
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+            meta['profile'] = os.path.basename(base + '.collapsed')
+            meta['samples'] = sum(stacks.values())
+            meta['interval_ms'] = self.sampler.interval * 1000
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, default=str)
+        logger.info(f"Profiled slow call {name} ({elapsed_ms:.0f} ms): {meta['profile']}")
+
+
+def _truncate(value: Any, limit: int = 500) -> Any:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return value if len(text) <= limit else text[:limit] + '...'
+
+
+def install(mcp) -> bool:
+    """Profile the tool calls of a FastMCP server as EMF_PROFILE says; False when it is off."""
+    if not PROFILE_MODE:
+        return False
+    if PROFILE_MODE not in MODES:
+        logger.warning(f"Unknown EMF_PROFILE={PROFILE_MODE!r} (expected one of {', '.join(MODES)}), profiling off")
+        return False
+    profiler = SlowCallProfiler(PROFILE_MODE, PROFILE_THRESHOLD_MS, PROFILE_DIR, PROFILE_INTERVAL_MS, mcp.name)
+    manager = mcp._tool_manager
+    call_tool = manager.call_tool
+
+    @functools.wraps(call_tool)
+    async def profiled_call_tool(name, arguments, *args, **kwargs):
+        return await profiler.run(name, arguments, call_tool(name, arguments, *args, **kwargs))
+
+    manager.call_tool = profiled_call_tool
+    logger.info(f"Profiling tool calls over {PROFILE_THRESHOLD_MS:.0f} ms ({PROFILE_MODE}) into {PROFILE_DIR}")
+    return True
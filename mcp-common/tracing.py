@@ -0,0 +1,278 @@
+"""Minimal tracing with W3C trace context propagation.
+
+Spans follow the agent turn through LLM and tool calls, the MCP request (its
+``_meta.traceparent``), the server's tool handler and its HTTP requests to the
+EMF server (the ``traceparent`` header). Set EMF_TRACE_EXPORT to record them:
+
+- a file path: one Zipkin v2 JSON span per line, appended in batches
+- an http(s) URL: spans POSTed in batches to a Zipkin-compatible collector,
+  e.g. ``http://localhost:9411/api/v2/spans`` (Zipkin, Jaeger, OpenTelemetry Collector)
+
+Both exporters buffer spans and write them from a daemon thread (and at
+exit), so ending a span never blocks on I/O. Without EMF_TRACE_EXPORT, span()
+only passes an incoming parent on, so callers pay a ContextVar lookup.
+
+    tracer = Tracer.from_env("emf-mcp-agent")
+    with tracer.span("llm.call", attributes={"llm.model": name}) as span:
+        ...
+        span.set_attribute("llm.output_tokens", 42)
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORT = os.environ.get("EMF_TRACE_EXPORT", "")
+# Fraction of root traces recorded; a traced parent's decision is always followed
+TRACE_SAMPLE_RATE = float(os.environ.get("EMF_TRACE_SAMPLE_RATE", "1.0"))
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+
+class SpanContext:
+    """Identity of a span as carried in a traceparent."""
+
+    __slots__ = ('trace_id', 'span_id', 'sampled')
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True) -> None:
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """SpanContext of a W3C traceparent header, or None when it is missing or malformed."""
+    match = _TRACEPARENT.match(value.strip().lower()) if isinstance(value, str) else None
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+
+
+class Span(SpanContext):
+    """A timed operation; ended (and exported) by Tracer.span."""
+
+    __slots__ = ('parent_id', 'name', 'kind', 'start_us', 'duration_us', 'attributes', '_perf_start')
+
+    def __init__(self, name: str, kind: Optional[str], parent: Optional[SpanContext], sampled: bool) -> None:
+        super().__init__(parent.trace_id if parent else f"{random.getrandbits(128):032x}",
+                         f"{random.getrandbits(64):016x}", sampled)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.start_us = int(time.time() * 1_000_000)
+        self.duration_us = 0
+        self.attributes: Dict[str, str] = {}
+        self._perf_start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value if isinstance(value, str) else json.dumps(value, default=str)
+
+    def set_error(self, message: Any) -> None:
+        self.attributes['error'] = str(message)[:500] or 'true'
+
+    def to_zipkin(self, service: str) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            'traceId': self.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': self.start_us,
+            'duration': max(1, self.duration_us),
+            'localEndpoint': {'serviceName': service},
+            'tags': self.attributes,
+        }
+        if self.parent_id:
+            span['parentId'] = self.parent_id
+        if self.kind:
+            span['kind'] = self.kind
+        return span
+
+
+# Span (or remote parent) that new spans in this context are children of
+_current: ContextVar[Optional[SpanContext]] = ContextVar('current_span', default=None)
+
+
+def _reset(token) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        pass  # ended in another context, e.g. an async generator closed by its consumer
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span, for an outgoing request."""
+    context = _current.get()
+    return context.traceparent if context is not None else None
+
+
+def mcp_meta() -> Optional[Dict[str, str]]:
+    """``_meta`` of an outgoing MCP request carrying the current trace, if any."""
+    traceparent = current_traceparent()
+    return {'traceparent': traceparent} if traceparent else None
+
+
+class _BufferedExporter:
+    """Buffers spans and writes them in batches from a daemon thread, off the caller's thread."""
+
+    def __init__(self, name: str, interval: float = 1.0, max_batch: int = 512) -> None:
+        self._interval = interval
+        self._max_batch = max_batch
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Serializes writes between the daemon thread and flush() at exit
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._loop, name=name, daemon=True).start()
+        atexit.register(self.flush)
+
+    def export(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) >= self._max_batch:
+                self._wake.set()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            self.flush()
+
+
+class JsonlExporter(_BufferedExporter):
+    """Appends each span as a line of Zipkin v2 JSON."""
+
+    def __init__(self, path: str, interval: float = 1.0, max_batch: int = 512) -> None:
+        self._path = path
+        super().__init__('jsonl-exporter', interval, max_batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = ''.join(json.dumps(span, separators=(',', ':')) + '\n' for span in batch)
+        try:
+            with open(self._path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Could not export {len(batch)} spans to {self._path}: {e}")
+
+
+class ZipkinExporter(_BufferedExporter):
+    """POSTs spans in batches to a Zipkin v2 endpoint."""
+
+    def __init__(self, url: str, interval: float = 1.0, max_batch: int = 512) -> None:
+        self._url = url
+        super().__init__('zipkin-exporter', interval, max_batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(self._url, data=json.dumps(batch).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.warning(f"Could not export {len(batch)} spans to {self._url}: {e}")
+
+
+Exporter = Union[JsonlExporter, ZipkinExporter]
+_env_exporter: Optional[Exporter] = None
+
+
+def _exporter_from_env() -> Optional[Exporter]:
+    """The process-wide exporter for EMF_TRACE_EXPORT, created on first use."""
+    global _env_exporter
+    if TRACE_EXPORT and _env_exporter is None:
+        if TRACE_EXPORT.startswith(('http://', 'https://')):
+            _env_exporter = ZipkinExporter(TRACE_EXPORT)
+        else:
+            _env_exporter = JsonlExporter(TRACE_EXPORT)
+    return _env_exporter
+
+
+class Tracer:
+    """Creates spans for one service and hands the ended ones to an exporter."""
+
+    def __init__(self, service: str, exporter: Optional[Exporter] = None, sample_rate: float = 1.0) -> None:
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_env(cls, service: str) -> 'Tracer':
+        """Tracer exporting to EMF_TRACE_EXPORT (disabled when unset); tracers share its exporter."""
+        return cls(service, _exporter_from_env(), TRACE_SAMPLE_RATE)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        *,
+        kind: Optional[str] = None,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Optional[Span]]:
+        """Run a block in a child span of parent (default: the current span).
+
+        kind is a Zipkin kind (CLIENT, SERVER, PRODUCER, CONSUMER) or None for
+        local work. Yields None when tracing is disabled or the trace is not
+        sampled; an exception leaving the block is recorded on the span.
+        """
+        parent = parent if parent is not None else _current.get()
+        if self.exporter is None:
+            # Still pass a remote parent on to outgoing requests
+            token = _current.set(parent)
+            try:
+                yield None
+            finally:
+                _reset(token)
+            return
+
+        sampled = parent.sampled if parent is not None else random.random() < self.sample_rate
+        span = Span(name, kind, parent, sampled)
+        for key, value in (attributes or {}).items():
+            span.set_attribute(key, value)
+        token = _current.set(span)
+        try:
+            yield span if sampled else None
+        except Exception as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _reset(token)
+            span.duration_us = int((time.perf_counter() - span._perf_start) * 1_000_000)
+            if sampled:
+                try:
+                    self.exporter.export(span.to_zipkin(self.service))
+                except Exception as e:
+                    logger.debug(f"Could not export span {name}: {e}")
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
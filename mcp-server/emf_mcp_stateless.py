@@ -1,16 +1,55 @@
 import os
+import re
 import sys
 import json
+import time
+import asyncio
 import logging
+import functools
 import threading
-from typing import Dict, Any, List, Union
+from contextvars import ContextVar
+from typing import Any, Callable, Container, Dict, List, Optional, Set, Union
 
-import requests
+import httpx
 from mcp.server.fastmcp import FastMCP
 
+# Modules shared with the dynamic server and the agent
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'mcp-common'))
+
+from metamodel_index import MetamodelIndex, suggest  # noqa: E402
+from metrics import REGISTRY as METRICS, Counter, Gauge, Histogram, monitor_loop_lag  # noqa: E402
+from response_format import render, savings  # noqa: E402
+from session_store import ObjectTracker, SessionStore  # noqa: E402
+import tool_profiler  # noqa: E402
+from tracing import Tracer, current_traceparent, parse_traceparent  # noqa: E402
+
 # Constants
 EMF_SERVER_BASE = os.environ.get("EMF_SERVER_BASE", "http://localhost:8095")
 
+# HTTP transport settings (pooled, keep-alive connections to EMF_SERVER_BASE)
+HTTP_TIMEOUT = float(os.environ.get("EMF_HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("EMF_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("EMF_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("EMF_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("EMF_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Session store bounds (0 disables a limit)
+SESSION_MAX = int(os.environ.get("EMF_SESSION_MAX", "256"))
+SESSION_IDLE_TTL = float(os.environ.get("EMF_SESSION_IDLE_TTL", "3600"))
+SESSION_CLOSE_ON_EVICT = os.environ.get("EMF_SESSION_CLOSE_ON_EVICT", "false").lower() in ("1", "true", "yes")
+
+# MCP transport: 'stdio' (one server per client process) or 'streamable-http'
+# (one long-lived server shared by many clients at http://HOST:PORT/mcp)
+MCP_TRANSPORT = os.environ.get("EMF_MCP_TRANSPORT", "stdio")
+MCP_HOST = os.environ.get("EMF_MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.environ.get("EMF_MCP_PORT", "8000"))
+
+# Record per-call timings (handler, HTTP, rendering) for benchmarks/tool_latency.py
+TOOL_TIMING = os.environ.get("EMF_TOOL_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Port of the optional FastAPI /tools, /stats and /metrics side app (0 disables it)
+TOOLS_API_PORT = int(os.environ.get("EMF_TOOLS_API_PORT", "8082"))
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,12 +59,53 @@ logging.basicConfig(
 logger = logging.getLogger('emf_mcp_stateless')
 
 # Initialize the MCP server
-mcp = FastMCP("emf_stateless")
+mcp = FastMCP("emf_stateless", host=MCP_HOST, port=MCP_PORT)
+# Spans of tool calls and EMF requests, exported to EMF_TRACE_EXPORT (see mcp-common/tracing.py)
+tracer = Tracer.from_env("emf-mcp-stateless")
+
+_background_tasks: set = set()
+# The MCP server's event loop, recorded by the first tool call (see ensure_loop_monitor).
+# The HTTP client and _background_tasks belong to it, so remote closes are scheduled there.
+_server_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def on_session_evicted(session_id: str, data: Dict[str, Any], reason: str) -> None:
+    """Drop the evicted session's tracked objects and optionally close it on the EMF server."""
+    session_objects.pop(session_id, None)
+    if reason == 'deleted':
+        return
+    logger.info(f"Evicted session {session_id} ({reason})")
+    if SESSION_CLOSE_ON_EVICT and _server_loop is not None and not _server_loop.is_closed():
+        try:
+            on_server_loop = asyncio.get_running_loop() is _server_loop
+        except RuntimeError:
+            on_server_loop = False
+        if on_server_loop:
+            close_in_background(session_id)
+        else:
+            _server_loop.call_soon_threadsafe(close_in_background, session_id)
+
+
+def close_in_background(session_id: str) -> None:
+    """Start closing session_id on the EMF server; call it on the server loop."""
+    task = asyncio.get_running_loop().create_task(close_remote_session(session_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-# Session storage (client-side)
-active_sessions: Dict[str, Dict[str, Any]] = {}
-# Track created object IDs by session and class name
-session_objects: Dict[str, Dict[str, List[Union[str, int]]]] = {}
+
+async def close_remote_session(session_id: str) -> None:
+    try:
+        resp = await make_request('DELETE', f'/metamodel/{session_id}')
+        if resp.status_code != 200:
+            logger.warning(f"Could not close session {session_id} on the EMF server: {resp.text}")
+    except Exception as e:
+        logger.warning(f"Could not close session {session_id} on the EMF server: {e}")
+
+
+# Session storage (client-side), bounded by size and idle time
+active_sessions: SessionStore = SessionStore(SESSION_MAX, SESSION_IDLE_TTL, on_evict=on_session_evicted)
+# Track created object IDs by session, indexed by class and by ID (entries leave with their session)
+session_objects: Dict[str, ObjectTracker] = {}
 
 
 def parse_id_from_user_input(user_input: str) -> Union[str, int]:
@@ -42,21 +122,59 @@ def parse_id_from_user_input(user_input: str) -> Union[str, int]:
 
 
 def add_object_to_session(session_id: str, class_name: str, object_id: Union[str, int]):
-    session_objects.setdefault(session_id, {}).setdefault(class_name, []).append(object_id)
+    if active_sessions.peek(session_id) is None:
+        return
+    tracker = session_objects.get(session_id)
+    if tracker is None:
+        tracker = session_objects[session_id] = ObjectTracker()
+    tracker.add(class_name, parse_id_from_user_input(object_id))
 
 
 def remove_object_from_session(session_id: str, class_name: str, object_id: Union[str, int]):
-    try:
-        session_objects.get(session_id, {}).get(class_name, []).remove(object_id)
-    except (ValueError, AttributeError):
-        pass
+    tracker = session_objects.get(session_id)
+    if tracker is not None:
+        tracker.discard(parse_id_from_user_input(object_id))
 
 
 def get_session_objects(session_id: str, class_name: str = None) -> Dict[str, List[Union[str, int]]]:
-    data = session_objects.get(session_id, {})
+    tracker = session_objects.get(session_id)
     if class_name:
-        return {class_name: data.get(class_name, [])}
-    return data
+        return {class_name: tracker.ids(class_name) if tracker else []}
+    return tracker.as_dict() if tracker else {}
+
+
+def session_metrics(include_memory: bool = False) -> Dict[str, Any]:
+    """Session store counters, locally tracked objects and response token savings of live sessions.
+
+    Served from the side app's thread, so it only peeks: expiring sessions here
+    would run their eviction off the server loop. include_memory adds the
+    approximate size of every session, which walks their whole state.
+    """
+    stats = active_sessions.stats(include_memory=include_memory, expire=False)
+    stats['tracked_objects'] = sum(len(tracker) for tracker in list(session_objects.values()))
+    totals: Dict[str, int] = {}
+    for _, session in active_sessions.peek_items():
+        for key, value in list(session.get('response_stats', {}).items()):
+            totals[key] = totals.get(key, 0) + value
+    stats['responses'] = savings(totals)
+    return stats
+
+
+def respond(session_id: str, data: Any, json_only: bool = False) -> str:
+    """Render a structured tool result in the configured format, counting its tokens for the session."""
+    session = active_sessions.peek(session_id)
+    stats = session.setdefault('response_stats', {}) if session is not None else None
+    timing = _call_timing.get()
+    if timing is None:
+        return render(data, stats, json_only=json_only)
+    if isinstance(data, dict) and 'error' in data:
+        # Classified here, before rendering: the text differs with EMF_RESPONSE_FORMAT
+        timing['error'] = True
+    start = time.perf_counter()
+    try:
+        return render(data, stats, json_only=json_only)
+    finally:
+        timing['render'] += time.perf_counter() - start
 
 
 def format_object_list(session_id: str, class_name: str) -> str:
@@ -65,9 +183,390 @@ def format_object_list(session_id: str, class_name: str) -> str:
     return f"Available {class_name} objects: {ids if ids else '[]'}"
 
 
-def make_request(method: str, endpoint: str, **kwargs) -> requests.Response:
-    url = f"{EMF_SERVER_BASE}{endpoint}"
-    return requests.request(method, url, timeout=30, **kwargs)
+def find_object_class(session_id: str, object_id: Union[str, int]) -> Optional[str]:
+    """Class under which object_id was created through this client, if tracked."""
+    tracker = session_objects.get(session_id)
+    return tracker.class_of(parse_id_from_user_input(object_id)) if tracker else None
+
+
+def get_metamodel_index(session_id: str) -> Optional[MetamodelIndex]:
+    return active_sessions.get(session_id, {}).get('metamodel')
+
+
+def check_class(index: Optional[MetamodelIndex], class_name: str, instantiable: bool = False) -> Optional[str]:
+    """Return an error message if class_name is unknown (or abstract when instantiable is required)."""
+    if index is None:
+        return None
+    info = index.get_class(class_name)
+    if info is None:
+        guess = suggest(class_name, index.class_names())
+        hint = f"Did you mean '{guess}'?" if guess else f"Known classes: {', '.join(index.class_names())}"
+        return f"EClass not found: {class_name}. {hint}"
+    if instantiable and (info.abstract or info.interface):
+        concrete = [name for name in index.class_names(include_abstract=False) if index.is_subtype(name, class_name)]
+        return f"EClass {class_name} is abstract and cannot be instantiated. Concrete subclasses: {', '.join(concrete) or 'none'}"
+    return None
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async client, creating it on first use inside the running loop.
+
+    All requests target EMF_SERVER_BASE, so the pool limits double as the
+    per-host concurrency cap; requests beyond it wait for a free connection.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=EMF_SERVER_BASE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _http_client
+
+
+def validate_update_call(session_id: str, class_name: str, object_id: Union[str, int], feature_name: str,
+                         value: Any, class_of: Optional[Callable[[Any], Optional[str]]] = None,
+                         allow_placeholders: Container[str] = ()) -> Optional[Dict[str, Any]]:
+    """Pre-flight check of an update against the metamodel index.
+
+    allow_placeholders holds the refs of the batch being validated, if any.
+    Returns a structured error with a suggested fix, or None when the call may be sent.
+    """
+    index = get_metamodel_index(session_id)
+    if index is None:
+        return None
+    class_of = class_of or (lambda oid: find_object_class(session_id, oid))
+    actual = class_of(object_id)
+    if actual is not None and actual != class_name:
+        return {
+            'error': 'wrong_class',
+            'message': f"Object {object_id} is a {actual}, not a {class_name}",
+            'suggestion': f"Use class_name='{actual}'",
+        }
+    return index.validate_update(class_name, feature_name, value, class_of=class_of,
+                                 allow_placeholders=allow_placeholders)
+
+
+async def make_request(method: str, endpoint: str, **kwargs) -> httpx.Response:
+    timing = _call_timing.get()
+    if timing is not None:
+        # Wall time with at least one request in flight, so concurrent requests are not counted twice
+        timing['in_flight'] += 1
+        if timing['in_flight'] == 1:
+            timing['http_since'] = time.perf_counter()
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        with tracer.span(f"HTTP {method}", kind='CLIENT', attributes={'http.path': endpoint}) as span:
+            traceparent = current_traceparent()
+            if traceparent:
+                kwargs['headers'] = {**(kwargs.get('headers') or {}), 'traceparent': traceparent}
+            resp = await get_http_client().request(method, endpoint, **kwargs)
+            status = str(resp.status_code)
+            if span is not None:
+                span.set_attribute('http.status_code', status)
+                if resp.status_code >= 400:
+                    span.set_error(resp.text[:200])
+        return resp
+    finally:
+        end = time.perf_counter()
+        UPSTREAM_DURATION.labels(method, status).observe(end - start)
+        if timing is not None:
+            timing['in_flight'] -= 1
+            if timing['in_flight'] == 0:
+                timing['http'] += end - timing['http_since']
+
+
+# =============
+# Tool metrics and timing
+# =============
+
+TOOL_CALLS = Counter('emf_mcp_tool_calls_total', 'MCP tool calls by result status (ok, error, exception).',
+                     ['tool', 'status'])
+TOOL_DURATION = Histogram('emf_mcp_tool_duration_seconds', 'Time spent in MCP tool handlers.', ['tool'])
+UPSTREAM_DURATION = Histogram('emf_mcp_upstream_request_duration_seconds',
+                              'Requests to the EMF server by method and HTTP status.', ['method', 'status'])
+ACTIVE_SESSIONS = Gauge('emf_mcp_active_sessions', 'Sessions held by this server.')
+TRACKED_OBJECTS = Gauge('emf_mcp_tracked_objects', 'Objects tracked across the active sessions.')
+LOOP_LAG = Histogram('emf_mcp_event_loop_lag_seconds', 'Delay of the event loop in waking a periodic timer.',
+                     buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+LOOP_LAG_LAST = Gauge('emf_mcp_event_loop_lag_last_seconds', 'Latest event loop lag sample.')
+
+
+def collect_session_gauges() -> None:
+    # Runs on the side app's thread: count without expiring (see session_metrics)
+    ACTIVE_SESSIONS.set(len(active_sessions.peek_items()))
+    TRACKED_OBJECTS.set(sum(len(tracker) for tracker in list(session_objects.values())))
+
+
+METRICS.add_collector(collect_session_gauges)
+
+# Tools report failures rather than raising: structured results with an 'error' key are
+# flagged by respond(); the plain-text ones start with one of these
+_ERROR_TEXT = re.compile(r'^(Error\b|Session \S+ not found|EClass (not found|\S+ is abstract))')
+
+# Seconds spent in HTTP requests and in rendering by the tool call running in this context
+_call_timing: ContextVar[Optional[Dict[str, float]]] = ContextVar('call_timing', default=None)
+# tool name -> [[handler, http, render], ...] in seconds, drained by get_tool_timings
+tool_timings: Dict[str, List[List[float]]] = {}
+_loop_monitor: Optional[asyncio.Task] = None
+
+
+def request_trace_parent():
+    """Caller's span from the traceparent in the MCP request's _meta, if any."""
+    try:
+        meta = mcp._mcp_server.request_context.meta
+    except LookupError:
+        return None
+    return parse_traceparent(getattr(meta, 'traceparent', None)) if meta is not None else None
+
+
+def ensure_loop_monitor() -> None:
+    """Record the server's running loop and start sampling its lag, once."""
+    global _loop_monitor, _server_loop
+    if _loop_monitor is None or _loop_monitor.done():
+        _server_loop = asyncio.get_running_loop()
+        _loop_monitor = _server_loop.create_task(monitor_loop_lag(LOOP_LAG, LOOP_LAG_LAST))
+        _background_tasks.add(_loop_monitor)
+        _loop_monitor.add_done_callback(_background_tasks.discard)
+
+
+def timed_tool(name: str, fn: Callable) -> Callable:
+    """Wrap a tool function so each call updates the tool metrics.
+
+    With EMF_TOOL_TIMING, each call's handler, HTTP and rendering time is also
+    kept for get_tool_timings. HTTP time is the wall time during which any of
+    the call's requests was in flight, so apply_operations waves count once and
+    the parts add up.
+    """
+    calls = {status: TOOL_CALLS.labels(name, status) for status in ('ok', 'error', 'exception')}
+    duration = TOOL_DURATION.labels(name)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        ensure_loop_monitor()
+        timing = {'http': 0.0, 'render': 0.0, 'in_flight': 0, 'http_since': 0.0, 'error': False}
+        token = _call_timing.set(timing)
+        status = 'exception'
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"tool {name}", kind='SERVER', parent=request_trace_parent(),
+                             attributes={'mcp.tool': name, 'emf.session_id': kwargs.get('session_id')}) as span:
+                result = await fn(*args, **kwargs)
+                failed = timing['error'] or (isinstance(result, str) and _ERROR_TEXT.match(result))
+                status = 'error' if failed else 'ok'
+                if span is not None and status == 'error':
+                    span.set_error(result[:200])
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            _call_timing.reset(token)
+            calls[status].inc()
+            duration.observe(elapsed)
+            if TOOL_TIMING:
+                tool_timings.setdefault(name, []).append([elapsed, timing['http'], timing['render']])
+    return wrapper
+
+
+def instrument_tools() -> None:
+    """Wrap every registered tool for metrics, and expose get_tool_timings with EMF_TOOL_TIMING."""
+    for name, tool in mcp._tool_manager._tools.items():
+        tool.fn = timed_tool(name, tool.fn)
+    if not TOOL_TIMING:
+        return
+
+    @mcp.tool(name="get_tool_timings",
+              description="Benchmark support: per-call [handler, http, render] seconds by tool since the last call.")
+    async def get_tool_timings() -> str:
+        samples = dict(tool_timings)
+        tool_timings.clear()
+        return json.dumps(samples, separators=(',', ':'))
+
+
+# =============
+# Batch operations
+# =============
+
+BATCH_OPS = {'create', 'update', 'clear', 'delete'}
+
+
+def is_placeholder(value: Any, names: Container[str]) -> bool:
+    """Whether value is '$name' for one of names, the refs of a batch; other '$' strings are plain values."""
+    return isinstance(value, str) and value.startswith('$') and value[1:] in names
+
+
+def collect_placeholders(value: Any, names: Container[str]) -> List[str]:
+    """Return the placeholder names ($name, name in names) used anywhere inside value."""
+    if is_placeholder(value, names):
+        return [value[1:]]
+    if isinstance(value, list):
+        return [name for item in value for name in collect_placeholders(item, names)]
+    if isinstance(value, dict):
+        return [name for item in value.values() for name in collect_placeholders(item, names)]
+    return []
+
+
+def resolve_placeholders(value: Any, refs: Dict[str, Union[str, int]]) -> Any:
+    """Replace $name placeholders with the IDs created earlier in the batch."""
+    if is_placeholder(value, refs):
+        return refs[value[1:]]
+    if isinstance(value, list):
+        return [resolve_placeholders(item, refs) for item in value]
+    if isinstance(value, dict):
+        return {k: resolve_placeholders(v, refs) for k, v in value.items()}
+    return value
+
+
+def batch_refs(ops: List[Dict[str, Any]]) -> Set[str]:
+    """Placeholder names defined by the creates of a parsed batch."""
+    return {op['ref'] for op in ops if op['op'] == 'create' and op.get('ref')}
+
+
+def object_key(object_id: Any) -> str:
+    """Key identifying the object an ID (or '$name' placeholder) points to, however it was spelled."""
+    return str(parse_id_from_user_input(object_id))
+
+
+def parse_operations(raw: Any) -> List[Dict[str, Any]]:
+    """Decode and check a batch before anything is sent to the EMF server.
+
+    Raises ValueError describing the first malformed operation.
+    """
+    ops = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(ops, list):
+        raise ValueError("operations must be a JSON list")
+    # Only '$name' strings naming a ref of this batch are placeholders, so values like '$5' stay literal
+    names = {str(op['ref']).lstrip('$') for op in ops
+             if isinstance(op, dict) and str(op.get('op', '')).lower() == 'create' and op.get('ref')}
+    defined: set = set()
+    parsed: List[Dict[str, Any]] = []
+    for idx, op in enumerate(ops):
+        if not isinstance(op, dict):
+            raise ValueError(f"operation {idx} is not an object")
+        kind = str(op.get('op', '')).lower()
+        if kind not in BATCH_OPS:
+            raise ValueError(f"operation {idx}: unknown op '{op.get('op')}' (expected one of {sorted(BATCH_OPS)})")
+        required = ['class_name'] + ([] if kind == 'create' else ['object_id'])
+        if kind in ('update', 'clear'):
+            required.append('feature_name')
+        if kind == 'update' and 'value' not in op:
+            required.append('value')
+        missing = [key for key in required if op.get(key) in (None, '')]
+        if missing:
+            raise ValueError(f"operation {idx} ({kind}): missing {', '.join(missing)}")
+        entry = dict(op, op=kind)
+        if kind == 'update' and isinstance(entry['value'], str):
+            # Same leniency as update_feature: JSON-looking strings are decoded
+            try:
+                entry['value'] = json.loads(entry['value'])
+            except Exception:
+                pass
+        object_id = entry.get('object_id')
+        if isinstance(object_id, str) and object_id.startswith('$') and object_id[1:] not in names:
+            # Object IDs never start with '$', so this is a ref the batch does not define
+            raise ValueError(f"operation {idx} ({kind}): placeholder {object_id} is not created by any operation")
+        used = collect_placeholders(object_id, names) + collect_placeholders(entry.get('value'), names)
+        unknown = [name for name in used if name not in defined]
+        if unknown:
+            raise ValueError(f"operation {idx} ({kind}): placeholder ${unknown[0]} is not created by an earlier operation")
+        if kind == 'create' and op.get('ref'):
+            ref = str(op['ref']).lstrip('$')
+            if ref in defined:
+                raise ValueError(f"operation {idx}: placeholder ${ref} is defined twice")
+            defined.add(ref)
+            entry['ref'] = ref
+        parsed.append(entry)
+    return parsed
+
+
+def plan_waves(ops: List[Dict[str, Any]],
+               is_reference: Optional[Callable[[str, str], bool]] = None) -> List[List[int]]:
+    """Group operation indexes into waves that can run concurrently.
+
+    An operation waits for the create of every placeholder it uses and for the
+    previous operation touching the same object (as target or reference value),
+    so per-object ordering is preserved while independent edits overlap.
+    is_reference(class_name, feature_name) tells which update values are object
+    IDs; without it every scalar value is assumed to be one.
+    """
+    names = batch_refs(ops)
+    last_touch: Dict[str, int] = {}
+    ref_wave: Dict[str, int] = {}
+    waves: List[List[int]] = []
+    for idx, op in enumerate(ops):
+        keys = set()
+        if op['op'] != 'create':
+            keys.add(object_key(op['object_id']))
+        if op['op'] == 'update':
+            value = op['value']
+            items = value if isinstance(value, list) else [value]
+            references = is_reference is None or is_reference(op['class_name'], op['feature_name'])
+            for item in items:
+                if is_placeholder(item, names):
+                    keys.add(item)
+                elif references and isinstance(item, (str, int)) and not isinstance(item, bool) and item != '':
+                    keys.add(object_key(item))
+        deps = [ref_wave[name] for name in collect_placeholders(op.get('object_id'), names)]
+        deps += [ref_wave[name] for name in collect_placeholders(op.get('value'), names)]
+        deps += [last_touch[key] for key in keys if key in last_touch]
+        wave = max(deps) + 1 if deps else 0
+        for key in keys:
+            last_touch[key] = wave
+        if op['op'] == 'create' and op.get('ref'):
+            ref_wave[op['ref']] = wave
+            last_touch['$' + op['ref']] = wave
+        while len(waves) <= wave:
+            waves.append([])
+        waves[wave].append(idx)
+    return waves
+
+
+async def execute_operation(session_id: str, op: Dict[str, Any], refs: Dict[str, Union[str, int]]) -> str:
+    """Run one batch operation and return its short status ('ok ...' or an error)."""
+    kind = op['op']
+    class_name = op['class_name']
+    if kind == 'create':
+        resp = await make_request('POST', f'/metamodel/{session_id}/{class_name}')
+        if resp.status_code != 200:
+            return f"error: {resp.text}"
+        obj_id = resp.json().get('id')
+        if obj_id is not None:
+            add_object_to_session(session_id, class_name, obj_id)
+            if op.get('ref'):
+                refs[op['ref']] = obj_id
+        return f"ok id={obj_id}"
+
+    object_id = parse_id_from_user_input(resolve_placeholders(op['object_id'], refs))
+    path = f'/metamodel/{session_id}/{class_name}/{object_id}'
+    if kind == 'update':
+        value = resolve_placeholders(op['value'], refs)
+        resp = await make_request('PUT', f"{path}/{op['feature_name']}", json={'value': value},
+                                  headers={'Content-Type': 'application/json'})
+    elif kind == 'clear':
+        resp = await make_request('DELETE', f"{path}/{op['feature_name']}")
+    else:
+        resp = await make_request('DELETE', path)
+    if resp.status_code != 200:
+        return f"error: {resp.text}"
+    if kind == 'delete':
+        remove_object_from_session(session_id, class_name, object_id)
+    return "ok"
+
+
+def describe_operation(op: Dict[str, Any]) -> str:
+    if op['op'] == 'create':
+        return f"create {op['class_name']}" + (f" ${op['ref']}" if op.get('ref') else "")
+    target = f"{op['class_name']}[{op['object_id']}]"
+    if op['op'] in ('update', 'clear'):
+        target += f".{op['feature_name']}"
+    return f"{op['op']} {target}"
 
 
 # =============
@@ -80,9 +579,15 @@ async def start_session(metamodel_file_path: str) -> str:
     try:
         if not os.path.exists(metamodel_file_path):
             return f"Error: File not found at {metamodel_file_path}"
+        # Index the metamodel locally so introspection and validation need no round trip
+        try:
+            index = await asyncio.to_thread(MetamodelIndex.from_file, metamodel_file_path)
+        except Exception as e:
+            logger.warning(f"Could not index metamodel {metamodel_file_path}: {e}")
+            index = None
         with open(metamodel_file_path, 'rb') as f:
             files = {'file': f}
-            resp = make_request('POST', '/metamodel/start', files=files)
+            resp = await make_request('POST', '/metamodel/start', files=files)
         if resp.status_code != 200:
             return f"Error starting session: {resp.text}"
         result = resp.json()
@@ -91,12 +596,15 @@ async def start_session(metamodel_file_path: str) -> str:
             return f"Error: Server did not return sessionId. Raw: {resp.text}"
         active_sessions[session_id] = {
             'routes': result.get('routes', {}),
-            'metamodel_file': metamodel_file_path
+            'metamodel_file': metamodel_file_path,
+            'metamodel': index
         }
-        return json.dumps({
+        # Clients parse this result, so it stays JSON in every format
+        return respond(session_id, {
             'sessionId': session_id,
+            'classes': index.class_names() if index else [],
             'message': 'Session started. Use other tools with this sessionId.'
-        }, indent=2)
+        }, json_only=True)
     except Exception as e:
         return f"Error: {e}"
 
@@ -107,14 +615,17 @@ async def create_object(session_id: str, class_name: str) -> str:
     try:
         if session_id not in active_sessions:
             return f"Session {session_id} not found. Start a session first."
-        resp = make_request('POST', f'/metamodel/{session_id}/{class_name}')
+        error = check_class(get_metamodel_index(session_id), class_name, instantiable=True)
+        if error:
+            return f"Error creating {class_name}: {error}"
+        resp = await make_request('POST', f'/metamodel/{session_id}/{class_name}')
         if resp.status_code != 200:
             return f"Error creating {class_name}: {resp.text}"
         data = resp.json()
         obj_id = data.get('id')
         if obj_id is not None:
             add_object_to_session(session_id, class_name, obj_id)
-        return json.dumps({'class': class_name, 'id': obj_id, 'status': data.get('status')}, indent=2)
+        return respond(session_id, {'class': class_name, 'id': obj_id, 'status': data.get('status')})
     except Exception as e:
         return f"Error: {e}"
 
@@ -134,14 +645,18 @@ async def update_feature(session_id: str, class_name: str, object_id: str, featu
         except Exception:
             body_value = value
 
-        resp = make_request(
+        error = validate_update_call(session_id, class_name, parsed_object_id, feature_name, body_value)
+        if error:
+            return respond(session_id, error)
+
+        resp = await make_request(
             'PUT', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}/{feature_name}',
             json={'value': body_value},
             headers={'Content-Type': 'application/json'}
         )
         if resp.status_code != 200:
             return f"Error updating {class_name}[{parsed_object_id}].{feature_name}: {resp.text}"
-        return json.dumps({'status': 'updated', 'class': class_name, 'id': parsed_object_id, 'feature': feature_name, 'value': body_value}, indent=2)
+        return respond(session_id, {'status': 'updated', 'class': class_name, 'id': parsed_object_id, 'feature': feature_name, 'value': body_value})
     except Exception as e:
         return f"Error: {e}"
 
@@ -153,55 +668,144 @@ async def clear_feature(session_id: str, class_name: str, object_id: str, featur
         if session_id not in active_sessions:
             return f"Session {session_id} not found."
         parsed_object_id = parse_id_from_user_input(object_id)
-        resp = make_request('DELETE', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}/{feature_name}')
+        index = get_metamodel_index(session_id)
+        error = index.check_feature(class_name, feature_name) if index else None
+        if error:
+            return respond(session_id, error)
+        resp = await make_request('DELETE', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}/{feature_name}')
         if resp.status_code != 200:
             return f"Error clearing {class_name}[{parsed_object_id}].{feature_name}: {resp.text}"
-        return json.dumps({'status': 'cleared', 'class': class_name, 'id': parsed_object_id, 'feature': feature_name}, indent=2)
+        return respond(session_id, {'status': 'cleared', 'class': class_name, 'id': parsed_object_id, 'feature': feature_name})
     except Exception as e:
         return f"Error: {e}"
 
 
 @mcp.tool(name="delete_object",
-          description="Delete an object. Provide session_id, class_name, object_id.")
-async def delete_object(session_id: str, class_name: str, object_id: str) -> str:
+          description="Delete an object. Provide session_id, object_id and class_name (optional for objects created through this client).")
+async def delete_object(session_id: str, class_name: str = "", object_id: str = "") -> str:
     try:
         if session_id not in active_sessions:
             return f"Session {session_id} not found."
         parsed_object_id = parse_id_from_user_input(object_id)
-        resp = make_request('DELETE', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}')
+        class_name = class_name or find_object_class(session_id, parsed_object_id)
+        if not class_name:
+            return f"Error: object {parsed_object_id} is not tracked in this session; provide class_name."
+        resp = await make_request('DELETE', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}')
         if resp.status_code != 200:
             return f"Error deleting {class_name}[{parsed_object_id}]: {resp.text}"
         remove_object_from_session(session_id, class_name, parsed_object_id)
-        return json.dumps({'status': 'deleted', 'class': class_name, 'id': parsed_object_id}, indent=2)
+        return respond(session_id, {'status': 'deleted', 'class': class_name, 'id': parsed_object_id})
     except Exception as e:
         return f"Error: {e}"
 
 
 @mcp.tool(name="list_features",
-          description="List features of a class using the stateless introspection endpoint. Provide session_id and class_name.")
+          description="List features of a class (inherited ones included) with type, multiplicity, containment and opposite. Provide session_id and class_name.")
 async def list_features(session_id: str, class_name: str) -> str:
     try:
         if session_id not in active_sessions:
             return f"Session {session_id} not found."
-        resp = make_request('GET', f'/metamodel/{session_id}/{class_name}/features')
+        index = get_metamodel_index(session_id)
+        if index is not None:
+            error = check_class(index, class_name)
+            if error:
+                return f"Error listing features for {class_name}: {error}"
+            return respond(session_id, index.describe_class(class_name))
+        resp = await make_request('GET', f'/metamodel/{session_id}/{class_name}/features')
         if resp.status_code != 200:
             return f"Error listing features for {class_name}: {resp.text}"
-        return json.dumps(resp.json(), indent=2)
+        return respond(session_id, resp.json())
     except Exception as e:
         return f"Error: {e}"
 
 
 @mcp.tool(name="inspect_instance",
-          description="Inspect an instance's values using stateless introspection. Provide session_id, class_name, object_id.")
-async def inspect_instance(session_id: str, class_name: str, object_id: str) -> str:
+          description="Inspect an instance's values using stateless introspection. Provide session_id, object_id and class_name (optional for objects created through this client).")
+async def inspect_instance(session_id: str, class_name: str = "", object_id: str = "") -> str:
     try:
         if session_id not in active_sessions:
             return f"Session {session_id} not found."
         parsed_object_id = parse_id_from_user_input(object_id)
-        resp = make_request('GET', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}')
+        class_name = class_name or find_object_class(session_id, parsed_object_id)
+        if not class_name:
+            return f"Error: object {parsed_object_id} is not tracked in this session; provide class_name."
+        resp = await make_request('GET', f'/metamodel/{session_id}/{class_name}/{parsed_object_id}')
         if resp.status_code != 200:
             return f"Error inspecting {class_name}[{parsed_object_id}]: {resp.text}"
-        return json.dumps(resp.json(), indent=2)
+        return respond(session_id, resp.json())
+    except Exception as e:
+        return f"Error: {e}"
+
+
+@mcp.tool(name="apply_operations",
+          description=("Apply an ordered batch of operations in one call. Provide session_id and operations, a JSON list of "
+                       "{op: create|update|clear|delete, class_name, object_id, feature_name, value, ref}. A create with "
+                       "ref='fam' lets later operations use '$fam' as object_id or inside value. Returns one line per operation."))
+async def apply_operations(session_id: str, operations: str) -> str:
+    try:
+        if session_id not in active_sessions:
+            return f"Session {session_id} not found."
+        try:
+            ops = parse_operations(operations)
+        except ValueError as e:
+            return f"Error: invalid operations: {e}"
+        index = get_metamodel_index(session_id)
+        ref_classes = {op['ref']: op['class_name'] for op in ops if op['op'] == 'create' and op.get('ref')}
+
+        def class_of(oid: Any) -> Optional[str]:
+            if is_placeholder(oid, ref_classes):
+                return ref_classes.get(oid[1:])
+            return find_object_class(session_id, oid)
+
+        def is_reference(class_name: str, feature_name: str) -> bool:
+            feature = index.get_feature(class_name, feature_name) if index is not None else None
+            return feature is None or feature.kind == 'reference'
+
+        for idx, op in enumerate(ops):
+            error = check_class(index, op['class_name'], instantiable=op['op'] == 'create')
+            if error:
+                return f"Error: invalid operations: operation {idx} ({op['op']}): {error}"
+            if op['op'] == 'update':
+                details = validate_update_call(session_id, op['class_name'], op['object_id'],
+                                               op['feature_name'], op['value'], class_of=class_of,
+                                               allow_placeholders=ref_classes)
+            elif op['op'] == 'clear' and index is not None:
+                details = index.check_feature(op['class_name'], op['feature_name'])
+            else:
+                details = None
+            if details:
+                return respond(session_id, {'operation': idx, **details})
+
+        refs: Dict[str, Union[str, int]] = {}
+        failed_refs: set = set()
+        results: List[str] = [''] * len(ops)
+        waves = plan_waves(ops, is_reference)
+
+        async def run(idx: int) -> None:
+            op = ops[idx]
+            blocked = [name for name in collect_placeholders(op.get('object_id'), ref_classes)
+                       + collect_placeholders(op.get('value'), ref_classes) if name in failed_refs]
+            if blocked:
+                results[idx] = f"skipped: ${blocked[0]} was not created"
+            else:
+                try:
+                    results[idx] = await execute_operation(session_id, op, refs)
+                except Exception as e:
+                    results[idx] = f"error: {e}"
+            if op['op'] == 'create' and op.get('ref') and op['ref'] not in refs:
+                failed_refs.add(op['ref'])
+
+        for wave in waves:
+            await asyncio.gather(*(run(idx) for idx in wave))
+
+        ok = sum(1 for r in results if r.startswith('ok'))
+        skipped = sum(1 for r in results if r.startswith('skipped'))
+        lines = [f"{ok} ok, {len(ops) - ok - skipped} failed, {skipped} skipped ({len(waves)} waves)"]
+        if refs:
+            lines.append("refs: " + ", ".join(f"${name}={obj_id}" for name, obj_id in refs.items()))
+        for idx, op in enumerate(ops):
+            lines.append(f"{idx} {describe_operation(op)}: {results[idx]}")
+        return "\n".join(lines)
     except Exception as e:
         return f"Error: {e}"
 
@@ -211,37 +815,39 @@ async def inspect_instance(session_id: str, class_name: str, object_id: str) ->
 async def list_session_objects_tool(session_id: str) -> str:
     if session_id not in active_sessions:
         return f"Session {session_id} not found"
-    objs = get_session_objects(session_id)
-    if not objs:
+    tracker = session_objects.get(session_id)
+    if not tracker:
         return f"No objects created via this client in session {session_id}"
     lines = [f"Session {session_id} objects:"]
-    total = 0
-    for cls, ids in objs.items():
+    for cls, ids in tracker.as_dict().items():
         lines.append(f"\n{cls} ({len(ids)} objects):")
         for oid in ids:
             lines.append(f"  ID {oid}")
-        total += len(ids)
-    lines.append(f"\nTotal objects: {total}")
+    lines.append(f"\nTotal objects: {len(tracker)}")
     return "\n".join(lines)
 
 
 @mcp.tool(name="get_session_info",
-          description="Get stored info about a session in this client (metamodel path, routes summary).")
+          description="Get stored info about a session in this client (metamodel path, classes, routes summary).")
 async def get_session_info(session_id: str) -> str:
     data = active_sessions.get(session_id)
     if not data:
         return f"Session {session_id} not found"
+    index = data.get('metamodel')
     info = {
         'sessionId': session_id,
         'metamodelFile': data.get('metamodel_file'),
-        'routes': data.get('routes')
+        'classes': index.class_names() if index else None,
+        'routes': data.get('routes'),
+        'responses': savings(data.get('response_stats', {}))
     }
-    return json.dumps(info, indent=2)
+    return respond(session_id, info)
 
 
 @mcp.tool(name="debug_tools",
-          description="List all registered MCP tools in this process.")
-async def debug_tools() -> str:
+          description="List all registered MCP tools in this process, with session store metrics "
+                      "(include_memory adds the approximate memory of all sessions, which is slow with many).")
+async def debug_tools(include_memory: bool = False) -> str:
     try:
         tool_manager = getattr(mcp, '_tool_manager', None)
         names: List[str] = []
@@ -251,47 +857,72 @@ async def debug_tools() -> str:
             elif hasattr(tool_manager, '_tools') and isinstance(tool_manager._tools, dict):
                 names = list(tool_manager._tools.keys())
         names.sort()
-        return "\n".join([f"Found {len(names)} tools:"] + names)
+        stats = session_metrics(include_memory)
+        memory = f"approx memory: {stats['approx_bytes'] // 1024} KiB, " if include_memory else ""
+        summary = (f"Sessions: {stats['count']}/{stats['max_size'] or 'unbounded'} "
+                   f"(evicted lru={stats['evictions']['lru']}, ttl={stats['evictions']['ttl']}), "
+                   f"tracked objects: {stats['tracked_objects']}, {memory}"
+                   f"{stats['responses']['format']} responses saved ~{stats['responses']['tokens_saved']} tokens")
+        return "\n".join([summary, f"Found {len(names)} tools:"] + names)
     except Exception as e:
         return f"Error: {e}"
 
 
-if __name__ == "__main__":
-    # Optional FastAPI app to expose /tools
+def serve_tools_api(port: int) -> None:
+    """Serve /tools, /stats and /metrics over HTTP (needs FastAPI and uvicorn); blocks, run it in a thread."""
+    # Imported here so the MCP server does not wait for FastAPI and uvicorn to load
     try:
         from fastapi import FastAPI
+        from fastapi.responses import PlainTextResponse
         import uvicorn
     except Exception:  # pragma: no cover
-        FastAPI = None
-        uvicorn = None
-
-    if FastAPI and uvicorn:
-        app = FastAPI()
-
-        @app.get("/tools")
-        def get_tools():
-            tool_manager = getattr(mcp, '_tool_manager', None)
-            tools = []
-            if tool_manager is not None:
-                if hasattr(tool_manager, 'tools') and isinstance(tool_manager.tools, dict):
-                    for name, tool in tool_manager.tools.items():
-                        desc = getattr(tool, 'description', '')
-                        tools.append({"name": name, "description": desc})
-                elif hasattr(tool_manager, '_tools') and isinstance(tool_manager._tools, dict):
-                    for name, tool in tool_manager._tools.items():
-                        desc = getattr(tool, 'description', '')
-                        tools.append({"name": name, "description": desc})
-            return {"tools": tools}
-
-        def run_fastapi():
-            logger.info("Starting FastAPI server on port 8082")
-            uvicorn.run(app, host="0.0.0.0", port=8082, log_level="info")
-
-        threading.Thread(target=run_fastapi, daemon=True).start()
+        logger.info("FastAPI or uvicorn not installed, /tools API disabled")
+        return
+
+    app = FastAPI()
+
+    @app.get("/tools")
+    def get_tools():
+        tool_manager = getattr(mcp, '_tool_manager', None)
+        tools = []
+        if tool_manager is not None:
+            if hasattr(tool_manager, 'tools') and isinstance(tool_manager.tools, dict):
+                for name, tool in tool_manager.tools.items():
+                    desc = getattr(tool, 'description', '')
+                    tools.append({"name": name, "description": desc})
+            elif hasattr(tool_manager, '_tools') and isinstance(tool_manager._tools, dict):
+                for name, tool in tool_manager._tools.items():
+                    desc = getattr(tool, 'description', '')
+                    tools.append({"name": name, "description": desc})
+        return {"tools": tools}
+
+    @app.get("/stats")
+    def get_stats(memory: bool = False):
+        # /stats?memory=true adds approx_bytes, sized from a snapshot of every session
+        return session_metrics(include_memory=memory)
+
+    @app.get("/metrics")
+    def get_metrics():
+        return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+    logger.info(f"Starting FastAPI server on port {port}")
+    # log_config=None sends uvicorn's logs (access log included) to the stderr handler above;
+    # its default config writes to stdout, which is the MCP stream under stdio
+    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info", log_config=None)
+
+
+if __name__ == "__main__":
+    instrument_tools()
+    # Slow-call profiles with EMF_PROFILE=sample|cprofile (see mcp-common/tool_profiler.py)
+    tool_profiler.install(mcp)
+
+    # Optional FastAPI app to expose /tools, /stats and /metrics
+    if TOOLS_API_PORT:
+        threading.Thread(target=serve_tools_api, args=(TOOLS_API_PORT,), daemon=True).start()
 
     try:
-        logger.info("Starting EMF Stateless MCP server (transport=stdio)")
-        mcp.run(transport='stdio')
+        logger.info(f"Starting EMF Stateless MCP server (transport={MCP_TRANSPORT})")
+        mcp.run(transport=MCP_TRANSPORT)
     except Exception as e:
         logger.error(f"Server error: {e}")
         sys.exit(1)
@@ -0,0 +1,362 @@
+"""Local stand-in for the stateless EMF REST API of emf-server-master.
+
+Serves the same fixed routes as StatelessRouteGenerator.java with the standard
+library only, so the MCP server and the agent can be run and benchmarked
+without the Gradle-built Java server:
+
+    POST   /metamodel/start                                  upload a .ecore (multipart 'file')
+    DELETE /metamodel/{sessionId}                            close the session
+    GET    /metamodel/{sessionId}/{eClassName}/features      list features
+    POST   /metamodel/{sessionId}/{eClassName}               create an instance
+    GET    /metamodel/{sessionId}/{eClassName}/{id}          inspect an instance
+    DELETE /metamodel/{sessionId}/{eClassName}/{id}          delete an instance
+    PUT    /metamodel/{sessionId}/{eClassName}/{id}/{feat}   set a feature ({"value": ...})
+    DELETE /metamodel/{sessionId}/{eClassName}/{id}/{feat}   clear a feature
+
+Responses and error texts follow the Java server. Metamodels are read with
+MetamodelIndex, and objects are kept in a dict keyed by id, so lookups cost
+the same with 10 or 100k objects (the Java server scans the resource contents).
+Unlike EMF, contained objects stay addressable and eOpposites are not kept in
+sync. A fixed latency plus random jitter can be added to every request to
+model a remote server.
+
+    python emf_standin.py --port 8095 --latency-ms 2 --jitter-ms 1
+    EMF_SERVER_BASE=http://127.0.0.1:8095 python emf_mcp_stateless.py
+
+In-process, for benchmarks:
+
+    server, base_url = start_standin(latency_ms=1)
+    ...
+    server.shutdown()
+"""
+
+import io
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from metamodel_index import BOOL_TYPES, FLOAT_TYPES, INT_TYPES, FeatureInfo, MetamodelIndex
+
+logger = logging.getLogger('emf_standin')
+
+FIXED_ROUTES = {
+    'openapi': '3.0.0',
+    'info': {'title': 'EMF Stateless API', 'version': '1.0.0'},
+    'paths': {
+        '/metamodel/start': {'post': {'summary': 'Upload a metamodel and start a session'}},
+        '/metamodel/{sessionId}': {'delete': {'summary': 'Close session'}},
+        '/metamodel/{sessionId}/{eClassName}': {'post': {'summary': 'Create instance of EClass in session'}},
+        '/metamodel/{sessionId}/{eClassName}/{id}/{featureName}': {
+            'put': {'summary': 'Update feature value of instance'},
+            'delete': {'summary': 'Clear feature value of instance'},
+        },
+        '/metamodel/{sessionId}/{eClassName}/{id}': {'delete': {'summary': 'Delete instance'}},
+    },
+}
+
+
+class HttpError(Exception):
+    """Plain-text error response, as the Java server sends them."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class StandInSession:
+    """One uploaded metamodel and the objects created from it."""
+
+    def __init__(self, index: MetamodelIndex) -> None:
+        self.index = index
+        # id -> {'class': name, 'values': {feature: value}}; references hold object ids
+        self.objects: Dict[int, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def new_id(self) -> int:
+        # Java identity hash codes: positive, non-sequential 31-bit ints
+        while True:
+            object_id = random.getrandbits(31)
+            if object_id and object_id not in self.objects:
+                return object_id
+
+    def find(self, raw_id: str, class_name: str, wrong_class: str = 'Object is not of type: ') -> Dict[str, Any]:
+        try:
+            object_id = int(raw_id)
+        except ValueError:
+            raise HttpError(400, f'Error: For input string: "{raw_id}"')
+        obj = self.objects.get(object_id)
+        if obj is None:
+            raise HttpError(404, 'Object not found')
+        if obj['class'] != class_name:
+            raise HttpError(400, wrong_class + class_name)
+        return obj
+
+
+def _default(feature: FeatureInfo) -> Any:
+    if feature.many:
+        return []
+    if feature.kind == 'attribute':
+        if feature.type in INT_TYPES:
+            return 0
+        if feature.type in FLOAT_TYPES:
+            return 0.0
+        if feature.type in BOOL_TYPES:
+            return False
+    return None
+
+
+def _convert(index: MetamodelIndex, feature: FeatureInfo, value: Any) -> Any:
+    """Attribute value from its JSON form, like EFactory.createFromString."""
+    text = value if isinstance(value, str) else json.dumps(value)
+    try:
+        if feature.type in INT_TYPES:
+            return int(text)
+        if feature.type in FLOAT_TYPES:
+            return float(text)
+        if feature.type in BOOL_TYPES:
+            return text.lower() == 'true'
+    except ValueError:
+        raise HttpError(400, f"Failed to convert value to type {feature.type}: For input string: \"{text}\"")
+    literals = index.enums.get(feature.type or '')
+    if literals is not None and text not in literals:
+        raise HttpError(400, f"Invalid value for type {feature.type}: {text}")
+    return text
+
+
+class StandInState:
+    """Sessions of one stand-in server and the request handlers working on them."""
+
+    def __init__(self) -> None:
+        self.sessions: Dict[str, StandInSession] = {}
+
+    def session(self, session_id: str) -> StandInSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, 'Session not found')
+        return session
+
+    def start(self, metamodel: Optional[bytes]) -> Dict[str, Any]:
+        if not metamodel:
+            raise HttpError(400, 'No metamodel file uploaded')
+        try:
+            index = MetamodelIndex.from_file(io.BytesIO(metamodel))
+        except Exception as e:
+            raise HttpError(400, f'Error: {e}')
+        session_id = '%032x' % random.getrandbits(128)
+        self.sessions[session_id] = StandInSession(index)
+        return {'sessionId': session_id, 'routes': FIXED_ROUTES}
+
+    def close(self, session_id: str) -> Dict[str, Any]:
+        self.session(session_id)
+        del self.sessions[session_id]
+        return {'status': 'closed'}
+
+    def features(self, session_id: str, class_name: str) -> Dict[str, Any]:
+        index = self.session(session_id).index
+        if class_name not in index.classes:
+            raise HttpError(404, f'EClass not found: {class_name}')
+        features = []
+        for f in index.all_features(class_name):
+            item = {'name': f.name, 'many': f.many, 'kind': f.kind, 'type': f.type}
+            if f.kind == 'reference':
+                item['containment'] = f.containment
+            features.append(item)
+        return {'eClass': class_name, 'features': features}
+
+    def create(self, session_id: str, class_name: str) -> Dict[str, Any]:
+        session = self.session(session_id)
+        info = session.index.classes.get(class_name)
+        if info is None:
+            raise HttpError(404, f'EClass not found: {class_name}')
+        if info.abstract or info.interface:
+            raise HttpError(400, f"Error: The class '{class_name}' is not a valid classifier")
+        with session.lock:
+            object_id = session.new_id()
+            session.objects[object_id] = {'class': class_name, 'values': {}}
+        return {'status': 'created', 'id': object_id}
+
+    def inspect(self, session_id: str, class_name: str, raw_id: str) -> Dict[str, Any]:
+        session = self.session(session_id)
+        obj = session.find(raw_id, class_name)
+        values = {}
+        for f in session.index.all_features(class_name):
+            value = obj['values'].get(f.name, _default(f))
+            values[f.name] = list(value) if isinstance(value, list) else value
+        return {'id': int(raw_id), 'eClass': class_name, 'values': values}
+
+    def delete(self, session_id: str, class_name: str, raw_id: str) -> Dict[str, Any]:
+        session = self.session(session_id)
+        session.find(raw_id, class_name)
+        with session.lock:
+            session.objects.pop(int(raw_id), None)
+        return {'status': 'deleted'}
+
+    def update(self, session_id: str, class_name: str, raw_id: str, feature_name: str, body: bytes) -> Dict[str, Any]:
+        session = self.session(session_id)
+        obj = session.find(raw_id, class_name, wrong_class='Eclass is not found: ')
+        feature = session.index.get_feature(class_name, feature_name)
+        if feature is None:
+            raise HttpError(404, f'Feature not found: {feature_name}')
+        try:
+            value = json.loads(body or b'{}').get('value')
+        except (ValueError, AttributeError) as e:
+            raise HttpError(400, f'Error: {e}')
+
+        if feature.kind == 'attribute':
+            if feature.many:
+                value = [_convert(session.index, feature, item) for item in value] if isinstance(value, list) else []
+            elif value is not None:
+                value = _convert(session.index, feature, value)
+        elif feature.many:
+            # Unknown ids are skipped, as the Java server does
+            value = [int(item) for item in value if int(item) in session.objects] if isinstance(value, list) else []
+        else:
+            try:
+                value = int(str(value))
+            except ValueError:
+                raise HttpError(400, f'Error: For input string: "{value}"')
+            if value not in session.objects:
+                raise HttpError(400, 'Referenced object not found')
+        with session.lock:
+            obj['values'][feature_name] = value
+        return {'status': 'updated'}
+
+    def clear(self, session_id: str, class_name: str, raw_id: str, feature_name: str) -> Dict[str, Any]:
+        session = self.session(session_id)
+        obj = session.find(raw_id, class_name)
+        if session.index.get_feature(class_name, feature_name) is None:
+            raise HttpError(404, f'Feature not found: {feature_name}')
+        with session.lock:
+            obj['values'].pop(feature_name, None)
+        return {'status': 'cleared'}
+
+
+def _uploaded_file(content_type: str, body: bytes) -> Optional[bytes]:
+    """Content of the first file part of a multipart/form-data body."""
+    if not content_type.startswith('multipart/form-data'):
+        return None
+    message = BytesParser(policy=HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode('latin-1') + body)
+    for part in message.iter_parts():
+        if part.get_filename() is not None:
+            return part.get_payload(decode=True)
+    return None
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled HTTP clients reuse their connections; headers and body
+    # are written separately, which Nagle's algorithm would delay by an ACK round
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    state: StandInState
+    latency_ms = 0.0
+    jitter_ms = 0.0
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+    def _dispatch(self, method: str) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+        parts = [p for p in self.path.split('?', 1)[0].split('/') if p]
+        try:
+            if not parts or parts[0] != 'metamodel' or len(parts) > 5:
+                raise HttpError(404, 'Resource not found.')
+            result = self._route(method, parts[1:], body)
+        except HttpError as e:
+            self._send(e.status, str(e).encode('utf-8'), 'text/plain; charset=utf-8')
+            return
+        except Exception as e:
+            self._send(400, f'Error: {e}'.encode('utf-8'), 'text/plain; charset=utf-8')
+            return
+        self._send(200, json.dumps(result).encode('utf-8'), 'application/json')
+
+    def _route(self, method: str, parts: List[str], body: bytes) -> Dict[str, Any]:
+        state = self.state
+        if parts == ['start'] and method == 'POST':
+            return state.start(_uploaded_file(self.headers.get('Content-Type', ''), body))
+        if len(parts) == 1 and method == 'DELETE':
+            return state.close(parts[0])
+        if len(parts) == 2 and method == 'POST':
+            return state.create(*parts)
+        if len(parts) == 3:
+            if parts[2] == 'features' and method == 'GET':
+                return state.features(*parts[:2])
+            if method == 'GET':
+                return state.inspect(*parts)
+            if method == 'DELETE':
+                return state.delete(*parts)
+        if len(parts) == 4:
+            if method == 'PUT':
+                return state.update(*parts, body)
+            if method == 'DELETE':
+                return state.clear(*parts)
+        raise HttpError(404, 'Resource not found.')
+
+    def _send(self, status: int, payload: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        self._dispatch('GET')
+
+    def do_POST(self) -> None:
+        self._dispatch('POST')
+
+    def do_PUT(self) -> None:
+        self._dispatch('PUT')
+
+    def do_DELETE(self) -> None:
+        self._dispatch('DELETE')
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8095, latency_ms: float = 0.0,
+                jitter_ms: float = 0.0) -> ThreadingHTTPServer:
+    """HTTP server with fresh state; port 0 picks a free port."""
+    handler = type('BoundStandInHandler', (StandInHandler,), {
+        'state': StandInState(), 'latency_ms': latency_ms, 'jitter_ms': jitter_ms})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_standin(host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+                  jitter_ms: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve from a background thread; returns the server and its base URL."""
+    server = make_server(host, port, latency_ms, jitter_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the stateless EMF REST API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8095, help="Port to bind (default: 8095, as the Java server).")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay, up to this much.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = make_server(args.host, args.port, args.latency_ms, args.jitter_ms)
+    logger.info(f"EMF stand-in listening on http://{args.host}:{server.server_address[1]}"
+                f" (latency {args.latency_ms} ms + up to {args.jitter_ms} ms jitter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,338 @@
+"""In-memory index of an .ecore metamodel, built locally with a streaming parser.
+
+The index answers class/feature questions (inheritance, multiplicity, containment,
+opposites) without a round trip to the EMF server.
+"""
+
+import difflib
+import json
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Any, Callable, Container, Dict, Iterator, List, Optional, Set
+
+XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+
+INT_TYPES = {'EInt', 'int', 'Integer', 'ELong', 'long', 'Long', 'EShort', 'short', 'Short',
+             'EByte', 'byte', 'Byte', 'EBigInteger', 'BigInteger'}
+FLOAT_TYPES = {'EFloat', 'float', 'Float', 'EDouble', 'double', 'Double', 'EBigDecimal', 'BigDecimal'}
+BOOL_TYPES = {'EBoolean', 'boolean', 'Boolean'}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].rsplit(':', 1)[-1]
+
+
+def suggest(name: str, choices: List[str]) -> Optional[str]:
+    matches = difflib.get_close_matches(name, choices, n=1, cutoff=0.6)
+    if not matches:
+        lowered = {c.lower(): c for c in choices}
+        return lowered.get(name.lower())
+    return matches[0]
+
+
+def _ref_name(ref: Optional[str]) -> Optional[str]:
+    """Name of the classifier/feature targeted by an ecore reference.
+
+    Handles '#//Member', '//Member', '/0/Member', 'ecore:EDataType http://...#//EString'
+    and nested package paths such as '#//sub/Member'.
+    """
+    if not ref:
+        return None
+    ref = ref.strip().split()[-1]
+    return ref.rsplit('/', 1)[-1].rsplit('#', 1)[-1] or None
+
+
+@dataclass
+class FeatureInfo:
+    name: str
+    kind: str  # 'attribute' or 'reference'
+    type: Optional[str] = None
+    lower: int = 0
+    upper: int = 1
+    containment: bool = False
+    opposite: Optional[str] = None
+    owner: Optional[str] = None
+
+    @property
+    def many(self) -> bool:
+        return self.upper == -1 or self.upper > 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {
+            'name': self.name,
+            'kind': self.kind,
+            'type': self.type,
+            'many': self.many,
+            'lowerBound': self.lower,
+            'upperBound': self.upper,
+        }
+        if self.kind == 'reference':
+            item['containment'] = self.containment
+            if self.opposite:
+                item['opposite'] = self.opposite
+        if self.owner:
+            item['declaredIn'] = self.owner
+        return item
+
+
+@dataclass
+class ClassInfo:
+    name: str
+    abstract: bool = False
+    interface: bool = False
+    supertypes: List[str] = field(default_factory=list)
+    features: List[FeatureInfo] = field(default_factory=list)
+
+
+class MetamodelIndex:
+    """Classes, enums and (inherited) structural features of one metamodel."""
+
+    def __init__(self) -> None:
+        self.classes: Dict[str, ClassInfo] = {}
+        self.enums: Dict[str, List[str]] = {}
+        self.datatypes: Set[str] = set()
+        self._all_features: Dict[str, List[FeatureInfo]] = {}
+        self._ancestors: Dict[str, Set[str]] = {}
+
+    # --- Construction ---
+
+    @classmethod
+    def from_file(cls, path: str) -> 'MetamodelIndex':
+        """Parse an .ecore/.xmi metamodel file incrementally (iterparse)."""
+        index = cls()
+        current_class: Optional[ClassInfo] = None
+        current_enum: Optional[List[str]] = None
+        current_feature: Optional[FeatureInfo] = None
+
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                if tag == 'eClassifiers':
+                    kind = _local(elem.get(XSI_TYPE, ''))
+                    name = elem.get('name')
+                    if kind == 'EClass' and name:
+                        current_class = ClassInfo(
+                            name=name,
+                            abstract=elem.get('abstract') == 'true',
+                            interface=elem.get('interface') == 'true',
+                            supertypes=[_ref_name(r) for r in elem.get('eSuperTypes', '').split()],
+                        )
+                        index.classes.setdefault(name, current_class)
+                    elif kind == 'EEnum' and name:
+                        current_enum = index.enums.setdefault(name, [])
+                    elif name:
+                        index.datatypes.add(name)
+                elif tag == 'eLiterals' and current_enum is not None:
+                    literal = elem.get('literal') or elem.get('name')
+                    if literal:
+                        current_enum.append(literal)
+                elif tag == 'eGenericSuperTypes' and current_class is not None and current_feature is None:
+                    name = _ref_name(elem.get('eClassifier'))
+                    if name and name not in current_class.supertypes:
+                        current_class.supertypes.append(name)
+                elif tag == 'eStructuralFeatures' and current_class is not None:
+                    kind = _local(elem.get(XSI_TYPE, ''))
+                    current_feature = FeatureInfo(
+                        name=elem.get('name', ''),
+                        kind='reference' if kind == 'EReference' else 'attribute',
+                        type=_ref_name(elem.get('eType')),
+                        lower=int(elem.get('lowerBound', '0')),
+                        upper=int(elem.get('upperBound', '1')),
+                        containment=elem.get('containment') == 'true',
+                        opposite=_ref_name(elem.get('eOpposite')),
+                        owner=current_class.name,
+                    )
+                    current_class.features.append(current_feature)
+                elif tag == 'eGenericType' and current_feature is not None and current_feature.type is None:
+                    current_feature.type = _ref_name(elem.get('eClassifier'))
+            else:
+                if tag == 'eClassifiers':
+                    current_class = None
+                    current_enum = None
+                elif tag == 'eStructuralFeatures':
+                    current_feature = None
+                # Only the open classifier path is kept in memory
+                elem.clear()
+        return index
+
+    # --- Queries ---
+
+    def class_names(self, include_abstract: bool = True) -> List[str]:
+        return sorted(
+            name for name, info in self.classes.items()
+            if include_abstract or not (info.abstract or info.interface)
+        )
+
+    def get_class(self, class_name: str) -> Optional[ClassInfo]:
+        return self.classes.get(class_name)
+
+    def ancestors(self, class_name: str) -> Set[str]:
+        """All (transitive) supertypes of class_name, including itself."""
+        if class_name not in self._ancestors:
+            seen: Set[str] = set()
+            stack = [class_name]
+            while stack:
+                name = stack.pop()
+                if name in seen:
+                    continue
+                seen.add(name)
+                info = self.classes.get(name)
+                if info:
+                    stack.extend(s for s in info.supertypes if s)
+            self._ancestors[class_name] = seen
+        return self._ancestors[class_name]
+
+    def is_subtype(self, class_name: str, expected: str) -> bool:
+        return expected in ('EObject', class_name) or expected in self.ancestors(class_name)
+
+    def all_features(self, class_name: str) -> List[FeatureInfo]:
+        """Own and inherited features, in EMF's eAllStructuralFeatures order."""
+        if class_name not in self._all_features:
+            self._all_features[class_name] = list(self._iter_features(class_name, set()))
+        return self._all_features[class_name]
+
+    def _iter_features(self, class_name: str, visited: Set[str]) -> Iterator[FeatureInfo]:
+        info = self.classes.get(class_name)
+        if info is None or class_name in visited:
+            return
+        visited.add(class_name)
+        for supertype in info.supertypes:
+            if supertype:
+                yield from self._iter_features(supertype, visited)
+        yield from info.features
+
+    def get_feature(self, class_name: str, feature_name: str) -> Optional[FeatureInfo]:
+        for feature in self.all_features(class_name):
+            if feature.name == feature_name:
+                return feature
+        return None
+
+    def describe_class(self, class_name: str) -> Dict[str, Any]:
+        """Same shape as the server's /features endpoint, with multiplicity and opposites."""
+        info = self.classes[class_name]
+        return {
+            'eClass': class_name,
+            'abstract': info.abstract or info.interface,
+            'supertypes': sorted(self.ancestors(class_name) - {class_name}),
+            'features': [f.to_dict() for f in self.all_features(class_name)],
+        }
+
+    # --- Validation ---
+
+    def check_feature(self, class_name: str, feature_name: str) -> Optional[Dict[str, Any]]:
+        """Structured error if class_name or feature_name does not exist, else None."""
+        if class_name not in self.classes:
+            guess = suggest(class_name, list(self.classes))
+            return {
+                'error': 'unknown_class',
+                'message': f"EClass not found: {class_name}",
+                'suggestion': f"Did you mean '{guess}'?" if guess else f"Known classes: {', '.join(self.class_names())}",
+            }
+        if self.get_feature(class_name, feature_name) is None:
+            names = [f.name for f in self.all_features(class_name)]
+            guess = suggest(feature_name, names)
+            return {
+                'error': 'unknown_feature',
+                'message': f"{class_name} has no feature '{feature_name}'",
+                'suggestion': (f"Did you mean '{guess}'? " if guess else "") + f"Features of {class_name}: {', '.join(names)}",
+            }
+        return None
+
+    def validate_update(
+        self,
+        class_name: str,
+        feature_name: str,
+        value: Any,
+        class_of: Optional[Callable[[Any], Optional[str]]] = None,
+        allow_placeholders: Container[str] = (),
+    ) -> Optional[Dict[str, Any]]:
+        """Check an update_feature call against the metamodel.
+
+        class_of maps an object ID to its class when known, so reference targets
+        can be type-checked. allow_placeholders names the '$name' references a
+        batch defines, accepted where object IDs are expected. Returns a
+        structured error with a suggested fix, or None when the call looks valid.
+        """
+        error = self.check_feature(class_name, feature_name)
+        if error:
+            return error
+        feature = self.get_feature(class_name, feature_name)
+        base = {'class': class_name, 'feature': feature_name, 'expected': feature.to_dict()}
+
+        if feature.many and not isinstance(value, list):
+            return {'error': 'multiplicity',
+                    'message': f"{class_name}.{feature_name} is multi-valued and expects a list",
+                    'suggestion': f"Pass a JSON list, e.g. value='{_as_json_list(value)}'", **base}
+        if not feature.many and isinstance(value, list):
+            hint = f"Pass a single value, e.g. value='{value[0]}'" if len(value) == 1 else "Pass a single value, not a list"
+            return {'error': 'multiplicity',
+                    'message': f"{class_name}.{feature_name} is single-valued (upper bound {feature.upper})",
+                    'suggestion': hint, **base}
+
+        for item in value if isinstance(value, list) else [value]:
+            if feature.kind == 'reference':
+                error = self._check_reference(feature, item, class_of, allow_placeholders)
+            else:
+                error = self._check_attribute(feature, item)
+            if error:
+                return {**error, **base}
+        return None
+
+    def _check_attribute(self, feature: FeatureInfo, item: Any) -> Optional[Dict[str, str]]:
+        type_name = feature.type or ''
+        text = str(item).strip()
+        if type_name in BOOL_TYPES:
+            if isinstance(item, bool) or text.lower() in ('true', 'false'):
+                return None
+            return {'error': 'type_mismatch', 'message': f"{feature.name} expects {type_name}, got {item!r}",
+                    'suggestion': "Use true or false"}
+        if type_name in INT_TYPES:
+            try:
+                if not isinstance(item, bool) and int(text) == float(text):
+                    return None
+            except ValueError:
+                pass
+            return {'error': 'type_mismatch', 'message': f"{feature.name} expects {type_name}, got {item!r}",
+                    'suggestion': "Use a whole number"}
+        if type_name in FLOAT_TYPES:
+            try:
+                if not isinstance(item, bool):
+                    float(text)
+                    return None
+            except ValueError:
+                pass
+            return {'error': 'type_mismatch', 'message': f"{feature.name} expects {type_name}, got {item!r}",
+                    'suggestion': "Use a number"}
+        literals = self.enums.get(type_name)
+        if literals and text not in literals:
+            guess = suggest(text, literals)
+            return {'error': 'type_mismatch', 'message': f"{feature.name} expects a {type_name} literal, got {item!r}",
+                    'suggestion': (f"Did you mean '{guess}'? " if guess else "") + f"Literals: {', '.join(literals)}"}
+        return None
+
+    def _check_reference(
+        self,
+        feature: FeatureInfo,
+        item: Any,
+        class_of: Optional[Callable[[Any], Optional[str]]],
+        allow_placeholders: Container[str],
+    ) -> Optional[Dict[str, str]]:
+        expected = feature.type or 'EObject'
+        is_placeholder = isinstance(item, str) and item.startswith('$') and item[1:] in allow_placeholders
+        if not is_placeholder and (isinstance(item, bool) or not str(item).strip().lstrip('-').isdigit()):
+            hint = (" ('$name' placeholders only refer to objects created with ref='name' "
+                    "earlier in the same apply_operations batch)") if str(item).startswith('$') else ""
+            return {'error': 'type_mismatch',
+                    'message': f"{feature.name} is a reference to {expected} and expects object IDs, got {item!r}",
+                    'suggestion': f"Create or find a {expected} object and pass its numeric ID{hint}"}
+        actual = class_of(item) if class_of else None
+        if actual is not None and not self.is_subtype(actual, expected):
+            allowed = [name for name in self.class_names(include_abstract=False) if self.is_subtype(name, expected)]
+            return {'error': 'reference_target',
+                    'message': f"{feature.name} references {expected}, but object {item} is a {actual}",
+                    'suggestion': f"Pass the ID of a {' / '.join(allowed) or expected} object"}
+        return None
+
+
+def _as_json_list(value: Any) -> str:
+    return json.dumps(value if isinstance(value, list) else [value])
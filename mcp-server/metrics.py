@@ -0,0 +1,196 @@
+"""Counters, gauges and histograms rendered in the Prometheus text format.
+
+The MCP server updates metrics from its event loop on every tool call, so an
+update is a dict lookup and an addition (labelled children are cached). The
+FastAPI side app renders them from another thread: creating a child and
+rendering take the registry lock, updates do not.
+
+    CALLS = Counter('calls_total', 'Calls.', ['tool', 'status'])
+    CALLS.labels('create_object', 'ok').inc()
+    REGISTRY.render()
+"""
+
+import asyncio
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    """Metrics rendered together; collectors refresh scrape-time values first."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self._metrics: List['_Metric'] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: '_Metric') -> None:
+        with self.lock:
+            self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Call collector before each render, e.g. to set gauges from other state."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        with self.lock:
+            for metric in self._metrics:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for values, child in list(metric._children.items()):
+                    labels = dict(zip(metric.labelnames, values))
+                    lines.extend(child.samples(metric.name, labels))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+    return f"{name}{{{text}}} {_format_value(value)}"
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry
+        self._lock = registry.lock if registry is not None else threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for these label values; keep it to skip the lookup on hot paths."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def __getattr__(self, attr: str):
+        # Unlabelled metrics forward inc/set/observe to their single child
+        children = self.__dict__.get('_children')
+        if attr.startswith('_') or not children or () not in children:
+            raise AttributeError(attr)
+        return getattr(children[()], attr)
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        return [_sample(name, labels, self.value)]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (name it with a _total suffix)."""
+
+    kind = 'counter'
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down."""
+
+    kind = 'gauge'
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            lines.append(_sample(f"{name}_bucket", {**labels, 'le': _format_value(bound)}, cumulative))
+        lines.append(_sample(f"{name}_sum", labels, self.sum))
+        lines.append(_sample(f"{name}_count", labels, cumulative))
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds, by convention) in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+
+async def monitor_loop_lag(histogram: Histogram, gauge: Optional[Gauge] = None, interval: float = 0.5) -> None:
+    """Observe how late the running event loop wakes from a sleep of interval seconds, forever."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        histogram.observe(lag)
+        if gauge is not None:
+            gauge.set(lag)
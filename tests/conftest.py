@@ -0,0 +1,11 @@
+"""Make the flat component directories importable, as their entry points do."""
+
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for component in ('mcp-common', 'mcp-server', 'mcp-agent', 'benchmarks'):
+    path = os.path.join(REPO_DIR, component)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,64 @@
+"""run_batch keeps going when a connection lease or an agent start fails."""
+
+import asyncio
+import io
+import json
+from contextlib import asynccontextmanager
+
+import batch
+
+
+class FakeClient:
+    server_generation = 0
+    connected = True
+
+
+class FlakyPool:
+    """Fails the lease calls whose (1-based) number is in failing."""
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.leases = 0
+
+    @asynccontextmanager
+    async def lease(self):
+        self.leases += 1
+        if self.leases in self.failing:
+            raise RuntimeError(f"lease {self.leases} failed")
+        yield FakeClient()
+
+
+class FakeAgent:
+    def __init__(self, client, memory=None, **kwargs):
+        self.client = client
+
+    async def initialize(self):
+        pass
+
+
+async def finished(agent, task, timeout):
+    return {**batch.new_record(task), "latency_s": 0.0}
+
+
+def run(pool, count, monkeypatch, concurrency=1):
+    monkeypatch.setattr(batch, "EMFStatelessAgent", FakeAgent)
+    monkeypatch.setattr(batch, "run_task", finished)
+    output = io.StringIO()
+    tasks = [{"id": str(i), "instruction": "do it"} for i in range(count)]
+    totals = asyncio.run(batch.run_batch(pool, tasks, output, concurrency=concurrency))
+    return totals, {r["id"]: r for r in map(json.loads, output.getvalue().splitlines())}
+
+
+def test_failed_start_is_retried(monkeypatch):
+    totals, records = run(FlakyPool({1}), 2, monkeypatch)
+    assert totals["by_status"] == {"ok": 2}
+    assert (records["0"]["attempts"], records["1"]["attempts"]) == (2, 1)
+
+
+def test_failed_start_is_recorded_and_the_batch_carries_on(monkeypatch):
+    totals, records = run(FlakyPool({1, 2, 3}), 4, monkeypatch, concurrency=2)
+    assert totals["by_status"] == {"error": 1, "ok": 3}
+    failed = [r for r in records.values() if r["status"] == "error"]
+    assert len(failed) == 1
+    assert failed[0]["attempts"] == 2
+    assert failed[0]["error"].startswith("could not start an agent: RuntimeError: lease")
@@ -0,0 +1,107 @@
+"""parse_operations and plan_waves of the stateless server's apply_operations tool."""
+
+import pytest
+
+from emf_mcp_stateless import parse_operations, plan_waves
+
+
+def create(class_name, ref=None):
+    op = {'op': 'create', 'class_name': class_name}
+    if ref:
+        op['ref'] = ref
+    return op
+
+
+def update(class_name, object_id, feature_name, value):
+    return {'op': 'update', 'class_name': class_name, 'object_id': object_id,
+            'feature_name': feature_name, 'value': value}
+
+
+def test_parse_accepts_json_and_normalises_ops():
+    ops = parse_operations('[{"op": "CREATE", "class_name": "Family", "ref": "$fam"},'
+                           ' {"op": "update", "class_name": "Family", "object_id": "$fam",'
+                           ' "feature_name": "sons", "value": "[1, 2]"}]')
+    assert [op['op'] for op in ops] == ['create', 'update']
+    assert ops[0]['ref'] == 'fam'
+    # JSON-looking strings are decoded, as update_feature does
+    assert ops[1]['value'] == [1, 2]
+
+
+@pytest.mark.parametrize('raw, message', [
+    ('{"op": "create"}', 'JSON list'),
+    ('[1]', 'not an object'),
+    ('[{"op": "rename", "class_name": "A"}]', "unknown op 'rename'"),
+    ('[{"op": "update", "class_name": "A", "object_id": 1}]', 'missing feature_name, value'),
+    ('[{"op": "delete", "class_name": "A", "object_id": ""}]', 'missing object_id'),
+])
+def test_parse_rejects_malformed_batches(raw, message):
+    with pytest.raises(ValueError, match=message):
+        parse_operations(raw)
+
+
+def test_parse_rejects_placeholders_used_before_their_create():
+    with pytest.raises(ValueError, match=r'\$m is not created by an earlier operation'):
+        parse_operations([update('Member', 1, 'friend', '$m'), create('Member', 'm')])
+
+
+def test_parse_rejects_object_ids_naming_no_ref():
+    with pytest.raises(ValueError, match=r'\$x is not created by any operation'):
+        parse_operations([update('Member', '$x', 'firstName', 'Ann')])
+
+
+def test_parse_rejects_refs_defined_twice():
+    with pytest.raises(ValueError, match='defined twice'):
+        parse_operations([create('Member', 'm'), create('Member', '$m')])
+
+
+def test_dollar_strings_that_name_no_ref_are_plain_values():
+    ops = parse_operations([create('Product', 'p'), update('Product', '$p', 'label', '$5 price')])
+    assert ops[1]['value'] == '$5 price'
+    assert plan_waves(ops) == [[0], [1]]
+
+
+def test_independent_creates_share_a_wave():
+    ops = parse_operations([create('Member'), create('Member'), create('Family')])
+    assert plan_waves(ops) == [[0, 1, 2]]
+
+
+def test_placeholder_users_wait_for_their_create():
+    ops = parse_operations([
+        create('Family', 'fam'),
+        create('Member', 'kid'),
+        update('Family', '$fam', 'sons', ['$kid']),
+        update('Member', '$kid', 'firstName', 'Ann'),
+    ])
+    assert plan_waves(ops) == [[0, 1], [2], [3]]
+
+
+def test_edits_of_one_object_keep_their_order():
+    ops = parse_operations([
+        update('Member', 7, 'firstName', 'Ann'),
+        update('Member', '7', 'firstName', 'Bea'),
+        update('Member', 8, 'firstName', 'Cid'),
+    ])
+    assert plan_waves(ops) == [[0, 2], [1]]
+
+
+def test_literal_reference_ids_in_values_wait_for_edits_of_that_object():
+    ops = parse_operations([
+        update('Member', 7, 'firstName', 'Ann'),
+        update('Family', 3, 'father', '7'),
+        update('Family', 4, 'sons', [9, 7]),
+    ])
+    # Without an index every scalar value may be an object ID
+    assert plan_waves(ops) == [[0], [1], [2]]
+
+
+def test_attribute_values_do_not_order_unrelated_edits():
+    ops = parse_operations([
+        update('Member', 7, 'firstName', 'Ann'),
+        update('Member', 8, 'age', 7),
+    ])
+
+    def is_reference(class_name, feature_name):
+        return feature_name not in ('firstName', 'age')
+
+    assert plan_waves(ops) == [[0], [1]]
+    assert plan_waves(ops, is_reference) == [[0, 1]]
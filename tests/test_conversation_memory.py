@@ -0,0 +1,121 @@
+"""ConversationMemory windowing and ModelState folding of tool traffic."""
+
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from memory import ConversationMemory, ModelState, approx_tokens
+
+
+def tool_round(call_id, name, args, result):
+    """An AIMessage requesting one tool call and the ToolMessage answering it."""
+    return [AIMessage(content="", tool_calls=[{"id": call_id, "name": name, "args": args}]),
+            ToolMessage(content=result, tool_call_id=call_id)]
+
+
+def turn(index, tool_result="ok"):
+    return [HumanMessage(content=f"request {index}"),
+            *tool_round(f"call-{index}", "get_session_info", {}, tool_result),
+            AIMessage(content=f"answer {index}")]
+
+
+def test_model_state_folds_single_calls():
+    state = ModelState()
+    state.observe([
+        *tool_round("1", "create_object", {"class_name": "Family"}, '{"id": 11, "eClass": "Family"}'),
+        *tool_round("2", "create_object", {"class_name": "Member"}, "Created Member id=12"),
+        *tool_round("3", "update_feature", {"class_name": "Family", "object_id": 11,
+                                            "feature_name": "lastName", "value": "March"}, "Updated"),
+        *tool_round("4", "update_feature", {"class_name": "Member", "object_id": 12,
+                                            "feature_name": "firstName", "value": "Jim"}, "Error: boom"),
+        *tool_round("5", "create_object", {"class_name": "Member"}, '{"id": 13}'),
+        *tool_round("6", "delete_object", {"object_id": "13"}, "Deleted"),
+    ])
+    assert state.objects == {
+        "11": {"class": "Family", "features": {"lastName": "March"}},
+        "12": {"class": "Member", "features": {}},
+    }
+    state.observe(tool_round("7", "clear_feature", {"object_id": 11, "feature_name": "lastName"}, "Cleared"))
+    assert state.objects["11"]["features"] == {}
+    state.observe(tool_round("8", "start_session", {}, "Session s2 started"))
+    assert state.objects == {}
+
+
+def test_model_state_folds_apply_operations_results():
+    operations = [
+        {"op": "create", "class_name": "Family", "ref": "fam"},
+        {"op": "create", "class_name": "Member", "ref": "dad"},
+        {"op": "update", "class_name": "Family", "object_id": "$fam", "feature_name": "father", "value": "$dad"},
+        {"op": "update", "class_name": "Member", "object_id": "$dad", "feature_name": "age", "value": "x"},
+        {"op": "create", "class_name": "Member", "ref": "son"},
+    ]
+    result = "\n".join([
+        "3 ok, 1 failed, 1 skipped (2 waves)",
+        "refs: $fam=21, $dad=22",
+        "0 create Family as $fam: ok id=21",
+        "1 create Member as $dad: ok id=22",
+        "2 update Family[$fam].father: ok",
+        "3 update Member[$dad].age: error: not an int",
+        "4 create Member as $son: skipped: $x was not created",
+    ])
+    state = ModelState()
+    state.observe(tool_round("1", "apply_operations", {"operations": json.dumps(operations)}, result))
+    assert state.objects == {
+        "21": {"class": "Family", "features": {"father": "22"}},
+        "22": {"class": "Member", "features": {}},
+    }
+
+
+def test_summary_is_cut_to_budget():
+    state = ModelState()
+    for i in range(50):
+        state._create("Member", i)
+        state._set("Member", i, "firstName", f"name-{i}")
+    summary = state.summary(max_tokens=40)
+    lines = summary.splitlines()
+    assert lines[1] == "Member 0: firstName=name-0"
+    assert lines[-1].startswith("... and ") and "list_session_objects" in lines[-1]
+    assert len(summary) <= 40 * 4 + len(lines[-1])
+    assert ModelState().summary(100) == ""
+
+
+def test_trim_keeps_system_and_last_turns():
+    memory = ConversationMemory(max_turns=2, token_budget=0)
+    system = SystemMessage(content="You edit EMF models.")
+    messages = [system, *turn(1), *turn(2), *turn(3)]
+    trimmed = memory.trim(messages)
+    assert trimmed[0] is system
+    assert [m.content for m in trimmed if isinstance(m, HumanMessage)] == ["request 2", "request 3"]
+    assert len(ConversationMemory.split_turns(messages)) == 3
+
+
+def test_prepare_replaces_dropped_turns_with_model_summary():
+    memory = ConversationMemory(max_turns=1, token_budget=0)
+    memory.observe(tool_round("c", "create_object", {"class_name": "Family"}, '{"id": 5}'))
+    system = SystemMessage(content="You edit EMF models.")
+    prepared = memory.prepare([*turn(1), *turn(2)], system)
+    assert prepared[0].content.startswith("You edit EMF models.\n\nModel state from earlier turns")
+    assert "Family 5" in prepared[0].content
+    assert prepared[1].content == "request 2"
+    # Nothing dropped: the system prompt is passed through unchanged
+    assert memory.prepare(turn(1), system)[0].content == "You edit EMF models."
+
+
+def test_prepare_drops_old_turns_to_fit_the_budget():
+    memory = ConversationMemory(max_turns=10, token_budget=150)
+    messages = [*turn(1, "x" * 800), *turn(2, "y" * 800), *turn(3)]
+    prepared = memory.prepare(messages, None)
+    assert [m.content for m in prepared if isinstance(m, HumanMessage)] == ["request 3"]
+    assert approx_tokens(prepared) <= 150
+
+
+def test_prepare_shortens_old_tool_results_of_the_current_turn():
+    memory = ConversationMemory(max_turns=10, token_budget=200)
+    messages = [HumanMessage(content="build it"),
+                *tool_round("a", "list_session_objects", {}, "a" * 1000),
+                *tool_round("b", "list_session_objects", {}, "b" * 500)]
+    prepared = memory.prepare(messages, None)
+    tools = [m for m in prepared if isinstance(m, ToolMessage)]
+    assert tools[0].content.endswith("... [700 chars omitted]")
+    # The latest tool result always stays whole
+    assert tools[1].content == "b" * 500
@@ -0,0 +1,169 @@
+"""MetamodelIndex built from a small .ecore written by the tests."""
+
+import pytest
+
+from metamodel_index import MetamodelIndex
+
+ECORE = """<?xml version="1.0" encoding="UTF-8"?>
+<ecore:EPackage xmi:version="2.0" xmlns:xmi="http://www.omg.org/XMI"
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xmlns:ecore="http://www.eclipse.org/emf/2002/Ecore" name="zoo" nsURI="http://zoo" nsPrefix="zoo">
+  <eClassifiers xsi:type="ecore:EClass" name="Named" abstract="true">
+    <eStructuralFeatures xsi:type="ecore:EAttribute" name="name"
+        eType="ecore:EDataType http://www.eclipse.org/emf/2002/Ecore#//EString"/>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EClass" name="Zoo" eSuperTypes="#//Named">
+    <eStructuralFeatures xsi:type="ecore:EReference" name="animals" upperBound="-1"
+        eType="#//Animal" containment="true"/>
+    <eStructuralFeatures xsi:type="ecore:EReference" name="keeper" eType="#//Keeper"/>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EClass" name="Animal" abstract="true" eSuperTypes="#//Named">
+    <eStructuralFeatures xsi:type="ecore:EAttribute" name="age"
+        eType="ecore:EDataType http://www.eclipse.org/emf/2002/Ecore#//EInt"/>
+    <eStructuralFeatures xsi:type="ecore:EAttribute" name="tame"
+        eType="ecore:EDataType http://www.eclipse.org/emf/2002/Ecore#//EBoolean"/>
+    <eStructuralFeatures xsi:type="ecore:EAttribute" name="diet" eType="#//Diet"/>
+    <eStructuralFeatures xsi:type="ecore:EReference" name="keeper" lowerBound="1"
+        eType="#//Keeper" eOpposite="#//Keeper/animals"/>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EClass" name="Lion">
+    <eGenericSuperTypes eClassifier="#//Animal"/>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EClass" name="Keeper" eSuperTypes="#//Named">
+    <eStructuralFeatures xsi:type="ecore:EReference" name="animals" upperBound="-1"
+        eType="#//Animal" eOpposite="#//Animal/keeper"/>
+    <eStructuralFeatures xsi:type="ecore:EAttribute" name="weight">
+      <eGenericType eClassifier="ecore:EDataType http://www.eclipse.org/emf/2002/Ecore#//EDouble"/>
+    </eStructuralFeatures>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EEnum" name="Diet">
+    <eLiterals name="herbivore"/>
+    <eLiterals name="carnivore" value="1"/>
+  </eClassifiers>
+  <eClassifiers xsi:type="ecore:EDataType" name="Date" instanceClassName="java.util.Date"/>
+</ecore:EPackage>
+"""
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / 'zoo.ecore'
+    path.write_text(ECORE, encoding='utf-8')
+    return MetamodelIndex.from_file(str(path))
+
+
+def test_classes_enums_and_datatypes(index):
+    assert index.class_names() == ['Animal', 'Keeper', 'Lion', 'Named', 'Zoo']
+    assert index.class_names(include_abstract=False) == ['Keeper', 'Lion', 'Zoo']
+    assert index.enums == {'Diet': ['herbivore', 'carnivore']}
+    assert index.datatypes == {'Date'}
+
+
+def test_supertypes_from_attribute_and_generic_supertypes(index):
+    assert index.ancestors('Lion') == {'Lion', 'Animal', 'Named'}
+    assert index.is_subtype('Lion', 'Named')
+    assert index.is_subtype('Keeper', 'EObject')
+    assert not index.is_subtype('Keeper', 'Animal')
+
+
+def test_inherited_features_come_first(index):
+    assert [f.name for f in index.all_features('Lion')] == ['name', 'age', 'tame', 'diet', 'keeper']
+    feature = index.get_feature('Lion', 'name')
+    assert (feature.type, feature.owner) == ('EString', 'Named')
+    assert index.get_feature('Lion', 'mane') is None
+
+
+def test_feature_details(index):
+    animals = index.get_feature('Zoo', 'animals')
+    assert animals.many and animals.containment and animals.type == 'Animal'
+    keeper = index.get_feature('Animal', 'keeper')
+    assert (keeper.lower, keeper.many, keeper.opposite) == (1, False, 'animals')
+    # eType given as a nested eGenericType
+    assert index.get_feature('Keeper', 'weight').type == 'EDouble'
+
+
+def test_describe_class(index):
+    described = index.describe_class('Lion')
+    assert described['abstract'] is False
+    assert described['supertypes'] == ['Animal', 'Named']
+    keeper = described['features'][-1]
+    assert keeper == {'name': 'keeper', 'kind': 'reference', 'type': 'Keeper', 'many': False,
+                      'lowerBound': 1, 'upperBound': 1, 'containment': False,
+                      'opposite': 'animals', 'declaredIn': 'Animal'}
+
+
+def test_check_feature_suggests_names(index):
+    assert index.check_feature('Lion', 'age') is None
+    error = index.check_feature('Lino', 'age')
+    assert error['error'] == 'unknown_class'
+    assert "'Lion'" in error['suggestion']
+    error = index.check_feature('Lion', 'agee')
+    assert error['error'] == 'unknown_feature'
+    assert error['suggestion'].startswith("Did you mean 'age'?")
+
+
+@pytest.mark.parametrize('class_name, feature_name, value', [
+    ('Lion', 'name', 'Leo'),
+    ('Lion', 'age', 7),
+    ('Lion', 'age', '7'),
+    ('Lion', 'tame', True),
+    ('Lion', 'tame', 'False'),
+    ('Lion', 'diet', 'carnivore'),
+    ('Keeper', 'weight', '81.5'),
+    ('Zoo', 'animals', [1, '2', '$lion']),
+    ('Lion', 'keeper', '$keeper'),
+])
+def test_validate_update_accepts(index, class_name, feature_name, value):
+    assert index.validate_update(class_name, feature_name, value, allow_placeholders={'lion', 'keeper'}) is None
+
+
+@pytest.mark.parametrize('allow_placeholders', [(), {'other'}])
+def test_validate_update_rejects_unknown_placeholders(index, allow_placeholders):
+    result = index.validate_update('Lion', 'keeper', '$keeper', allow_placeholders=allow_placeholders)
+    assert result['error'] == 'type_mismatch'
+    assert 'apply_operations' in result['suggestion']
+
+
+@pytest.mark.parametrize('feature_name, value, error, suggestion', [
+    ('age', 'seven', 'type_mismatch', 'whole number'),
+    ('age', '7.5', 'type_mismatch', 'whole number'),
+    ('age', '7.0', 'type_mismatch', 'whole number'),
+    ('age', True, 'type_mismatch', 'whole number'),
+    ('tame', 'yes', 'type_mismatch', 'true or false'),
+    ('diet', 'carnivor', 'type_mismatch', "Did you mean 'carnivore'?"),
+    ('keeper', 'Bob', 'type_mismatch', 'numeric ID'),
+    ('keeper', [3], 'multiplicity', "value='3'"),
+    ('age', [1, 2], 'multiplicity', 'not a list'),
+])
+def test_validate_update_rejects(index, feature_name, value, error, suggestion):
+    result = index.validate_update('Lion', feature_name, value)
+    assert result['error'] == error
+    assert suggestion in result['suggestion']
+    assert result['expected']['name'] == feature_name
+
+
+def test_validate_update_many_valued_needs_a_list(index):
+    result = index.validate_update('Zoo', 'animals', 4)
+    assert result['error'] == 'multiplicity'
+    assert "value='[4]'" in result['suggestion']
+
+
+def test_validate_update_unknown_feature(index):
+    assert index.validate_update('Lion', 'mane', 'x')['error'] == 'unknown_feature'
+
+
+def test_validate_update_checks_reference_targets(index):
+    classes = {'1': 'Lion', '2': 'Keeper', '3': 'Zoo'}
+
+    def class_of(object_id):
+        return classes.get(str(object_id))
+
+    assert index.validate_update('Zoo', 'animals', [1], class_of) is None
+    assert index.validate_update('Lion', 'keeper', 2, class_of) is None
+    # Unknown objects and placeholders are not type-checked
+    assert index.validate_update('Zoo', 'animals', [9, '$new'], class_of, allow_placeholders={'new'}) is None
+    result = index.validate_update('Zoo', 'animals', [1, 3], class_of)
+    assert result['error'] == 'reference_target'
+    assert result['message'] == 'animals references Animal, but object 3 is a Zoo'
+    # Only concrete subtypes are suggested
+    assert result['suggestion'] == 'Pass the ID of a Lion object'
@@ -0,0 +1,64 @@
+"""Dependency planning and execution order of ParallelToolExecutor."""
+
+import asyncio
+
+from langchain_core.tools import tool
+
+from tools import ParallelToolExecutor
+
+
+def call(name, call_id=None, **args):
+    return {"name": name, "id": call_id or name, "args": args}
+
+
+def test_independent_calls_have_no_dependencies():
+    calls = [call("inspect_instance", object_id=1), call("list_features", class_name="Member"),
+             call("create_object", class_name="Member"), call("update_feature", object_id=2,
+                                                               feature_name="age", value=3)]
+    assert ParallelToolExecutor.plan(calls) == [[], [], [], []]
+
+
+def test_calls_on_the_same_object_keep_their_order():
+    calls = [call("update_feature", object_id=1, feature_name="father", value="2"),
+             call("inspect_instance", object_id=3),
+             call("update_feature", object_id=2, feature_name="firstName", value="Jim"),
+             call("update_feature", object_id=3, feature_name="sons", value=[1, 4]),
+             call("delete_object", object_id="4")]
+    assert ParallelToolExecutor.plan(calls) == [[], [], [0], [0, 1], [3]]
+
+
+def test_exclusive_tools_are_barriers():
+    calls = [call("inspect_instance", object_id=1), call("apply_operations", operations="[]"),
+             call("inspect_instance", object_id=2), call("start_session", metamodel_path="a.ecore")]
+    assert ParallelToolExecutor.plan(calls) == [[], [0], [1], [0, 1, 2]]
+
+
+def test_session_reads_wait_for_edits_only():
+    calls = [call("create_object", class_name="Family"), call("inspect_instance", object_id=5),
+             call("list_session_objects"), call("get_session_info"), call("delete_object", object_id=6)]
+    assert ParallelToolExecutor.plan(calls) == [[], [], [0], [0], [2, 3]]
+
+
+def test_run_returns_results_in_call_order():
+    events = []
+
+    @tool("update_feature")
+    async def update_feature(object_id: int, feature_name: str, value: str) -> str:
+        """Set a feature."""
+        events.append(("start", object_id, value))
+        # The first update on object 1 is the slowest, so only ordering keeps it first
+        await asyncio.sleep(0.02 if value == "a" else 0)
+        events.append(("end", object_id, value))
+        return f"{object_id}.{feature_name}={value}"
+
+    calls = [call("update_feature", "c1", object_id=1, feature_name="x", value="a"),
+             call("update_feature", "c2", object_id=2, feature_name="x", value="b"),
+             call("update_feature", "c3", object_id=1, feature_name="x", value="c"),
+             call("missing", "c4")]
+    messages = asyncio.run(ParallelToolExecutor([update_feature], max_concurrency=2).run(calls))
+    assert [m.tool_call_id for m in messages] == ["c1", "c2", "c3", "c4"]
+    assert [m.content for m in messages[:3]] == ["1.x=a", "2.x=b", "1.x=c"]
+    assert messages[3].status == "error" and "unknown tool 'missing'" in messages[3].content
+    assert events.index(("end", 1, "a")) < events.index(("start", 1, "c"))
+    # Object 2 did not wait for object 1
+    assert events.index(("end", 2, "b")) < events.index(("end", 1, "a"))
@@ -0,0 +1,36 @@
+"""Terse rendering and pretty-JSON sizing of tool results."""
+
+import json
+
+import pytest
+
+from response_format import pretty_size, render
+
+
+def test_terse_keeps_one_entry_per_list_item():
+    text = render({'objects': [{}, {'id': 1, 'name': 'Jim Bob'}, {}], 'tags': []}, fmt='terse')
+    assert text.splitlines() == ['tags=[]', 'objects:', '  - {}', '  - id=1 name="Jim Bob"', '  - {}']
+
+
+def test_terse_renders_empty_values():
+    assert render({}, fmt='terse') == '{}'
+    assert render([], fmt='terse') == '[]'
+    assert render({'sons': {}, 'ok': True, 'none': None}, fmt='terse') == 'sons={} ok=true none=null'
+
+
+@pytest.mark.parametrize('data', [
+    {},
+    [],
+    {'id': 3, 'features': {'sons': [1, 2], 'father': None, 'tags': [], 'meta': {}}},
+    [{'a': [{'b': 'ünïcödé 🎉'}]}, [], [[1], {}], 'x'],
+])
+def test_pretty_size_matches_indented_json(data):
+    assert pretty_size(data) == len(json.dumps(data, indent=2))
+
+
+def test_render_accumulates_stats():
+    stats = {}
+    data = {'id': 1, 'features': {'name': 'March'}}
+    text = render(data, stats, fmt='compact')
+    assert stats == {'responses': 1, 'tokens': (len(text) + 3) // 4,
+                     'pretty_tokens': (len(json.dumps(data, indent=2)) + 3) // 4}
@@ -0,0 +1,133 @@
+"""SessionStore eviction and ObjectTracker indexing."""
+
+import pytest
+
+from session_store import ObjectTracker, SessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def evicted():
+    return []
+
+
+def make_store(clock, evicted, **kwargs):
+    return SessionStore(on_evict=lambda key, value, reason: evicted.append((key, value, reason)),
+                        clock=clock, **kwargs)
+
+
+def test_lru_evicts_least_recently_used(clock, evicted):
+    store = make_store(clock, evicted, max_size=2)
+    store['a'] = 1
+    store['b'] = 2
+    assert store['a'] == 1  # a is now the most recent
+    store['c'] = 3
+    assert evicted == [('b', 2, 'lru')]
+    assert list(store) == ['a', 'c']
+    assert store.evictions['lru'] == 1
+
+
+def test_peek_does_not_refresh_lru_position(clock, evicted):
+    store = make_store(clock, evicted, max_size=2)
+    store['a'] = 1
+    store['b'] = 2
+    assert store.peek('a') == 1
+    assert store.peek('missing', 'default') == 'default'
+    store['c'] = 3
+    assert evicted == [('a', 1, 'lru')]
+
+
+def test_idle_ttl_expires_untouched_entries(clock, evicted):
+    store = make_store(clock, evicted, idle_ttl=10)
+    store['a'] = 1
+    store['b'] = 2
+    clock.now = 6
+    assert store['b'] == 2
+    clock.now = 12
+    assert 'a' not in store
+    assert store['b'] == 2
+    assert evicted == [('a', 1, 'ttl')]
+    clock.now = 30
+    assert store.purge_expired() == 1
+    assert len(store) == 0
+    assert store.evictions == {'lru': 0, 'ttl': 2, 'deleted': 0}
+
+
+def test_delete_reports_deleted(clock, evicted):
+    store = make_store(clock, evicted)
+    store['a'] = 1
+    del store['a']
+    assert evicted == [('a', 1, 'deleted')]
+    with pytest.raises(KeyError):
+        del store['a']
+    assert store.pop('a', None) is None
+
+
+def test_non_positive_limits_mean_unbounded(clock, evicted):
+    store = make_store(clock, evicted, max_size=0, idle_ttl=-1)
+    for i in range(100):
+        store[str(i)] = i
+    clock.now = 1e9
+    assert len(store) == 100
+    assert evicted == []
+
+
+def test_observers_never_evict(clock, evicted):
+    store = make_store(clock, evicted, idle_ttl=10)
+    store['a'] = {'objects': [1, 2, 3]}
+    clock.now = 25
+    assert store.peek_items() == [('a', {'objects': [1, 2, 3]})]
+    stats = store.stats(include_memory=True, expire=False)
+    assert stats['count'] == 1
+    assert stats['oldest_idle_seconds'] == 25
+    assert stats['approx_bytes'] > 0
+    assert evicted == []
+    stats = store.stats()
+    assert stats['count'] == 0
+    assert 'approx_bytes' not in stats
+    assert evicted == [('a', {'objects': [1, 2, 3]}, 'ttl')]
+
+
+def test_tracker_indexes_both_ways():
+    tracker = ObjectTracker()
+    tracker.add('Family', 1)
+    tracker.add('Member', 2)
+    tracker.add('Member', 3)
+    assert tracker.class_of(2) == 'Member'
+    assert tracker.ids('Member') == [2, 3]
+    assert tracker.counts() == {'Family': 1, 'Member': 2}
+    assert tracker.count() == len(tracker) == 3
+    assert 3 in tracker and 4 not in tracker
+
+
+def test_tracker_readd_moves_object_between_classes():
+    tracker = ObjectTracker()
+    tracker.add('Member', 1)
+    tracker.add('Member', 1)
+    assert tracker.count('Member') == 1
+    tracker.add('Family', 1)
+    assert tracker.as_dict() == {'Family': [1]}
+    assert tracker.class_of(1) == 'Family'
+
+
+def test_tracker_discard_drops_empty_classes():
+    tracker = ObjectTracker()
+    tracker.add('Family', 1)
+    tracker.add('Member', 2)
+    assert tracker.discard(1) == 'Family'
+    assert tracker.discard(1) is None
+    assert tracker.counts() == {'Member': 1}
+    assert tracker.ids('Family') == []
+    assert tracker.count('Family') == 0
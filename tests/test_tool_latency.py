@@ -0,0 +1,54 @@
+"""Statistics and baseline comparison helpers of benchmarks/tool_latency.py."""
+
+import json
+
+import pytest
+
+from tool_latency import compare, distribution, percentile
+
+
+@pytest.mark.parametrize('pct, expected', [(0, 1), (10, 1), (50, 5), (90, 9), (95, 10), (99, 10), (100, 10)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile(list(range(1, 11)), pct) == expected
+
+
+def test_percentile_small_inputs():
+    assert percentile([], 50) == 0.0
+    assert percentile([7], 99) == 7
+    assert percentile([1, 2, 3, 4], 50) == 2
+
+
+def test_distribution_reports_milliseconds():
+    assert distribution([]) == {}
+    stats = distribution([0.003, 0.001, 0.002, 0.004])
+    assert stats == {'p50': 2.0, 'p95': 4.0, 'p99': 4.0, 'mean': 2.5, 'max': 4.0}
+
+
+def result(tool, p50, p95, objects=10):
+    return {'metamodel': 'Families', 'objects': objects, 'concurrency': 1, 'tool': tool,
+            'latency_ms': {'p50': p50, 'p95': p95}}
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps({'commit': 'abc1234', 'results': [
+        result('create_object', 2.0, 4.0),
+        result('inspect_instance', 1.0, 2.0),
+    ]}), encoding='utf-8')
+    return str(path)
+
+
+def test_compare_flags_regressions_over_threshold(baseline, capsys):
+    assert compare([result('create_object', 2.1, 4.2), result('inspect_instance', 1.0, 2.5)], baseline, 20)
+    out = capsys.readouterr().out
+    assert 'commit abc1234' in out
+    assert 'inspect_instance: p50 1.00 -> 1.00 ms (+0%), p95 2.00 -> 2.50 ms (+25%)' in out
+
+
+def test_compare_ignores_improvements_and_new_scenarios(baseline, capsys):
+    assert not compare([result('create_object', 1.0, 2.1), result('inspect_instance', 1.0, 2.0, objects=1000),
+                        result('delete_object', 9.0, 9.0)], baseline, 10)
+    out = capsys.readouterr().out
+    assert '(-50%)' in out
+    assert 'delete_object' not in out and 'n=1000' not in out
@@ -0,0 +1,66 @@
+"""ToolResultCache lookups and invalidation."""
+
+from tools import ToolResultCache
+
+
+def make_cache():
+    cache = ToolResultCache()
+    cache.bind("s1")
+    cache.put_instance("Family", "1", '{"id": 1, "father": 2, "sons": [3]}')
+    cache.put_instance("Member", "2", '{"id": 2, "familyFather": 1}')
+    cache.put_instance("Member", "3", '{"id": 3, "familySon": 1}')
+    cache.put_instance("Member", "4", '{"id": 4, "firstName": "Jim"}')
+    cache.put_instance("Family", "5", '{"id": 5, "lastName": "Sailor"}')
+    return cache
+
+
+def cached_ids(cache):
+    return sorted(object_id for _, object_id in cache._instances)
+
+
+def test_hits_and_misses_are_counted():
+    cache = make_cache()
+    assert cache.get_instance("Member", "4") == '{"id": 4, "firstName": "Jim"}'
+    assert cache.get_instance("Member", "9") is None
+    assert cache.get_features("Member") is None
+    cache.put_features("Member", '{"features": ["firstName"]}')
+    assert cache.get_features("Member") == '{"features": ["firstName"]}'
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 0.5)
+    assert (stats["cached_features"], stats["cached_instances"]) == (1, 5)
+
+
+def test_error_results_are_not_cached():
+    cache = ToolResultCache()
+    cache.put_features("Nope", "Error: EClass not found: Nope")
+    cache.put_instance("Member", "7", "Object 7 not found")
+    assert cache.stats()["cached_features"] == cache.stats()["cached_instances"] == 0
+
+
+def test_invalidate_drops_the_object_and_its_neighbours():
+    cache = make_cache()
+    # 2 referred to 1 before the change, and 1 refers to 2
+    cache.invalidate("2")
+    assert cached_ids(cache) == ["3", "4", "5"]
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_invalidate_drops_new_reference_targets():
+    cache = make_cache()
+    cache.invalidate("4", value="[5]")
+    assert cached_ids(cache) == ["1", "2", "3"]
+    cache.invalidate("3", value=["1"])
+    assert cached_ids(cache) == ["2"]
+
+
+def test_invalidate_all_and_bind():
+    cache = make_cache()
+    cache.put_features("Member", '{"features": []}')
+    cache.invalidate_all_instances()
+    assert cache.stats()["invalidations"] == 5
+    assert cache.get_features("Member") is not None
+    cache.bind("s1")
+    assert cache.get_features("Member") is not None
+    cache.bind("s2")
+    assert cache.get_features("Member") is None
+    assert cache.session_id == "s2"